@@ -0,0 +1,47 @@
+"""Benchmark: BitcoinCollector.collect() against a local stub upstream.
+
+Usage: python benchmarks/bench_collect.py [--cycles N]
+"""
+import argparse
+import json
+import time
+from typing import Any, Dict
+
+from common import StubUpstream, summarize
+from collectors.bitcoin import BitcoinCollector
+
+
+def run(cycles: int = 500) -> Dict[str, Any]:
+    """Time full collection cycles over a pooled keep-alive connection."""
+    with StubUpstream() as upstream:
+        collector = BitcoinCollector({
+            'api': {
+                'provider': 'coingecko',
+                'endpoint': upstream.endpoint,
+                # Measure the network path, not the response cache
+                'cache': {'enabled': False}
+            }
+        })
+        try:
+            collector.collect()  # warm the connection pool
+            samples = []
+            for _ in range(cycles):
+                start = time.perf_counter()
+                if not collector.collect():
+                    raise RuntimeError("Collection against the stub upstream failed")
+                samples.append(time.perf_counter() - start)
+        finally:
+            collector.close()
+    return summarize(samples)
+
+
+def main():
+    """Run the benchmark and print JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cycles', type=int, default=500)
+    args = parser.parse_args()
+    print(json.dumps(run(args.cycles), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Micro-benchmark: per-message cost of decoding and parsing provider responses.
+
+Usage: python benchmarks/bench_parse.py [--number N]
+"""
+import argparse
+import json
+import logging
+import timeit
+from typing import Any, Dict, List
+
+import common  # noqa: F401  (puts exporter/src on sys.path)
+from providers import create_provider
+from providers.codec import DECODER, loads
+
+
+SAMPLES = {
+    'coinbase': {'data': {'base': 'BTC', 'currency': 'USD', 'amount': '67012.34'}},
+    'coingecko': {'bitcoin': {'usd': 67012.34}},
+    'coindesk': {
+        'time': {'updated': 'Jan 1, 2024 00:00:00 UTC'},
+        'bpi': {'USD': {'code': 'USD', 'rate': '67,012.34', 'rate_float': 67012.34}}
+    },
+}
+
+
+def run(number: int = 100000) -> List[Dict[str, Any]]:
+    """Time decode + parse per provider and decoder."""
+    results = []
+    decoders = [('json', json.loads)]
+    if DECODER != 'json':
+        decoders.append((DECODER, loads))
+    
+    for name, sample in SAMPLES.items():
+        provider = create_provider(name, {'endpoint': f"http://bench.local/{name}"})
+        body = json.dumps(sample).encode()
+        provider.parse_response(loads(body))  # bind the detected format
+        
+        for decoder, decode in decoders:
+            seconds = timeit.timeit(lambda: provider.parse_response(decode(body)), number=number)
+            results.append({
+                'provider': name,
+                'decoder': decoder,
+                'ns_per_message': seconds / number * 1e9
+            })
+        provider.close()
+    return results
+
+
+def main():
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=100000, help='messages per measurement')
+    args = parser.parse_args()
+    
+    # Hot-path logging is lazy; keep INFO as in production
+    logging.basicConfig(level=logging.INFO)
+    
+    print(f"{'provider':<12} {'decoder':<8} {'ns/message':>12}")
+    for row in run(args.number):
+        print(f"{row['provider']:<12} {row['decoder']:<8} {row['ns_per_message']:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
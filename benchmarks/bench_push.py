@@ -0,0 +1,81 @@
+"""Benchmark: remote-write push throughput against a local stand-in receiver.
+
+Usage: python benchmarks/bench_push.py [--shards 1 4] [--cycles N] [--series N]
+"""
+import argparse
+import json
+import time
+from typing import Any, Dict, List
+
+from common import StubReceiver, summarize
+from prometheus_client import CollectorRegistry, Gauge
+from push.base import PUSH_SAMPLES
+from push.protocol import COMPRESSOR
+from push.remote_write import RemoteWriteQueue
+
+
+def _dropped() -> float:
+    return PUSH_SAMPLES.labels(mode='remote_write', result='dropped')._value.get()
+
+
+def run(shards: List[int] = (1, 4), cycles: int = 50, series: int = 1000,
+        slow_delay: float = 0.05) -> List[Dict[str, Any]]:
+    """Push `cycles` snapshots of `series` gauges; time push() and end-to-end delivery.
+    
+    The last row uses a receiver that sleeps `slow_delay` per request and a
+    small queue, to show backpressure: push() stays fast and drops samples.
+    """
+    registry = CollectorRegistry()
+    gauge = Gauge('crypto_price', 'Benchmark series', ['asset', 'currency', 'source'], registry=registry)
+    for i in range(series):
+        gauge.labels(asset=f"asset{i}", currency='USD', source='bench').set(i)
+    
+    cases = [(count, 0, series * cycles) for count in shards]
+    cases.append((max(shards), slow_delay, series * 2))
+    results = []
+    for shard_count, delay, capacity in cases:
+        with StubReceiver(delay=delay) as receiver:
+            pusher = RemoteWriteQueue({
+                'url': receiver.url,
+                'shards': shard_count,
+                'capacity': capacity,
+                'batch_size': 500,
+                'flush_interval': 0.05,
+            }, registry=registry)
+            pusher.start()
+            dropped = _dropped()
+            samples = []
+            start = time.perf_counter()
+            for _ in range(cycles):
+                cycle_start = time.perf_counter()
+                pusher.push()
+                samples.append(time.perf_counter() - cycle_start)
+            pusher.stop(timeout=60)
+            elapsed = time.perf_counter() - start
+            received = sum(len(points) for points in receiver.samples.values())
+            
+            row = {
+                'receiver': 'slow' if delay else 'fast',
+                'compressor': COMPRESSOR,
+                'shards': shard_count,
+                'requests': receiver.requests,
+                'samples_per_second': received / elapsed,
+                'dropped': _dropped() - dropped,
+            }
+            row.update({f"push_{key}": value for key, value in summarize(samples).items() if key != 'count'})
+            results.append(row)
+    return results
+
+
+def main():
+    """Run the benchmark and print JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--cycles', type=int, default=50)
+    parser.add_argument('--series', type=int, default=1000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.shards, args.cycles, args.series), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark: /metrics rendering at increasing series counts.
+
+Usage: python benchmarks/bench_render.py [--series 100 1000 10000]
+"""
+import argparse
+import json
+import time
+from typing import Any, Dict, List
+
+import common  # noqa: F401  (puts exporter/src on sys.path)
+from prometheus_client import CollectorRegistry, Gauge
+from server.exposition import ExpositionCache
+from server.httpd import route
+
+
+class _App:
+    """Minimal app object for route()."""
+    
+    def __init__(self, exposition: ExpositionCache):
+        self.exposition = exposition
+    
+    def health_status(self) -> dict:
+        return {'status': 'healthy'}
+
+
+def run(series_counts: List[int] = (100, 1000, 10000), repeat: int = 20) -> List[Dict[str, Any]]:
+    """Time a full render and a cached /metrics response per series count."""
+    results = []
+    for series in series_counts:
+        registry = CollectorRegistry()
+        gauge = Gauge('crypto_price', 'Benchmark series', ['asset', 'currency', 'source'], registry=registry)
+        for i in range(series):
+            gauge.labels(asset=f"asset{i}", currency='USD', source='bench').set(i)
+        
+        app = _App(ExpositionCache(registry=registry))
+        render = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            snapshot = app.exposition.render()
+            render.append(time.perf_counter() - start)
+        
+        serve = []
+        for _ in range(repeat * 10):
+            start = time.perf_counter()
+            route(app, '/metrics', {'Accept-Encoding': 'gzip'})
+            serve.append(time.perf_counter() - start)
+        
+        results.append({
+            'series': series,
+            'body_bytes': len(snapshot.body),
+            'gzip_bytes': len(snapshot.gzipped),
+            'render_ms': min(render) * 1000,
+            'cached_response_us': min(serve) * 1e6
+        })
+    return results
+
+
+def main():
+    """Run the benchmark and print JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--series', type=int, nargs='+', default=[100, 1000, 10000])
+    args = parser.parse_args()
+    print(json.dumps(run(args.series), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark: end-to-end /metrics scrape latency under concurrent scrapers.
+
+Usage: python benchmarks/bench_scrape.py [--scrapers 1 8 32] [--requests N]
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from typing import Any, Dict, List
+
+import common
+from prometheus_client import CollectorRegistry, Gauge
+from server.exposition import ExpositionCache
+from server.httpd import start_server
+
+
+class _App:
+    """Minimal app object served by start_server()."""
+    
+    def __init__(self, exposition: ExpositionCache):
+        self.exposition = exposition
+    
+    def health_status(self) -> dict:
+        return {'status': 'healthy'}
+
+
+def _scrape(port: int, count: int, samples: List[float], errors: List[int]):
+    """One scraper: `count` sequential requests on a keep-alive connection."""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            conn.request('GET', '/metrics', headers={'Accept-Encoding': 'gzip'})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+                continue
+        except (OSError, http.client.HTTPException):
+            errors.append(0)
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+            continue
+        samples.append(time.perf_counter() - start)
+    conn.close()
+
+
+def run(modes: List[str] = ('threaded', 'async'), scrapers: List[int] = (1, 8, 32),
+        requests: int = 200, series: int = 1000) -> List[Dict[str, Any]]:
+    """Scrape each server mode with increasing numbers of concurrent clients."""
+    registry = CollectorRegistry()
+    gauge = Gauge('crypto_price', 'Benchmark series', ['asset', 'currency', 'source'], registry=registry)
+    for i in range(series):
+        gauge.labels(asset=f"asset{i}", currency='USD', source='bench').set(i)
+    app = _App(ExpositionCache(registry=registry))
+    app.exposition.render()
+    
+    results = []
+    for mode in modes:
+        for clients in scrapers:
+            server = start_server(app, 0, {'mode': mode, 'max_workers': max(scrapers)})
+            samples: List[float] = []
+            errors: List[int] = []
+            threads = [
+                threading.Thread(target=_scrape, args=(server.server_port, requests, samples, errors))
+                for _ in range(clients)
+            ]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            server.shutdown()
+            
+            row = {'mode': mode, 'scrapers': clients, 'errors': len(errors),
+                   'requests_per_second': len(samples) / elapsed}
+            row.update(common.summarize(samples) if samples else {})
+            results.append(row)
+    return results
+
+
+def main():
+    """Run the benchmark and print JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modes', nargs='+', default=['threaded', 'async'])
+    parser.add_argument('--scrapers', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=200, help='requests per scraper')
+    args = parser.parse_args()
+    print(json.dumps(run(args.modes, args.scrapers, args.requests), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Shared helpers for the benchmark suite."""
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'exporter', 'src')
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answer every GET with a CoinGecko simple/price document."""
+    
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    body = json.dumps({'bitcoin': {'usd': 67012.34}}).encode()
+    
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Cache-Control', 'no-store')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class StubUpstream:
+    """Local stand-in for a price API on an ephemeral port."""
+    
+    def __enter__(self) -> 'StubUpstream':
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        self.server.daemon_threads = True
+        self.endpoint = (f"http://127.0.0.1:{self.server.server_port}"
+                         "/api/v3/simple/price?ids=bitcoin&vs_currencies=usd")
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class ReceiverHandler(BaseHTTPRequestHandler):
+    """Decode remote-write POSTs into the server's sample store."""
+    
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    
+    def do_POST(self):
+        from push.protocol import decode_write_request, decompress
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        status = 204
+        try:
+            series = decode_write_request(decompress(body))
+        except (ValueError, IndexError):
+            status = 400
+        else:
+            with self.server.lock:
+                self.server.requests += 1
+                for labels, samples in series.items():
+                    self.server.samples.setdefault(labels, []).extend(samples)
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class StubReceiver:
+    """Local stand-in for a remote-write receiver on an ephemeral port.
+    
+    `delay` seconds are slept per request to simulate a slow receiver.
+    """
+    
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+    
+    def __enter__(self) -> 'StubReceiver':
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), ReceiverHandler)
+        self.server.daemon_threads = True
+        self.server.delay = self.delay
+        self.server.lock = threading.Lock()
+        self.server.requests = 0
+        self.server.samples = {}
+        self.url = f"http://127.0.0.1:{self.server.server_port}/api/v1/write"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+    
+    @property
+    def samples(self) -> Dict:
+        return self.server.samples
+    
+    @property
+    def requests(self) -> int:
+        return self.server.requests
+    
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds."""
+    ordered = sorted(samples)
+    
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000
+    
+    return {
+        'count': len(ordered),
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'p50_ms': pct(50),
+        'p99_ms': pct(99),
+        'max_ms': ordered[-1] * 1000,
+    }
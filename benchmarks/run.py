@@ -0,0 +1,107 @@
+"""Run the exporter benchmark suite and write the results as JSON.
+
+Usage:
+    python benchmarks/run.py [--quick] [--output FILE] [--compare BASELINE]
+
+Each run records the git commit so result files from different commits
+can be compared with --compare.
+"""
+import argparse
+import json
+import logging
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Dict
+
+import bench_collect
+import bench_parse
+import bench_push
+import bench_render
+import bench_scrape
+from providers.codec import DECODER
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_suite(quick: bool = False) -> Dict[str, Any]:
+    """Run every benchmark; quick mode shrinks iteration counts for CI."""
+    scale = 10 if quick else 1
+    return {
+        'meta': {
+            'commit': _commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'json_decoder': DECODER,
+            'timestamp': time.time(),
+            'quick': quick
+        },
+        'parse': bench_parse.run(number=100000 // scale),
+        'collect': bench_collect.run(cycles=500 // scale),
+        'render': bench_render.run(series_counts=(100, 1000) if quick else (100, 1000, 10000)),
+        'scrape': bench_scrape.run(scrapers=(1, 8) if quick else (1, 8, 32), requests=200 // scale),
+        'push': bench_push.run(cycles=50 // scale)
+    }
+
+
+def _flatten(results: Dict[str, Any]) -> Dict[str, float]:
+    """Key every numeric result as bench/row-identity/field for comparison."""
+    flat = {}
+    for bench, rows in results.items():
+        if bench == 'meta':
+            continue
+        for row in rows if isinstance(rows, list) else [rows]:
+            # String fields plus the swept parameter identify a row
+            ident = [str(v) for v in row.values() if isinstance(v, str)]
+            ident += [f"{k}={row[k]}" for k in ('series', 'scrapers', 'shards') if k in row]
+            for field, value in row.items():
+                if isinstance(value, float):
+                    flat['/'.join([bench, *ident, field])] = value
+    return flat
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]):
+    """Print the relative change of every shared metric."""
+    old, new = _flatten(baseline), _flatten(current)
+    print(f"baseline {baseline['meta']['commit']} -> current {current['meta']['commit']}")
+    for key in sorted(old.keys() & new.keys()):
+        if old[key]:
+            change = (new[key] - old[key]) / old[key] * 100
+            print(f"{key:<60} {old[key]:>12.2f} {new[key]:>12.2f} {change:>+8.1f}%")
+
+
+def main():
+    """Entry point for `make bench`."""
+    parser = argparse.ArgumentParser(description='Exporter benchmark suite')
+    parser.add_argument('--quick', action='store_true', help='fewer iterations')
+    parser.add_argument('--output', help='write JSON results to this file (default: stdout)')
+    parser.add_argument('--compare', help='baseline JSON results to compare against')
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    results = run_suite(args.quick)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Benchmark results written to {args.output}", file=sys.stderr)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+"""Historical backfill package."""
+from backfill.job import BackfillJob
+from backfill.writers import HistoryWriter, OpenMetricsWriter
+
+__all__ = ['BackfillJob', 'HistoryWriter', 'OpenMetricsWriter']
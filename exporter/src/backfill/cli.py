@@ -0,0 +1,122 @@
+"""`main.py backfill` subcommand."""
+import argparse
+import logging
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Tuple
+from backfill.job import BackfillJob
+from backfill.writers import HistoryWriter, OpenMetricsWriter
+from providers import create_provider
+from storage import HistoryStore
+
+
+logger = logging.getLogger(__name__)
+
+
+def parse_time(value: str) -> float:
+    """Unix seconds, or an ISO 8601 date/time (UTC unless it has an offset)."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def build_parser(defaults: Dict[str, Any]) -> argparse.ArgumentParser:
+    """Argument parser with defaults from the `backfill` config section."""
+    parser = argparse.ArgumentParser(
+        prog='main.py backfill',
+        description='Fetch historical candles and write them as OpenMetrics or into the history file.'
+    )
+    parser.add_argument('--start', type=parse_time, required=True,
+                        help='range start: unix seconds or ISO 8601 (UTC by default)')
+    parser.add_argument('--end', type=parse_time, default=None,
+                        help='range end (default: now)')
+    parser.add_argument('--products', nargs='+', default=defaults.get('products', ['BTC-USD']),
+                        help='products to fetch, e.g. BTC-USD ETH-USD')
+    parser.add_argument('--provider', default=defaults.get('provider', 'coinbase'))
+    parser.add_argument('--granularity', type=int, default=defaults.get('granularity', 60),
+                        help='candle size in seconds')
+    parser.add_argument('--concurrency', type=int, default=defaults.get('concurrency', 4),
+                        help='upstream requests in flight at once')
+    parser.add_argument('--source', default=defaults.get('source'),
+                        help="source label to write (default: the exporter's polled source)")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--output', default='-',
+                        help='OpenMetrics file for promtool tsdb create-blocks-from (default: stdout)')
+    target.add_argument('--history', action='store_true',
+                        help='append to the exporter.history file instead')
+    return parser
+
+
+def live_series(api_config: Dict[str, Any]) -> Tuple[str, Callable[[str], str]]:
+    """`source` label and ticker-to-asset-id mapping of the exporter's polled series.
+    
+    Backfilled samples written under these join the live series instead
+    of starting new ones next to them.
+    """
+    live = create_provider(api_config.get('provider', 'coindesk'), api_config)
+    try:
+        if api_config.get('providers'):
+            return api_config.get('strategy', 'median'), live.asset_id
+        return live.name, live.asset_id
+    finally:
+        live.close()
+
+
+def run(argv: List[str], config: Dict[str, Any]) -> int:
+    """Run a backfill; returns the process exit code."""
+    args = build_parser(config.get('backfill', {})).parse_args(argv)
+    end = args.end if args.end is not None else time.time()
+    
+    api_config = config.get('api', {})
+    provider = create_provider(args.provider, dict(
+        api_config,
+        endpoint=None,
+        history_endpoint=config.get('backfill', {}).get('endpoint')
+    ))
+    live_source, asset_id = live_series(api_config)
+    source = args.source or live_source
+    
+    if args.history:
+        history_config = dict(config.get('exporter', {}).get('history', {}), enabled=True)
+        retention = history_config.get('retention', 86400)
+        if args.start < time.time() - retention:
+            # The exporter's next compaction would drop them again
+            logger.error(
+                f"Backfill starts {time.time() - args.start:.0f}s ago, beyond the history retention of "
+                f"{retention}s; raise exporter.history.retention or use a later --start"
+            )
+            provider.close()
+            return 2
+        try:
+            store = HistoryStore.from_config(history_config)
+        except (OSError, ValueError) as e:
+            # e.g. the running exporter holds the file's write lock
+            logger.error(f"Cannot open the history file: {e}")
+            provider.close()
+            return 2
+        writer = HistoryWriter(store, source, asset_id)
+        out = None
+    else:
+        out = sys.stdout if args.output == '-' else open(args.output, 'w')
+        writer = OpenMetricsWriter(out, source, asset_id)
+    
+    try:
+        job = BackfillJob(provider, args.products, args.start, end,
+                          granularity=args.granularity, concurrency=args.concurrency)
+        stats = job.run(writer.add)
+    except ValueError as e:
+        logger.error(f"Backfill failed: {e}")
+        return 2
+    finally:
+        writer.close()
+        if out not in (None, sys.stdout):
+            out.close()
+        provider.close()
+    
+    return 1 if stats['failed'] else 0
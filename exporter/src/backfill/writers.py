@@ -0,0 +1,88 @@
+"""Sinks for backfilled candles: OpenMetrics text or the local history file."""
+from typing import Callable, Dict, List, TextIO, Tuple
+from providers.base import Candle
+from storage import HistoryStore
+
+
+def series_key(product: str, asset_id: Callable[[str], str] = str.lower) -> Tuple[str, str]:
+    """(currency, quote) the collector records a product under.
+    
+    BTC-USD is the single bitcoin_price series; anything else is a
+    crypto_price pair keyed by the live provider's id for the base asset
+    (e.g. ethereum for ETH-USD on CoinGecko).
+    """
+    base, _, quote = product.partition('-')
+    if product.upper() == 'BTC-USD':
+        return 'BTC', 'USD'
+    return asset_id(base), quote.upper()
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+class OpenMetricsWriter:
+    """Write candle closes as timestamped samples of the live price series.
+    
+    The output is meant for `promtool tsdb create-blocks-from openmetrics`,
+    which needs each metric family in one contiguous block, so samples
+    are buffered and written on close().
+    """
+    
+    FAMILIES = {
+        'bitcoin_price': 'Bitcoin price in USD',
+        'crypto_price': 'Cryptocurrency price in the quote currency',
+    }
+    
+    def __init__(self, stream: TextIO, source: str, asset_id: Callable[[str], str] = str.lower):
+        """Initialize writer over an open text stream."""
+        self.stream = stream
+        self.source = source
+        self.asset_id = asset_id
+        self._samples: Dict[str, Dict[str, Dict[float, float]]] = {name: {} for name in self.FAMILIES}
+    
+    def add(self, product: str, candles: List[Candle]):
+        """Buffer one chunk of candles."""
+        currency, quote = series_key(product, self.asset_id)
+        source = _escape(self.source)
+        if (currency, quote) == ('BTC', 'USD'):
+            family, labels = 'bitcoin_price', f'currency="BTC",source="{source}"'
+        else:
+            family = 'crypto_price'
+            labels = f'asset="{_escape(currency)}",currency="{_escape(quote)}",source="{source}"'
+        series = self._samples[family].setdefault(labels, {})
+        for candle in candles:
+            series[candle.timestamp] = candle.close
+    
+    def close(self):
+        """Write all buffered families and the # EOF marker."""
+        write = self.stream.write
+        for family, help_text in self.FAMILIES.items():
+            if not self._samples[family]:
+                continue
+            write(f"# HELP {family} {help_text}\n# TYPE {family} gauge\n")
+            for labels, samples in sorted(self._samples[family].items()):
+                for timestamp in sorted(samples):
+                    write(f"{family}{{{labels}}} {samples[timestamp]!r} {timestamp:.0f}\n")
+        write("# EOF\n")
+        self.stream.flush()
+
+
+class HistoryWriter:
+    """Append candle closes to the history file the exporter warm-starts from."""
+    
+    def __init__(self, store: HistoryStore, source: str, asset_id: Callable[[str], str] = str.lower):
+        """Initialize writer over an opened store."""
+        self.store = store
+        self.source = source
+        self.asset_id = asset_id
+    
+    def add(self, product: str, candles: List[Candle]):
+        """Append one chunk of candles."""
+        key = (*series_key(product, self.asset_id), self.source)
+        for candle in candles:
+            self.store.append(key, candle.timestamp, candle.close)
+    
+    def close(self):
+        """Flush and close the store."""
+        self.store.close()
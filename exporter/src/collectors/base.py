@@ -1,4 +1,5 @@
 """Base class for metric collectors."""
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Dict, Any
 
@@ -16,6 +17,14 @@ class BaseCollector(ABC):
         """Collect metrics from source."""
         pass
     
+    async def collect_async(self) -> Dict[str, float]:
+        """Collect metrics without blocking the event loop.
+        
+        Synchronous collectors get this for free by running collect()
+        in a worker thread; override for natively async collection.
+        """
+        return await asyncio.to_thread(self.collect)
+    
     @abstractmethod
     def validate(self) -> bool:
         """Validate collector configuration."""
@@ -1,108 +1,589 @@
 """Bitcoin metric collector implementation."""
+import asyncio
 import logging
-from typing import Dict, Any
-from prometheus_client import Gauge, Counter
+import threading
+import time
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple
 from collectors.base import BaseCollector
-from providers.coindesk import CoindeskProvider
+from engine.shards import ShardPool
+from metrics import MetricFactory, RollingAggregates, rolling
+from providers import PriceAggregator, StreamingProvider, create_provider, create_stream, timing
+from providers.retry import configure_budget
+from storage import HistoryStore
 
 
 logger = logging.getLogger(__name__)
 
 
+# Metrics the collector always publishes. metrics.yaml entries with the
+# same name override individual fields; fixed metric names keep the
+# series existing dashboards query.
+METRIC_DEFINITIONS = [
+    {
+        'name': 'current_price',
+        'type': 'gauge',
+        'metric_name': 'bitcoin_price',
+        'description': 'Bitcoin price in USD',
+        'labels': ['currency', 'source'],
+    },
+    {
+        'name': 'asset_price',
+        'type': 'gauge',
+        'metric_name': 'crypto_price',
+        'description': 'Cryptocurrency price in the quote currency',
+        'labels': ['asset', 'currency', 'source'],
+    },
+    {
+        'name': 'last_updated',
+        'type': 'gauge',
+        'description': 'Timestamp of last price update',
+    },
+    {
+        'name': 'errors_total',
+        'type': 'counter',
+        'description': 'Total number of errors fetching Bitcoin price',
+        'labels': ['error_type'],
+    },
+    {
+        'name': 'fetch_success',
+        'type': 'gauge',
+        'description': 'Whether the last fetch was successful (1=success, 0=failure)',
+    },
+    {
+        'name': 'history_load_seconds',
+        'type': 'gauge',
+        'subsystem': 'exporter',
+        'description': 'Time spent restoring prices from the history file at startup',
+    },
+]
+
+
+# Reloaded `api` settings that need a new provider rather than reconfigure()
+PROVIDER_KEYS = {'api.provider', 'api.endpoint'}
+# Settings that change which series the collector publishes
+SERIES_KEYS = {'api.assets', 'api.currencies', 'api.batch_size'}
+
+
 class BitcoinCollector(BaseCollector):
     """Collector for Bitcoin price metrics."""
     
     def __init__(self, config: Dict[str, Any]):
         """Initialize Bitcoin collector."""
         super().__init__(config)
-        self.provider = self._init_provider()
+        api_config = self._api_config(self.config)
+        configure_budget(api_config.get('retry', {}))
+        self.assets = [a.lower() for a in api_config.get('assets', [])]
+        self.currencies = [c.lower() for c in api_config.get('currencies', ['usd'])]
+        self.provider = self._init_provider(self.config)
+        self.aggregator = self._init_aggregator(self.config)
+        self.batches = self.provider.build_batches(self.assets)
+        self.shards = ShardPool.from_config(api_config, self.assets, self.currencies)
+        self.stream = self._init_stream(self.config)
+        # Called after streamed prices are published, e.g. to refresh a cached exposition
+        self.on_stream_update: Optional[Callable[[], None]] = None
+        self.history = HistoryStore.from_config(self.config.get('exporter', {}).get('history', {}))
+        # Held by a collection cycle; reconfigure() waits for it
+        self._lock = threading.Lock()
+        # Bumped by reconfigure(), so async cycles can drop results from retired components
+        self._generation = 0
+        self._started = False
         self._setup_metrics()
+        self._warm_start()
     
-    def _init_provider(self):
-        """Initialize data provider based on config."""
-        provider_name = self.config.get('api', {}).get('provider', 'coindesk')
-
-        if provider_name == 'coindesk':
-            return CoindeskProvider(self.config.get('api', {}))
+    @staticmethod
+    def _api_config(config: Dict[str, Any]) -> Dict[str, Any]:
+        """The `api` section, with the response cache bounded by the collection interval.
+        
+        Cycles come every exporter.interval seconds (every min_age in
+        on-scrape mode). Cached responses are reused for at most half of
+        that, so a cycle never publishes the previous cycle's response as
+        current; `api.cache.max_age` overrides the bound.
+        """
+        api_config = config.get('api', {})
+        cache_config = api_config.get('cache', {})
+        if 'max_age' in cache_config:
+            return api_config
+        exporter_config = config.get('exporter', {})
+        collection_config = exporter_config.get('collection', {})
+        if collection_config.get('mode', 'scheduled') == 'on_scrape':
+            interval = collection_config.get('min_age', 10)
         else:
-            raise ValueError(f"Unknown provider: {provider_name}")
+            interval = exporter_config.get('interval', 60)
+        return dict(api_config, cache=dict(cache_config, max_age=interval / 2))
+    
+    def _init_provider(self, config: Dict[str, Any]):
+        """Initialize data provider based on config."""
+        api_config = self._api_config(config)
+        provider_name = api_config.get('provider', 'coindesk')
+        return create_provider(provider_name, api_config)
+    
+    def _init_aggregator(self, config: Dict[str, Any]) -> Optional[PriceAggregator]:
+        """Initialize multi-provider fan-out if `api.providers` is set."""
+        api_config = self._api_config(config)
+        if not api_config.get('providers'):
+            return None
+        return PriceAggregator.from_config(api_config)
+    
+    def _init_stream(self, config: Dict[str, Any]) -> Optional[StreamingProvider]:
+        """Initialize the streaming feed if `api.stream` is set."""
+        stream_config = config.get('api', {}).get('stream')
+        if not stream_config:
+            return None
+        return create_stream(stream_config.get('provider', 'coinbase'), stream_config)
+    
+    def start_stream(self):
+        """Start pushing streamed prices into the gauges."""
+        self._started = True
+        if self.stream:
+            self.stream.start(self._publish_stream)
+    
+    def start_shards(self):
+        """Spawn the collection worker processes, if sharding is enabled."""
+        self._started = True
+        if self.shards:
+            self.shards.start()
+    
+    def reconfigure(self, config: Dict[str, Any], changes: Set[str]):
+        """Apply a reloaded config, rebuilding only the parts it touches.
+        
+        Replacement providers, shards and streams are built (and shard
+        workers spawned) before the collection lock is taken; if any of
+        them fails, they are discarded and the running components are left
+        as they were. The rest is swapped in under the lock, which a
+        synchronous cycle holds throughout and an async cycle only while
+        publishing (it discards results fetched through replaced
+        components). Retired components are stopped after the lock is
+        released, so the event loop never waits on them. Providers whose
+        endpoint is unchanged are updated in place and keep their pooled
+        connections and caches; metrics, rolling windows and series that
+        are still configured are left as they are.
+        """
+        api_changes = {change for change in changes if change.startswith('api.')}
+        if changes & {'exporter.interval', 'exporter.collection'}:
+            # The response cache's max_age follows the collection interval
+            api_changes.add('api.cache')
+        if not api_changes:
+            with self._lock:
+                self.config = config
+            return
+        
+        api_config = self._api_config(config)
+        assets = [a.lower() for a in api_config.get('assets', [])]
+        currencies = [c.lower() for c in api_config.get('currencies', ['usd'])]
+        # Fan-out providers and shard workers share the api settings, so any change rebuilds them
+        rebuild_aggregator = bool(self.aggregator or api_config.get('providers'))
+        rebuild_shards = bool(self.shards or api_config.get('shards'))
+        rebuild_stream = 'api.stream' in api_changes
+        provider = aggregator = shards = stream = None
+        built: List[Callable[[], None]] = []
+        try:
+            if api_changes & PROVIDER_KEYS:
+                provider = self._init_provider(config)
+                built.append(provider.close)
+            if rebuild_aggregator:
+                aggregator = self._init_aggregator(config)
+                if aggregator:
+                    built.append(aggregator.close)
+            if rebuild_shards:
+                shards = ShardPool.from_config(api_config, assets, currencies)
+                if shards:
+                    built.append(shards.stop)
+                    if self._started:
+                        shards.start()
+            if rebuild_stream:
+                stream = self._init_stream(config)
+                if stream:
+                    built.append(stream.stop)
+            
+            retired: List[Callable[[], None]] = []
+            with self._lock:
+                if provider is None and not self.provider.reconfigure(api_config):
+                    provider = self._init_provider(config)
+                built.clear()
+                
+                self.config = config
+                self._generation += 1
+                configure_budget(api_config.get('retry', {}))
+                if provider is not None:
+                    retired.append(self.provider.close)
+                    self.provider = provider
+                    logger.info(f"Rebuilt provider: {provider.name} {provider.endpoint}")
+                if rebuild_aggregator:
+                    if self.aggregator:
+                        retired.append(self.aggregator.close)
+                    self.aggregator = aggregator
+                
+                self.assets = assets
+                self.currencies = currencies
+                self.batches = self.provider.build_batches(assets)
+                if rebuild_shards:
+                    if self.shards:
+                        retired.append(self.shards.stop)
+                    self.shards = shards
+                if rebuild_stream:
+                    if self.stream:
+                        retired.append(self.stream.stop)
+                    self.stream = stream
+                
+                published = self._published_series()
+                self._bind_handles()
+                for name, labels in published - self._published_series():
+                    self.metrics.remove(name, **dict(labels))
+                
+                if rebuild_stream and self.stream and self._started:
+                    self.stream.start(self._publish_stream)
+        except Exception:
+            for stop in built:
+                stop()
+            raise
+        
+        for stop in retired:
+            stop()
+    
+    def _published_series(self) -> Set[Tuple[str, Tuple]]:
+        """(metric, labels) of the polled price series currently bound."""
+        series = {('current_price', (('currency', 'BTC'), ('source', self._source)))}
+        for (asset, currency) in self._pair_prices:
+            series.add(('asset_price', (
+                ('asset', asset), ('currency', currency.upper()), ('source', self._source)
+            )))
+        return series
     
     def _setup_metrics(self):
-        """Setup Prometheus metrics."""
+        """Create metrics from the built-in and metrics.yaml definitions."""
         metrics_config = self.config.get('metrics', {})
-        namespace = metrics_config.get('namespace', 'bitcoin')
-        subsystem = metrics_config.get('subsystem', 'price')
-        
-        # Create Prometheus gauges
-        self.price_gauge = Gauge(
-            'bitcoin_price',
-            'Bitcoin price in USD',
-            labelnames=['currency', 'source']
+        definitions = MetricFactory.merge(
+            METRIC_DEFINITIONS,
+            timing.DEFINITIONS,
+            rolling.DEFINITIONS,
+            self.config.get('metrics_definitions', {}).get('metrics', [])
         )
-        
-        self.last_updated_gauge = Gauge(
-            'bitcoin_price_last_updated',
-            'Timestamp of last price update'
+        self.metrics = MetricFactory(
+            definitions,
+            namespace=metrics_config.get('namespace', 'bitcoin'),
+            subsystem=metrics_config.get('subsystem', 'price'),
+            series=metrics_config.get('series', {})
         )
+        timing.bind(self.metrics)
+        self.rolling = RollingAggregates.from_config(self.metrics, metrics_config.get('rolling', {}))
+        self._bind_handles()
+    
+    def _bind_handles(self):
+        """Look up label handles for every series the collection path updates."""
+        metrics = self.metrics
+        self._source = self.aggregator.strategy if self.aggregator else self.provider.name
+        self._price = metrics.handle('current_price', currency='BTC', source=self._source)
+        self._last_updated = metrics.handle('last_updated')
+        self._fetch_success = metrics.handle('fetch_success')
+        self._errors = {
+            error_type: metrics.handle('errors_total', error_type=error_type)
+            for error_type in ('exception', 'no_data', 'parse_error', 'missing_pair')
+        }
+        endpoint = 'fanout' if self.aggregator else self.provider.endpoint_label
+        self._phases = {
+            phase: metrics.handle(
+                'collection_duration_seconds', provider=self._source, endpoint=endpoint, phase=phase
+            )
+            for phase in ('parse', 'update', 'cycle')
+        }
+        self._pair_prices = {
+            (asset, currency): metrics.handle(
+                'asset_price', asset=asset, currency=currency.upper(), source=self._source
+            )
+            for asset in self.assets for currency in self.currencies
+        }
         
-        # Error tracking metrics
-        self.error_counter = Counter(
-            'bitcoin_price_errors_total',
-            'Total number of errors fetching Bitcoin price',
-            labelnames=['error_type']
-        )
+        self._stream_prices = {}
+        if self.stream:
+            self._stream_source = f"{self.stream.name}_stream"
+            self._stream_price = metrics.handle('current_price', currency='BTC', source=self._stream_source)
+            for product in self.stream.products:
+                asset, _, currency = product.partition('-')
+                self._stream_prices[product] = metrics.handle(
+                    'asset_price', asset=asset.lower(), currency=currency.upper(), source=self._stream_source
+                )
+    
+    def _warm_start(self):
+        """Serve the last known prices and refill rolling windows from the history file."""
+        if not self.history:
+            return
+        start = time.perf_counter()
+        window = self.rolling.window if self.rolling else 0
+        latest: Dict[Tuple[str, str, str], Tuple[float, float]] = {}
+        samples: Dict[Tuple[str, str], List[Tuple[float, float]]] = {}
+        for key, timestamp, price in self.history.replay(since=time.time() - max(window, self.history.retention)):
+            # Backfilled samples can land in the file after newer live ones
+            if key not in latest or timestamp >= latest[key][0]:
+                latest[key] = (timestamp, price)
+            samples.setdefault(key[:2], []).append((price, timestamp))
+        if not latest:
+            return
         
-        self.fetch_success_gauge = Gauge(
-            'bitcoin_price_fetch_success',
-            'Whether the last fetch was successful (1=success, 0=failure)'
-        )
+        if self.rolling:
+            for (currency, quote), series in samples.items():
+                self.rolling.load(currency, quote, series)
+        for (currency, quote, source), (_, price) in latest.items():
+            if (currency, quote) == ('BTC', 'USD'):
+                self.metrics.handle('current_price', currency='BTC', source=source).set(price)
+            else:
+                self.metrics.handle('asset_price', asset=currency, currency=quote, source=source).set(price)
+        self._last_updated.set(max(timestamp for timestamp, _ in latest.values()))
+        
+        elapsed = time.perf_counter() - start
+        self.metrics.handle('history_load_seconds').set(elapsed)
+        logger.info(f"Restored {len(latest)} series from {self.history.path} in {elapsed * 1000:.1f}ms")
+    
+    def _phase(self, phase: str):
+        """Time a collection phase (parse, update, cycle)."""
+        return self._phases[phase].time()
     
     def collect(self) -> Dict[str, float]:
         """Collect Bitcoin metrics."""
+        with self._lock, self._phase('cycle'):
+            metrics = self._collect()
+        self.metrics.expire()
+        return metrics
+    
+    async def collect_async(self) -> Dict[str, float]:
+        """Collect Bitcoin metrics on the event loop.
+        
+        The thread lock is never held across an await, since reconfigure()
+        takes it on the config watcher thread and can block for seconds
+        stopping shards and streams. The components are read under the
+        lock, fetched from without it, and the results are published under
+        it again unless a reload replaced the components in the meantime.
+        """
+        with self._phase('cycle'):
+            with self._lock:
+                generation = self._generation
+                fetch = self._fetch_async(self.stream, self.shards, self.assets, self.batches,
+                                          self.currencies, self.aggregator, self.provider)
+            try:
+                publish, args = await fetch
+                with self._lock:
+                    if generation != self._generation:
+                        logger.info("Configuration reloaded during collection, discarding its results")
+                        return {}
+                    metrics = publish(*args)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                metrics = self._collect_failed(e)
+        self.metrics.expire()
+        return metrics
+    
+    def _collect(self) -> Dict[str, float]:
+        """Run one collection through the stream, batch, fan-out or single path."""
         try:
+            if self.stream and self.stream.is_healthy():
+                # The feed keeps the gauges current; polling is only a fallback
+                return self._stream_metrics()
+            
+            if self.shards:
+                return self._publish_prices(*self.shards.collect())
+            
+            if self.assets:
+                responses = [
+                    self.provider.fetch_batch(batch, self.currencies)
+                    for batch in self.batches
+                ]
+                return self._publish_batches(responses)
+            
+            if self.aggregator:
+                metrics = self.aggregator.fetch_price()
+                return self._publish_metrics(metrics)
+            
             # Fetch data from provider
             raw_data = self.provider.fetch_data()
-            if not raw_data:
-                logger.warning("No data received from provider")
-                self.error_counter.labels(error_type='no_data').inc()
-                self.fetch_success_gauge.set(0)
-                return {}
-            
-            # Parse response
+            return self._publish(raw_data)
+        
+        except Exception as e:
+            return self._collect_failed(e)
+    
+    def _collect_failed(self, error: Exception) -> Dict[str, float]:
+        """Count a cycle that raised."""
+        logger.error(f"Failed to collect metrics: {error}")
+        self._errors['exception'].inc()
+        self._fetch_success.set(0)
+        return {}
+    
+    async def _fetch_async(self, stream, shards, assets, batches, currencies,
+                           aggregator, provider) -> Tuple[Callable[..., Dict[str, float]], tuple]:
+        """Async fetch through a snapshot of the components; returns the publish step and its arguments."""
+        if stream and stream.is_healthy():
+            return self._stream_metrics, ()
+        
+        if shards:
+            return self._publish_prices, await asyncio.to_thread(shards.collect)
+        
+        if assets:
+            responses = await asyncio.gather(*(
+                provider.fetch_batch_async(batch, currencies)
+                for batch in batches
+            ))
+            return self._publish_batches, (responses,)
+        
+        if aggregator:
+            return self._publish_metrics, (await asyncio.to_thread(aggregator.fetch_price),)
+        
+        return self._publish, (await provider.fetch_data_async(),)
+    
+    def _publish(self, raw_data: Optional[Dict[str, Any]]) -> Dict[str, float]:
+        """Parse a provider response and update Prometheus metrics."""
+        if not raw_data:
+            logger.warning("No data received from provider")
+            self._errors['no_data'].inc()
+            self._fetch_success.set(0)
+            return {}
+        
+        # Parse response
+        with self._phase('parse'):
             metrics = self.provider.parse_response(raw_data)
+        return self._publish_metrics(metrics)
+    
+    def _publish_metrics(self, metrics: Dict[str, float]) -> Dict[str, float]:
+        """Update Prometheus metrics from parsed price data."""
+        # Check if we got valid price data
+        if 'bitcoin_price' not in metrics:
+            logger.error("No bitcoin_price in parsed metrics")
+            self._errors['parse_error'].inc()
+            self._fetch_success.set(0)
+            return {}
+        
+        # Update Prometheus metrics
+        with self._phase('update'):
+            self._price.set(metrics['bitcoin_price'])
+            self._observe('BTC', 'USD', self._source, metrics['bitcoin_price'])
             
-            # Check if we got valid price data
-            if 'bitcoin_price' not in metrics:
-                logger.error("No bitcoin_price in parsed metrics")
-                self.error_counter.labels(error_type='parse_error').inc()
-                self.fetch_success_gauge.set(0)
-                return {}
-            
-            # Update Prometheus metrics
-            provider_name = self.config.get('api', {}).get('provider', 'coindesk')
-            self.price_gauge.labels(
-                currency='BTC',
-                source=provider_name
-            ).set(metrics['bitcoin_price'])
-                
             if 'last_updated' in metrics:
-                self.last_updated_gauge.set(metrics['last_updated'])
+                self._last_updated.set(metrics['last_updated'])
             
             # Mark success
-            self.fetch_success_gauge.set(1)
+            self._fetch_success.set(1)
+        
+        logger.info("Collected metrics: %s", metrics)
+        return metrics
+    
+    def _publish_batches(self, responses: List[Optional[Dict[str, Any]]]) -> Dict[str, float]:
+        """Fan batched provider responses out into labelled price series."""
+        prices: Dict[Tuple[str, str], float] = {}
+        failed = 0
+        
+        with self._phase('parse'):
+            for batch, raw_data in zip(self.batches, responses):
+                if not raw_data:
+                    logger.warning(f"No data received from provider for batch: {batch}")
+                    failed += 1
+                    continue
+                prices.update(self.provider.parse_batch(raw_data, batch, self.currencies))
+        
+        return self._publish_prices(prices, failed)
+    
+    def _publish_prices(self, prices: Dict[Tuple[str, str], float], failed: int) -> Dict[str, float]:
+        """Set per-pair gauges from parsed prices; `failed` counts batches with no data."""
+        if failed:
+            self._errors['no_data'].inc(failed)
+        if not prices:
+            self._fetch_success.set(0)
+            return {}
+        
+        metrics = {}
+        now = time.time()
+        with self._phase('update'):
+            for (asset, currency), price in prices.items():
+                handle = self._pair_prices.get((asset, currency))
+                if handle is None:
+                    # e.g. a shard answering with the asset list from before a reload
+                    logger.warning(f"No series configured for {asset}/{currency}, skipping")
+                    self._errors['missing_pair'].inc()
+                    continue
+                handle.set(price)
+                # bitcoin/usd is recorded once, as the BTC/USD series below
+                if (asset, currency) != ('bitcoin', 'usd'):
+                    self._observe(asset, currency.upper(), self._source, price, now)
+                metrics[f"{asset}_{currency}"] = price
             
-            logger.info(f"Collected metrics: {metrics}")
-            return metrics
+            # Pairs of failed batches are already counted as no_data
+            missing = 0 if failed else len(self._pair_prices.keys() - prices.keys())
+            if missing:
+                logger.warning(f"{missing} configured pairs missing from the response")
+                self._errors['missing_pair'].inc(missing)
             
-        except Exception as e:
-            logger.error(f"Failed to collect metrics: {e}")
-            self.error_counter.labels(error_type='exception').inc()
-            self.fetch_success_gauge.set(0)
-            return {}
+            # Keep the single-series gauge the dashboards query
+            if ('bitcoin', 'usd') in prices:
+                metrics['bitcoin_price'] = prices[('bitcoin', 'usd')]
+                self._price.set(metrics['bitcoin_price'])
+                self._observe('BTC', 'USD', self._source, metrics['bitcoin_price'], now)
+            
+            metrics['last_updated'] = now
+            self._last_updated.set(metrics['last_updated'])
+            self._fetch_success.set(0 if failed else 1)
+        
+        logger.info("Collected %d prices (%d batches failed)", len(prices), failed)
+        return metrics
+    
+    def _publish_stream(self, prices: Dict[str, float]):
+        """Update gauges from conflated stream prices keyed by product (e.g. BTC-USD)."""
+        now = time.time()
+        for product, price in prices.items():
+            asset, _, currency = product.partition('-')
+            handle = self._stream_prices.get(product)
+            if handle is None:
+                handle = self._stream_prices[product] = self.metrics.handle(
+                    'asset_price', asset=asset.lower(), currency=currency.upper(), source=self._stream_source
+                )
+            handle.set(price)
+            self._observe(asset.lower(), currency.upper(), self._stream_source, price, now)
+            if product.upper() == 'BTC-USD':
+                self._stream_price.set(price)
+                self._observe('BTC', 'USD', self._stream_source, price, now)
+        
+        self._last_updated.set(now)
+        self._fetch_success.set(1)
+        if self.on_stream_update:
+            self.on_stream_update()
+    
+    def _observe(self, currency: str, quote: str, source: str, price: float,
+                 timestamp: Optional[float] = None):
+        """Feed a published price into its rolling window and the history file."""
+        timestamp = timestamp or time.time()
+        if self.rolling:
+            self.rolling.observe(currency, quote, price, timestamp)
+        if self.history:
+            self.history.append((currency, quote, source), timestamp, price)
+    
+    def _stream_metrics(self) -> Dict[str, float]:
+        """Latest streamed prices in collect() result form."""
+        metrics = {product.lower().replace('-', '_'): price
+                   for product, price in self.stream.latest().items()}
+        if 'btc_usd' in metrics:
+            metrics['bitcoin_price'] = metrics['btc_usd']
+        logger.debug("Stream healthy, skipping poll: %s", metrics)
+        return metrics
     
     def validate(self) -> bool:
         """Validate collector configuration."""
         if not self.provider:
             logger.error("No provider configured")
             return False
+        if self.assets and not self.provider.supports_batching():
+            logger.error("Configured assets require a batch-capable endpoint (CoinGecko simple/price)")
+            return False
+        if self.assets and self.aggregator:
+            logger.error("Multi-asset collection and multi-provider fan-out cannot be combined")
+            return False
+        if self.aggregator and not self.aggregator.validate():
+            return False
         return self.provider.validate_config()
+    
+    def close(self):
+        """Stop the streaming feed and shards, release provider connections and flush history."""
+        if self.stream:
+            self.stream.stop()
+        if self.shards:
+            self.shards.stop()
+        if self.aggregator:
+            self.aggregator.close()
+        self.provider.close()
+        if self.history:
+            self.history.close()
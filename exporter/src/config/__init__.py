@@ -1,4 +1,5 @@
 """Configuration package."""
-from .loader import ConfigLoader
+from config.loader import ConfigLoader
+from config.watcher import ConfigWatcher
 
-__all__ = ['ConfigLoader']
+__all__ = ['ConfigLoader', 'ConfigWatcher']
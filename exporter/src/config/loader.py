@@ -1,14 +1,41 @@
 """Configuration loader and manager."""
+import hashlib
+import json
 import os
-import yaml
 import logging
-from typing import Dict, Any, Optional
+import tempfile
+from typing import Dict, Any, List, Optional, Set
 from pathlib import Path
 
 
 logger = logging.getLogger(__name__)
 
 
+def validate_config(config: Dict[str, Any]) -> List[str]:
+    """Problems in a merged config that would break the exporter; empty if valid."""
+    errors = []
+    for section in ('app', 'exporter', 'api', 'metrics', 'logging'):
+        if not isinstance(config.get(section, {}), dict):
+            errors.append(f"{section} must be a mapping")
+    if errors:
+        return errors
+    
+    exporter = config.get('exporter', {})
+    port = exporter.get('port', 8000)
+    if not isinstance(port, int) or not 0 < port < 65536:
+        errors.append(f"exporter.port must be a TCP port, got {port!r}")
+    for key in ('interval', 'timeout'):
+        value = exporter.get(key, 1)
+        if not isinstance(value, (int, float)) or value <= 0:
+            errors.append(f"exporter.{key} must be a positive number, got {value!r}")
+    if not isinstance(config.get('api', {}).get('provider', ''), str):
+        errors.append("api.provider must be a provider name")
+    for definition in config.get('metrics_definitions', {}).get('metrics', []) or []:
+        if not isinstance(definition, dict) or 'name' not in definition:
+            errors.append(f"metrics.yaml entry without a name: {definition!r}")
+    return errors
+
+
 class ConfigLoader:
     """Load and manage application configuration."""
     
@@ -17,6 +44,11 @@ class ConfigLoader:
         self.config_path = config_path or self._get_default_path()
         self.config = {}
         self.environment = os.getenv('ENV', 'local')
+        # mtime of every file the last load() looked at (None if missing)
+        self._mtimes: Dict[Path, Optional[float]] = {}
+        self._strict = False
+        # Set when a file fails to parse, so a partial config is never snapshotted
+        self._unreadable = False
     
     def _get_default_path(self) -> str:
         """Get default configuration path."""
@@ -25,51 +57,173 @@ class ConfigLoader:
         # config is at config/
         return str(Path(__file__).parent.parent.parent.parent / 'config')
     
-    def load(self) -> Dict[str, Any]:
-        """Load configuration from YAML files."""
+    def load(self, strict: bool = False) -> Dict[str, Any]:
+        """Load configuration from YAML files.
+        
+        The merged, validated result is cached as a JSON snapshot keyed by
+        a hash of the source files, so unchanged YAML is not re-parsed.
+        With strict=True an unreadable, malformed or invalid file raises
+        instead of loading as empty, so a reload never applies a half-read
+        config.
+        """
         try:
-            # Load base configuration
-            self.config = self._load_file('app-config.yaml')
-            
-            # Load environment-specific config
-            env_config = self._load_env_config()
-            if env_config:
-                self.config = self._merge_configs(self.config, env_config)
-            
-            # Load metrics configuration
-            metrics_config = self._load_file('metrics.yaml')
-            if metrics_config:
-                self.config['metrics_definitions'] = metrics_config
+            self._mtimes = {}
+            self._strict = strict
+            self._unreadable = False
             
-            # Load labels configuration
-            labels_config = self._load_file('labels.yaml')
-            if labels_config:
-                self.config['labels'] = labels_config
+            digest = self._digest()
+            self.config = self._read_snapshot(digest)
+            if self.config is None:
+                self.config = self._merge_files()
+                errors = validate_config(self.config)
+                for error in errors:
+                    logger.error(f"Invalid configuration: {error}")
+                if errors and strict:
+                    raise ValueError(f"{len(errors)} configuration error(s)")
+                if not errors and not self._unreadable:
+                    self._write_snapshot(digest, self.config)
             
             # Apply environment variables
             self._apply_env_vars()
             
             return self.config
-            
+        
         except Exception as e:
             logger.error(f"Failed to load configuration: {e}")
             raise
     
+    def _merge_files(self) -> Dict[str, Any]:
+        """Parse and merge the YAML files."""
+        # Load base configuration
+        config = self._load_file('app-config.yaml')
+        
+        # Load environment-specific config
+        env_config = self._load_env_config()
+        if env_config:
+            config = self._merge_configs(config, env_config)
+        
+        # Load metrics configuration
+        metrics_config = self._load_file('metrics.yaml')
+        if metrics_config:
+            config['metrics_definitions'] = metrics_config
+        
+        # Load labels configuration
+        labels_config = self._load_file('labels.yaml')
+        if labels_config:
+            config['labels'] = labels_config
+        
+        return config
+    
+    def _sources(self) -> List[Path]:
+        """Every file _merge_files() reads."""
+        base = Path(self.config_path)
+        return [
+            base / 'app-config.yaml',
+            base / 'environments' / f"{self.environment}.yaml",
+            base / 'metrics.yaml',
+            base / 'labels.yaml',
+        ]
+    
+    def _digest(self) -> str:
+        """Hash of the source files' contents; records their mtimes for changed()."""
+        digest = hashlib.sha256(self.environment.encode())
+        for path in self._sources():
+            self._mtimes[path] = self._mtime(path)
+            digest.update(f"\0{path.name}\0".encode())
+            try:
+                digest.update(path.read_bytes())
+            except OSError:
+                digest.update(b'\0missing')
+        return digest.hexdigest()
+    
+    def _snapshot_paths(self) -> List[Path]:
+        """Snapshot next to the YAML, or in the temp dir when that is read-only."""
+        name = f".snapshot-{self.environment}.json"
+        scope = hashlib.sha1(str(Path(self.config_path).resolve()).encode()).hexdigest()[:12]
+        return [
+            Path(self.config_path) / name,
+            Path(tempfile.gettempdir()) / 'bitcoin-exporter' / f"config-{scope}{name}",
+        ]
+    
+    def _read_snapshot(self, digest: str) -> Optional[Dict[str, Any]]:
+        for path in self._snapshot_paths():
+            try:
+                snapshot = json.loads(path.read_bytes())
+            except (OSError, ValueError):
+                continue
+            if snapshot.get('digest') == digest:
+                logger.debug(f"Loaded config snapshot {path}")
+                return snapshot['config']
+        return None
+    
+    def _write_snapshot(self, digest: str, config: Dict[str, Any]):
+        """Cache a merged config; skipped if it does not survive a JSON round trip."""
+        body = json.dumps({'digest': digest, 'config': config})
+        if json.loads(body)['config'] != config:
+            logger.debug("Config has non-JSON values, not caching a snapshot")
+            return
+        for path in self._snapshot_paths():
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp.write_text(body)
+                os.replace(tmp, path)
+                return
+            except OSError:
+                continue
+    
     def _load_file(self, filename: str) -> Dict[str, Any]:
         """Load YAML file."""
         filepath = Path(self.config_path) / filename
+        self._mtimes[filepath] = self._mtime(filepath)
         
         if not filepath.exists():
             logger.warning(f"Configuration file not found: {filepath}")
             return {}
         
         try:
+            # Deferred: only needed when the snapshot is stale
+            import yaml
+            loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
             with open(filepath, 'r') as f:
-                return yaml.safe_load(f) or {}
+                return yaml.load(f, Loader=loader) or {}
         except Exception as e:
             logger.error(f"Failed to load {filepath}: {e}")
+            self._unreadable = True
+            if self._strict:
+                raise
             return {}
     
+    @staticmethod
+    def _mtime(filepath: Path) -> Optional[float]:
+        try:
+            return filepath.stat().st_mtime
+        except OSError:
+            return None
+    
+    def changed(self) -> bool:
+        """Whether any file read by the last load() was modified, created or removed."""
+        return any(self._mtime(path) != mtime for path, mtime in self._mtimes.items())
+    
+    @classmethod
+    def diff(cls, old: Dict[str, Any], new: Dict[str, Any], prefix: str = '', depth: int = 2) -> Set[str]:
+        """Dotted paths that differ between two configs, down to `depth` levels.
+        
+        e.g. {'api.retry', 'exporter.interval'}; deeper changes are
+        reported at their depth-level ancestor.
+        """
+        changed = set()
+        for key in set(old) | set(new):
+            path = f"{prefix}{key}"
+            a, b = old.get(key), new.get(key)
+            if a == b:
+                continue
+            if depth > 1 and isinstance(a, dict) and isinstance(b, dict):
+                changed |= cls.diff(a, b, f"{path}.", depth - 1)
+            else:
+                changed.add(path)
+        return changed
+    
     def _load_env_config(self) -> Dict[str, Any]:
         """Load environment-specific configuration."""
         env_file = f"environments/{self.environment}.yaml"
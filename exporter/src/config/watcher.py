@@ -0,0 +1,93 @@
+"""Reload configuration when its files change or on demand (SIGHUP)."""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Set
+from prometheus_client import Counter, Gauge
+from config.loader import ConfigLoader
+
+
+logger = logging.getLogger(__name__)
+
+
+CONFIG_RELOADS = Counter(
+    'bitcoin_exporter_config_reloads_total',
+    'Configuration reload attempts',
+    ['result']
+)
+
+CONFIG_LAST_RELOAD = Gauge(
+    'bitcoin_exporter_config_last_reload_success_timestamp_seconds',
+    'Time of the last successful configuration reload'
+)
+
+
+class ConfigWatcher:
+    """Poll the loader's files for mtime changes and hand over config diffs.
+    
+    on_change(config, changes) receives the newly merged config and the
+    dotted paths that differ from the current one (see ConfigLoader.diff).
+    A file that fails to parse keeps the current config in place. An
+    interval of 0 disables polling; trigger() still reloads.
+    """
+    
+    def __init__(self, loader: ConfigLoader, config: Dict[str, Any],
+                 on_change: Callable[[Dict[str, Any], Set[str]], None], interval: float = 5):
+        """Initialize watcher over an already-loaded config."""
+        self.loader = loader
+        self.config = config
+        self.on_change = on_change
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        """Start polling in a daemon thread."""
+        self._thread = threading.Thread(target=self._run, name='config-watcher', daemon=True)
+        self._thread.start()
+    
+    def trigger(self):
+        """Reload now, e.g. from a SIGHUP handler; safe from any thread."""
+        self._wake.set()
+    
+    def stop(self):
+        """Stop polling."""
+        self._stopped.set()
+        self._wake.set()
+    
+    def _run(self):
+        while not self._stopped.is_set():
+            forced = self._wake.wait(self.interval or None)
+            self._wake.clear()
+            if self._stopped.is_set():
+                break
+            if forced or (self.interval and self.loader.changed()):
+                self.reload()
+    
+    def reload(self) -> Set[str]:
+        """Load, diff and apply the config; returns the changed paths."""
+        try:
+            config = self.loader.load(strict=True)
+        except Exception as e:
+            CONFIG_RELOADS.labels(result='failure').inc()
+            logger.error(f"Config reload failed, keeping current config: {e}")
+            return set()
+        
+        changes = ConfigLoader.diff(self.config, config)
+        if not changes:
+            logger.info("Config files touched but unchanged")
+            return changes
+        
+        try:
+            self.on_change(config, changes)
+        except Exception as e:
+            CONFIG_RELOADS.labels(result='failure').inc()
+            logger.error(f"Failed to apply config changes {sorted(changes)}: {e}")
+            return set()
+        
+        self.config = config
+        CONFIG_RELOADS.labels(result='success').inc()
+        CONFIG_LAST_RELOAD.set(time.time())
+        logger.info(f"Config reloaded: {', '.join(sorted(changes))}")
+        return changes
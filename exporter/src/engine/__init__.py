@@ -0,0 +1,7 @@
+"""Collection engine package."""
+from engine.async_engine import CollectionEngine, SyncCollectorAdapter
+from engine.on_scrape import OnScrapeCollection
+from engine.scheduler import TickScheduler
+from engine.shards import ShardPool
+
+__all__ = ['CollectionEngine', 'OnScrapeCollection', 'ShardPool', 'SyncCollectorAdapter', 'TickScheduler']
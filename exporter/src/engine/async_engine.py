@@ -0,0 +1,167 @@
+"""Asyncio-based collection engine."""
+import asyncio
+import logging
+import signal
+from typing import Any, Callable, Dict, List, Optional
+from engine.scheduler import TickScheduler
+
+
+logger = logging.getLogger(__name__)
+
+
+class SyncCollectorAdapter:
+    """Adapt a collector that only implements collect() to the async engine."""
+    
+    def __init__(self, collector: Any):
+        """Wrap a synchronous collector."""
+        self.collector = collector
+    
+    async def collect_async(self) -> Dict[str, float]:
+        """Run the blocking collect() in a worker thread."""
+        return await asyncio.to_thread(self.collector.collect)
+    
+    def __repr__(self) -> str:
+        return f"SyncCollectorAdapter({self.collector!r})"
+
+
+class CollectionEngine:
+    """Run many collectors concurrently on one event loop.
+    
+    Each cycle starts one task per collector, bounds it with a per-task
+    timeout and waits for all of them; cycles start on the ticks of a
+    TickScheduler. stop() cancels whatever is still in flight.
+    """
+    
+    def __init__(self, collectors: List[Any], interval: float, timeout: float,
+                 on_stop: Optional[Callable[[], None]] = None,
+                 on_cycle: Optional[Callable[[], None]] = None,
+                 scheduler: Optional[TickScheduler] = None,
+                 on_reload: Optional[Callable[[], None]] = None):
+        """Initialize engine with collectors and timing settings."""
+        self.collectors = [self._as_async(c) for c in collectors]
+        self.scheduler = scheduler or TickScheduler(interval)
+        self.timeout = timeout
+        self.on_stop = on_stop
+        self.on_cycle = on_cycle
+        # Called on SIGHUP
+        self.on_reload = on_reload
+        self._loop = None
+        self._stop_event = None
+        self._wake = None
+        self._tasks = set()
+    
+    @staticmethod
+    def _as_async(collector: Any) -> Any:
+        """Return an object exposing collect_async()."""
+        if hasattr(collector, 'collect_async'):
+            return collector
+        return SyncCollectorAdapter(collector)
+    
+    async def _run_one(self, collector: Any) -> Dict[str, float]:
+        """Run a single collector with the per-task timeout."""
+        try:
+            return await asyncio.wait_for(collector.collect_async(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Collection timed out after {self.timeout}s: {collector!r}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error during collection: {e}")
+        return {}
+    
+    async def run_cycle(self) -> List[Dict[str, float]]:
+        """Run every collector once, concurrently."""
+        tasks = [asyncio.create_task(self._run_one(c)) for c in self.collectors]
+        self._tasks.update(tasks)
+        try:
+            results = await asyncio.gather(*tasks)
+        finally:
+            self._tasks.difference_update(tasks)
+        
+        if self.on_cycle:
+            try:
+                self.on_cycle()
+            except Exception as e:
+                logger.error(f"Error in post-cycle hook: {e}")
+        return results
+    
+    async def run(self):
+        """Collect until stop() is called or SIGINT/SIGTERM is received."""
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        self._wake = asyncio.Event()
+        self._install_signal_handlers()
+        
+        while not self._stop_event.is_set():
+            delay = self.scheduler.delay()
+            if delay > 0:
+                self._wake.clear()
+                try:
+                    # Woken early by stop() or reschedule(): re-check both
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                    continue
+                except asyncio.TimeoutError:
+                    pass
+            
+            self.scheduler.start_tick()
+            try:
+                await self.run_cycle()
+            except asyncio.CancelledError:
+                if self._stop_event.is_set():
+                    break
+                raise
+            self.scheduler.complete_tick()
+        
+        logger.info("Collection engine stopped")
+    
+    def _install_signal_handlers(self):
+        """Route shutdown signals through stop() on the running loop."""
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self._loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                # Not supported on Windows or outside the main thread
+                pass
+        if self.on_reload and hasattr(signal, 'SIGHUP'):
+            try:
+                self._loop.add_signal_handler(signal.SIGHUP, self.on_reload)
+            except (NotImplementedError, RuntimeError):
+                pass
+    
+    def reschedule(self, interval: float, **schedule):
+        """Change the tick schedule; safe to call from other threads.
+        
+        Takes TickScheduler.reschedule() arguments and applies them on
+        the loop, waking a pending wait so a shorter interval takes
+        effect immediately.
+        """
+        if self._loop is None:
+            self.scheduler.reschedule(interval, **schedule)
+            return
+        
+        def apply():
+            self.scheduler.reschedule(interval, **schedule)
+            self._wake.set()
+        
+        self._loop.call_soon_threadsafe(apply)
+    
+    def stop(self):
+        """Stop the engine and cancel in-flight collection tasks.
+        
+        Safe to call from signal handlers and other threads.
+        """
+        if self._loop is None or self._stop_event is None:
+            return
+        self._loop.call_soon_threadsafe(self._stop)
+    
+    def _stop(self):
+        """Stop on the loop thread."""
+        if self._stop_event.is_set():
+            return
+        logger.info("Shutdown signal received, cancelling in-flight collection...")
+        self._stop_event.set()
+        self._wake.set()
+        for task in list(self._tasks):
+            task.cancel()
+        if self.on_stop:
+            self.on_stop()
@@ -0,0 +1,137 @@
+"""Collect when /metrics is read instead of on a timer."""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from prometheus_client import Counter
+from prometheus_client.core import GaugeMetricFamily
+
+
+logger = logging.getLogger(__name__)
+
+
+ON_SCRAPE_REQUESTS = Counter(
+    'bitcoin_exporter_on_scrape_requests_total',
+    'Scrapes in on-scrape mode by how they were served: cached (no collection), '
+    'background (cached while a refresh runs) or waited (blocked on a refresh)',
+    ['result']
+)
+
+ON_SCRAPE_COLLECTIONS = Counter(
+    'bitcoin_exporter_on_scrape_collections_total',
+    'Collections started by scrapes',
+    ['result']
+)
+
+
+class OnScrapeCollection:
+    """Run a collector on demand, within freshness bounds.
+    
+    refresh() is called before each /metrics response. Data collected
+    less than min_age seconds ago (or a collection attempted that
+    recently) is served as is; older data up to max_age is served while
+    a refresh runs in the background; older or missing data makes the
+    scrape wait, at most `timeout` seconds, for the refresh. Concurrent
+    scrapes share one in-flight collection, so upstream is called at
+    most once per min_age however often, and by how many, it is scraped.
+    
+    Also a prometheus_client collector: registered in a registry it
+    exports the data's age whenever the registry is rendered.
+    """
+    
+    def __init__(self, collector: Any, min_age: float = 10, max_age: float = 60, timeout: float = 15,
+                 on_collect: Optional[Callable[[], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """Initialize for a collector with collect(); on_collect runs after every collection."""
+        if max_age < min_age:
+            raise ValueError(f"on-scrape max_age ({max_age}) must not be below min_age ({min_age})")
+        self.collector = collector
+        self.min_age = min_age
+        self.max_age = max_age
+        self.timeout = timeout
+        self.on_collect = on_collect
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._inflight = False
+        self._generation = 0
+        self._collected_at: Optional[float] = None
+        self._attempted_at: Optional[float] = None
+    
+    @classmethod
+    def from_config(cls, collector: Any, config: Dict[str, Any],
+                    on_collect: Optional[Callable[[], None]] = None) -> 'OnScrapeCollection':
+        """Build from the `exporter.collection` section."""
+        return cls(
+            collector,
+            min_age=config.get('min_age', 10),
+            max_age=config.get('max_age', 60),
+            timeout=config.get('timeout', 15),
+            on_collect=on_collect
+        )
+    
+    def age(self) -> Optional[float]:
+        """Seconds since the last successful collection; None before the first."""
+        collected_at = self._collected_at
+        return None if collected_at is None else self.clock() - collected_at
+    
+    def refresh(self):
+        """Bring the data within the freshness bounds before a scrape is served."""
+        with self._cond:
+            now = self.clock()
+            age = None if self._collected_at is None else now - self._collected_at
+            if not self._inflight:
+                if self._attempted_at is not None and now - self._attempted_at < self.min_age:
+                    ON_SCRAPE_REQUESTS.labels(result='cached').inc()
+                    return
+                self._inflight = True
+                self._attempted_at = now
+                threading.Thread(target=self._collect, name='on-scrape-collect', daemon=True).start()
+            
+            if age is not None and age < self.max_age:
+                ON_SCRAPE_REQUESTS.labels(result='background').inc()
+                return
+            
+            ON_SCRAPE_REQUESTS.labels(result='waited').inc()
+            generation = self._generation
+            if not self._cond.wait_for(lambda: self._generation != generation, self.timeout):
+                logger.warning(f"On-scrape collection still running after {self.timeout}s, serving current data")
+    
+    def _collect(self):
+        started = self.clock()
+        try:
+            ok = bool(self.collector.collect())
+        except Exception as e:
+            logger.error(f"On-scrape collection failed: {e}")
+            ok = False
+        ON_SCRAPE_COLLECTIONS.labels(result='success' if ok else 'failure').inc()
+        
+        if ok:
+            with self._cond:
+                self._collected_at = started
+        try:
+            if self.on_collect:
+                self.on_collect()
+        except Exception as e:
+            logger.error(f"Error in post-collection hook: {e}")
+        finally:
+            with self._cond:
+                self._inflight = False
+                self._generation += 1
+                self._cond.notify_all()
+    
+    def collect(self):
+        """prometheus_client collector protocol: the served data's age."""
+        age = self.age()
+        family = GaugeMetricFamily(
+            'bitcoin_exporter_on_scrape_data_age_seconds',
+            'Seconds since the on-scrape collection last succeeded'
+        )
+        family.add_metric([], age if age is not None else float('nan'))
+        yield family
+    
+    def describe(self):
+        """Describe without collecting, so registering does not run collect()."""
+        return [GaugeMetricFamily(
+            'bitcoin_exporter_on_scrape_data_age_seconds',
+            'Seconds since the on-scrape collection last succeeded'
+        )]
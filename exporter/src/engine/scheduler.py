@@ -0,0 +1,128 @@
+"""Drift-free, jittered tick scheduler."""
+import logging
+import math
+import os
+import random
+import socket
+import time
+import zlib
+from typing import Callable, Optional
+from prometheus_client import Counter, Gauge
+
+
+logger = logging.getLogger(__name__)
+
+
+SCHEDULE_LAG = Gauge(
+    'bitcoin_exporter_schedule_lag_seconds',
+    'Delay between the scheduled and actual start of the last collection cycle'
+)
+
+SKIPPED_TICKS = Counter(
+    'bitcoin_exporter_schedule_skipped_ticks_total',
+    'Collection ticks dropped or coalesced because a cycle overran'
+)
+
+
+class TickScheduler:
+    """Fixed-rate schedule measured from a monotonic clock.
+    
+    Tick N is due at origin + N * interval, so fetch latency and retry
+    backoff never push later ticks back. Each tick gets up to `jitter`
+    seconds of random delay, and the origin is offset by a stable
+    per-replica share of `splay` so replicas started together spread
+    out. When a cycle overruns, missed ticks are either skipped (wait
+    for the next tick on the grid) or coalesced (run once immediately).
+    """
+    
+    OVERRUN_POLICIES = ('skip', 'coalesce')
+    
+    def __init__(self, interval: float, jitter: float = 0.0, splay: float = 0.0,
+                 overrun: str = 'skip', identity: Optional[str] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """Initialize scheduler; the first tick is due after the splay offset."""
+        if interval <= 0:
+            raise ValueError(f"Schedule interval must be positive: {interval}")
+        if overrun not in self.OVERRUN_POLICIES:
+            raise ValueError(f"Unknown overrun policy: {overrun}")
+        
+        self.interval = interval
+        self.jitter = min(max(jitter, 0.0), interval)
+        self.overrun = overrun
+        self.clock = clock
+        self.identity = identity or self._default_identity()
+        self.offset = self._splay_offset(splay, self.identity)
+        self._origin = clock() + self.offset
+        self._tick = 0
+        self._deadline = self._due(0)
+    
+    @staticmethod
+    def _default_identity() -> str:
+        """Identify this replica (pod name in Kubernetes)."""
+        return os.environ.get('HOSTNAME') or socket.gethostname()
+    
+    @staticmethod
+    def _splay_offset(splay: float, identity: str) -> float:
+        """Stable offset in [0, splay) derived from the replica identity."""
+        if splay <= 0:
+            return 0.0
+        return (zlib.crc32(identity.encode()) % 10000) / 10000 * splay
+    
+    def _due(self, tick: int) -> float:
+        """Deadline for a tick, including its jitter."""
+        return self._origin + tick * self.interval + random.uniform(0, self.jitter)
+    
+    def reschedule(self, interval: float, jitter: float = 0.0, splay: float = 0.0,
+                   overrun: str = 'skip'):
+        """Change timing in place, e.g. on config reload.
+        
+        The pending tick moves to one new interval after the previous
+        tick's grid time (or now, if that has passed), and the grid
+        continues from there.
+        """
+        if interval <= 0:
+            raise ValueError(f"Schedule interval must be positive: {interval}")
+        if overrun not in self.OVERRUN_POLICIES:
+            raise ValueError(f"Unknown overrun policy: {overrun}")
+        
+        offset = self._splay_offset(splay, self.identity)
+        previous = self._origin + (self._tick - 1) * self.interval
+        due = max(previous + interval + (offset - self.offset), self.clock())
+        self._origin = due - self._tick * interval
+        self.interval = interval
+        self.jitter = min(max(jitter, 0.0), interval)
+        self.overrun = overrun
+        self.offset = offset
+        self._deadline = self._due(self._tick)
+    
+    def delay(self) -> float:
+        """Seconds until the next tick is due (0 if already due)."""
+        return max(0.0, self._deadline - self.clock())
+    
+    def start_tick(self) -> float:
+        """Record the start of a cycle; returns the scheduling lag."""
+        lag = max(0.0, self.clock() - self._deadline)
+        SCHEDULE_LAG.set(lag)
+        return lag
+    
+    def complete_tick(self):
+        """Advance to the next tick after a cycle finishes."""
+        now = self.clock()
+        next_tick = self._tick + 1
+        
+        # Index of the latest tick whose grid time has already passed
+        elapsed = math.floor((now - self._origin) / self.interval)
+        missed = elapsed - self._tick
+        
+        if missed >= 1:
+            if self.overrun == 'skip':
+                next_tick = elapsed + 1
+                SKIPPED_TICKS.inc(missed)
+                logger.warning(f"Collection overran by {missed} tick(s), skipping")
+            else:
+                next_tick = elapsed
+                SKIPPED_TICKS.inc(missed - 1)
+                logger.warning(f"Collection overran by {missed} tick(s), coalescing")
+        
+        self._tick = next_tick
+        self._deadline = self._due(next_tick)
@@ -0,0 +1,300 @@
+"""Multi-process sharded collection for large asset lists."""
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Connection, wait
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from prometheus_client import Counter, Gauge
+from providers import timing
+from providers.breaker import BREAKER_REJECTIONS, BREAKER_STATE
+from providers.cache import CACHE_STALENESS
+from providers.registry import create_provider
+from providers.retry import RETRIES, RETRIES_DENIED, configure_budget
+from providers.session import POOL_HITS, POOL_MISSES
+from providers.singleflight import COALESCED_REQUESTS
+
+
+logger = logging.getLogger(__name__)
+
+
+SHARD_UP = Gauge(
+    'bitcoin_exporter_shard_up',
+    'Whether the collection worker process for a shard is running',
+    ['shard']
+)
+
+SHARD_RESTARTS = Counter(
+    'bitcoin_exporter_shard_restarts_total',
+    'Collection worker processes restarted after exiting or hanging',
+    ['shard']
+)
+
+SHARD_SERIES = Gauge(
+    'bitcoin_exporter_shard_series',
+    'Price series returned by a shard in its last cycle',
+    ['shard']
+)
+
+
+# Provider metrics a worker updates; each reply carries their changes
+# and the parent applies them to its own copies
+RELAYED = (
+    POOL_HITS, POOL_MISSES, RETRIES, RETRIES_DENIED, COALESCED_REQUESTS,
+    BREAKER_REJECTIONS, BREAKER_STATE, CACHE_STALENESS,
+)
+
+
+Prices = Dict[Tuple[str, str], float]
+SeriesKey = Tuple[int, Tuple[Tuple[str, str], ...]]
+
+
+def _relayed_values() -> Dict[SeriesKey, float]:
+    """Current value of every RELAYED series, keyed by (index, labels)."""
+    values = {}
+    for index, metric in enumerate(RELAYED):
+        for family in metric.collect():
+            for sample in family.samples:
+                if not sample.name.endswith('_created'):
+                    values[(index, tuple(sorted(sample.labels.items())))] = sample.value
+    return values
+
+
+class _MetricChanges:
+    """Worker side: what the provider recorded since the last reply.
+    
+    Counters travel as deltas and gauges as their new value; request
+    timings travel as the attempts themselves, so the parent's
+    histograms get the exact observations.
+    """
+    
+    def __init__(self):
+        """Start redirecting this process's request timings."""
+        self._last: Dict[SeriesKey, float] = {}
+        self._attempts: Deque[Tuple[str, str, Dict[str, float], str]] = deque()
+        timing.redirect(self._attempts.append)
+    
+    def take(self) -> Tuple[List[Tuple[SeriesKey, float]], List[Tuple[str, str, Dict[str, float], str]]]:
+        values = _relayed_values()
+        changes = []
+        for key, value in values.items():
+            if isinstance(RELAYED[key[0]], Counter):
+                if value != self._last.get(key, 0.0):
+                    changes.append((key, value - self._last.get(key, 0.0)))
+            elif value != self._last.get(key):
+                changes.append((key, value))
+        self._last = values
+        attempts = []
+        while self._attempts:
+            attempts.append(self._attempts.popleft())
+        return changes, attempts
+
+
+def _apply_changes(changes: List[Tuple[SeriesKey, float]],
+                   attempts: List[Tuple[str, str, Dict[str, float], str]]):
+    """Parent side: apply a worker's metric changes."""
+    for (index, labels), value in changes:
+        metric = RELAYED[index]
+        child = metric.labels(**dict(labels))
+        if isinstance(metric, Counter):
+            child.inc(value)
+        else:
+            child.set(value)
+    for attempt in attempts:
+        timing.record(*attempt)
+
+
+def _shard_worker(api_config: Dict[str, Any], assets: List[str], currencies: List[str], conn: Connection):
+    """Worker process: fetch and parse one asset slice per request from the parent.
+    
+    Requests are cycle numbers; each reply is (cycle, prices, failed
+    batches, metric changes). None or a closed pipe stops the worker.
+    """
+    # The parent owns shutdown
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    configure_budget(api_config.get('retry', {}))
+    metrics = _MetricChanges()
+    provider = create_provider(api_config.get('provider', 'coindesk'), api_config)
+    batches = provider.build_batches(assets)
+    
+    def fetch(batch):
+        return provider.fetch_batch(batch, currencies)
+    
+    with ThreadPoolExecutor(max_workers=min(len(batches), 8), thread_name_prefix='shard') as executor:
+        while True:
+            try:
+                cycle = conn.recv()
+            except (EOFError, OSError):
+                break
+            if cycle is None:
+                break
+            
+            prices: Prices = {}
+            failed = 0
+            for batch, raw_data in zip(batches, executor.map(fetch, batches)):
+                if not raw_data:
+                    failed += 1
+                    continue
+                prices.update(provider.parse_batch(raw_data, batch, currencies))
+            conn.send((cycle, prices, failed, metrics.take()))
+    provider.close()
+
+
+class ShardPool:
+    """Spread the asset list over worker processes and merge their prices.
+    
+    Each worker owns a fixed, disjoint slice of the assets and does the
+    upstream fetching and JSON parsing for it, so parsing scales past
+    one core; the parent only sets gauges and applies the request
+    metrics each worker reports with its prices. Every worker has its own
+    pipe, so a crash loses that shard's cycle and nothing else: dead or
+    hung workers are restarted with the same slice before the next
+    cycle, and their series keep the last published values meanwhile.
+    """
+    
+    def __init__(self, api_config: Dict[str, Any], assets: List[str], currencies: List[str],
+                 workers: int, timeout: float = 25):
+        """Initialize pool; start() spawns the workers."""
+        self.api_config = api_config
+        self.currencies = currencies
+        self.timeout = timeout
+        self.slices = [assets[i::workers] for i in range(workers) if assets[i::workers]]
+        self._context = multiprocessing.get_context('spawn')
+        self._workers: List[Optional[Tuple[Any, Connection]]] = [None] * len(self.slices)
+        self._cycle = 0
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_config(cls, api_config: Dict[str, Any], assets: List[str],
+                    currencies: List[str]) -> Optional['ShardPool']:
+        """Build from `api.shards`; None unless more than one worker is configured."""
+        shard_config = api_config.get('shards', {})
+        workers = shard_config.get('workers', 0)
+        if workers <= 1:
+            return None
+        if not assets:
+            logger.warning("api.shards is set but api.assets is empty; collecting in-process")
+            return None
+        return cls(api_config, assets, currencies, workers, timeout=shard_config.get('timeout', 25))
+    
+    def start(self):
+        """Spawn one worker per slice."""
+        for shard in range(len(self.slices)):
+            self._spawn(shard)
+        logger.info(f"Started {len(self.slices)} collection shards")
+    
+    def _spawn(self, shard: int):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_shard_worker,
+            args=(self.api_config, self.slices[shard], self.currencies, child_conn),
+            name=f"collector-shard-{shard}",
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        self._workers[shard] = (process, parent_conn)
+        SHARD_UP.labels(shard=str(shard)).set(1)
+    
+    def _restart(self, shard: int, reason: str):
+        process, conn = self._workers[shard]
+        logger.warning(f"Collection shard {shard} {reason}, restarting")
+        conn.close()
+        if process.is_alive():
+            process.kill()
+        process.join(1)
+        # Down until the replacement is running; _spawn marks it up again
+        SHARD_UP.labels(shard=str(shard)).set(0)
+        SHARD_RESTARTS.labels(shard=str(shard)).inc()
+        self._spawn(shard)
+    
+    def _try_restart(self, shard: int, reason: str) -> bool:
+        """Restart a shard, logging a failure so the other shards still run."""
+        try:
+            self._restart(shard, reason)
+            return True
+        except Exception as e:
+            logger.error(f"Could not restart collection shard {shard}: {e}")
+            return False
+    
+    def collect(self) -> Tuple[Prices, int]:
+        """Run one cycle on every shard; returns merged prices and failed batch count.
+        
+        Shards that die or miss the timeout count as failed and are
+        restarted, so a hung worker cannot answer into a later cycle. A
+        shard that cannot be restarted counts as failed and is retried
+        next cycle.
+        """
+        with self._lock:
+            self._cycle += 1
+            cycle = self._cycle
+            pending: Dict[Connection, int] = {}
+            failed_shards = set()
+            unavailable = 0
+            
+            for shard, (process, conn) in enumerate(self._workers):
+                if not process.is_alive():
+                    if not self._try_restart(shard, f"exited with code {process.exitcode}"):
+                        unavailable += 1
+                        continue
+                    process, conn = self._workers[shard]
+                try:
+                    conn.send(cycle)
+                    pending[conn] = shard
+                except OSError:
+                    failed_shards.add(shard)
+            
+            prices: Prices = {}
+            failed = unavailable
+            deadline = time.monotonic() + self.timeout
+            while pending:
+                ready = wait(list(pending), timeout=max(0.0, deadline - time.monotonic()))
+                if not ready:
+                    break
+                for conn in ready:
+                    shard = pending.pop(conn)
+                    try:
+                        reply_cycle, shard_prices, shard_failed, changes = conn.recv()
+                    except (EOFError, OSError):
+                        failed_shards.add(shard)
+                        continue
+                    _apply_changes(*changes)
+                    if reply_cycle != cycle:
+                        failed_shards.add(shard)
+                        continue
+                    prices.update(shard_prices)
+                    failed += shard_failed
+                    SHARD_SERIES.labels(shard=str(shard)).set(len(shard_prices))
+            
+            timed_out = set(pending.values())
+            for shard in sorted(failed_shards | timed_out):
+                failed += 1
+                self._try_restart(shard, "timed out" if shard in timed_out else "failed")
+            
+            return prices, failed
+    
+    def stop(self):
+        """Ask workers to exit, killing any that do not."""
+        with self._lock:
+            for worker in self._workers:
+                if worker is None:
+                    continue
+                process, conn = worker
+                try:
+                    conn.send(None)
+                except OSError:
+                    pass
+            for shard, worker in enumerate(self._workers):
+                if worker is None:
+                    continue
+                process, conn = worker
+                process.join(5)
+                if process.is_alive():
+                    process.kill()
+                    process.join(1)
+                conn.close()
+                SHARD_UP.labels(shard=str(shard)).set(0)
+                self._workers[shard] = None
@@ -1,18 +1,22 @@
 """Main application entry point."""
 import time
+
+# Taken before the other imports so the startup breakdown includes them
+_STARTED = time.perf_counter()
+
 import logging
 import signal
 import sys
 import os
-from prometheus_client import start_http_server, generate_latest, REGISTRY
-from http.server import HTTPServer, BaseHTTPRequestHandler
-import threading
 
 # Add src to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from config.loader import ConfigLoader
-from collectors.bitcoin import BitcoinCollector
+# Collectors, providers and the engine (requests, asyncio) are imported
+# after the port is bound; see BitcoinExporter.initialize
+from prometheus_client import REGISTRY, Gauge
+from config import ConfigLoader, ConfigWatcher
+from server import ExpositionCache, start_server
 
 
 # Setup logging
@@ -23,14 +27,41 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# Config sections only read at startup; reloading them logs a warning
+RESTART_REQUIRED = (
+    'exporter.port', 'exporter.server', 'exporter.history', 'exporter.push', 'exporter.collection',
+    'metrics.namespace', 'metrics.subsystem', 'metrics.rolling', 'metrics.series', 'metrics_definitions',
+)
+
+
+STARTUP_PHASE_SECONDS = Gauge(
+    'bitcoin_exporter_startup_phase_seconds',
+    'Time spent in each startup phase',
+    ['phase']
+)
+
+STARTUP_SECONDS = Gauge(
+    'bitcoin_exporter_startup_seconds',
+    'Time from process start to the end of the first collection cycle'
+)
+
+
 class BitcoinExporter:
     """Main Bitcoin price exporter application."""
     
     def __init__(self):
         """Initialize the exporter."""
         self.config = None
+        self.config_loader = None
+        self.watcher = None
         self.collector = None
+        self.engine = None
+        self.exposition = None
+        self.server = None
+        self.pusher = None
         self.running = True
+        self._phases = {}
+        self._mark = _STARTED
         
         # Setup signal handlers
         signal.signal(signal.SIGINT, self._handle_shutdown)
@@ -40,96 +71,228 @@ class BitcoinExporter:
         """Handle shutdown signals gracefully."""
         logger.info("Shutdown signal received, stopping exporter...")
         self.running = False
+        if self.engine:
+            self.engine.stop()
+    
+    def _on_engine_stop(self):
+        """Mark the exporter as shutting down once the engine stops."""
+        self.running = False
+    
+    def _phase(self, name: str):
+        """Record the time since the previous phase ended."""
+        now = time.perf_counter()
+        self._phases[name] = now - self._mark
+        STARTUP_PHASE_SECONDS.labels(phase=name).set(self._phases[name])
+        self._mark = now
     
     def initialize(self):
-        """Initialize application components."""
+        """Initialize application components.
+        
+        The HTTP port is bound as soon as the config is loaded, so probes
+        and scrapes are answered (with self-metrics only) while the
+        collector modules are imported and the history is replayed.
+        """
         try:
+            self._phase('imports')
+            
             # Load configuration
-            config_loader = ConfigLoader()
-            self.config = config_loader.load()
+            self.config_loader = ConfigLoader()
+            self.config = self.config_loader.load()
             
             # Configure logging
             log_level = self.config.get('logging', {}).get('level', 'INFO')
             logging.getLogger().setLevel(getattr(logging, log_level))
+            self._phase('config')
+            
+            # Pre-rendered /metrics exposition, refreshed once per cycle
+            exposition_config = self.config.get('exporter', {}).get('exposition', {})
+            self.exposition = ExpositionCache(gzip_enabled=exposition_config.get('gzip', True))
+            
+            # Get configuration - Railway provides PORT env var
+            port = int(os.environ.get('PORT', self.config.get('exporter', {}).get('port', 8000)))
+            
+            # Start combined metrics and health server
+            self.server = self._start_health_server(port)
+            logger.info(f"Metrics server started on port {port}")
+            logger.info(f"Health check available at http://localhost:{port}/health")
+            self._phase('bind')
+            
+            from collectors.bitcoin import BitcoinCollector
+            self._phase('collector_imports')
             
             # Initialize collector
-            self.collector = BitcoinCollector(self.config)
+            collector = BitcoinCollector(self.config)
             
             # Validate configuration
-            if not self.collector.validate():
+            if not collector.validate():
                 raise ValueError("Invalid collector configuration")
             
-            logger.info("Bitcoin exporter initialized successfully")
+            self.collector = collector
+            self.exposition.render()
+            self._phase('collector')
             
+            logger.info("Bitcoin exporter initialized successfully")
+        
         except Exception as e:
             logger.error(f"Failed to initialize exporter: {e}")
             sys.exit(1)
     
-    def _start_health_server(self, port):
-        """Start health check server."""
-        class HealthHandler(BaseHTTPRequestHandler):
-            def do_GET(handler_self):
-                if handler_self.path == '/health':
-                    handler_self.send_response(200)
-                    handler_self.send_header('Content-type', 'application/json')
-                    handler_self.end_headers()
-                    status = {
-                        'status': 'healthy' if self.running else 'shutting_down',
-                        'collector': 'active' if self.collector else 'inactive'
-                    }
-                    handler_self.wfile.write(str(status).encode())
-                elif handler_self.path == '/metrics':
-                    handler_self.send_response(200)
-                    handler_self.send_header('Content-type', 'text/plain')
-                    handler_self.end_headers()
-                    handler_self.wfile.write(generate_latest(REGISTRY))
-                else:
-                    handler_self.send_response(404)
-                    handler_self.end_headers()
-            
-            def log_message(self, format, *args):
-                # Suppress default logging
-                pass
+    def reload(self, config: dict, changes: set):
+        """Apply a reloaded config in place; called by the config watcher.
+        
+        Settings that can be rejected are checked and the collector is
+        reconfigured before anything else changes, so a reload that
+        raises leaves the exporter running on its old config.
+        """
+        exporter_config = config.get('exporter', {})
+        level_name = config.get('logging', {}).get('level', 'INFO')
+        log_level = logging.getLevelName(level_name)
+        if not isinstance(log_level, int):
+            raise ValueError(f"Unknown logging.level: {level_name}")
+        if changes & {'exporter.interval', 'exporter.schedule'} and self.engine:
+            from engine import TickScheduler
+            overrun = self._schedule_settings(config)['overrun']
+            if overrun not in TickScheduler.OVERRUN_POLICIES:
+                raise ValueError(f"Unknown exporter.schedule.overrun policy: {overrun}")
+        
+        # Builds its replacement components first and keeps the old ones if that fails
+        self.collector.reconfigure(config, changes)
+        
+        restart = sorted(change for change in changes if change.startswith(RESTART_REQUIRED))
+        if restart:
+            logger.warning(f"Changes to {', '.join(restart)} take effect after a restart")
+        if 'logging.level' in changes:
+            logging.getLogger().setLevel(log_level)
+        if changes & {'exporter.interval', 'exporter.schedule'} and self.engine:
+            self.engine.reschedule(exporter_config.get('interval', 60), **self._schedule_settings(config))
+        if 'exporter.timeout' in changes and self.engine:
+            self.engine.timeout = exporter_config.get('timeout', 30)
+        if 'exporter.exposition' in changes:
+            self.exposition.gzip_enabled = exporter_config.get('exposition', {}).get('gzip', True)
+        if 'exporter.reload' in changes and self.watcher:
+            self.watcher.interval = exporter_config.get('reload', {}).get('interval', 5)
         
-        server = HTTPServer(('', port), HealthHandler)
-        thread = threading.Thread(target=server.serve_forever)
-        thread.daemon = True
-        thread.start()
-        return server
+        self.config = config
+        self.exposition.render()
+    
+    @staticmethod
+    def _schedule_settings(config: dict) -> dict:
+        """TickScheduler timing options from `exporter.schedule`."""
+        schedule_config = config.get('exporter', {}).get('schedule', {})
+        return {
+            'jitter': schedule_config.get('jitter', 0),
+            'splay': schedule_config.get('splay', 0),
+            'overrun': schedule_config.get('overrun', 'skip'),
+        }
+    
+    def health_status(self) -> dict:
+        """Get the /health payload."""
+        if not self.running:
+            status = 'shutting_down'
+        elif self.collector is None:
+            status = 'starting'
+        else:
+            status = 'healthy'
+        return {
+            'status': status,
+            'collector': 'active' if self.collector else 'inactive'
+        }
+    
+    def _start_health_server(self, port):
+        """Start combined metrics and health server."""
+        server_config = self.config.get('exporter', {}).get('server', {})
+        return start_server(self, port, server_config)
+    
+    def _on_cycle(self):
+        """Refresh the exposition; the first call completes startup."""
+        if 'first_collect' not in self._phases:
+            self._phase('first_collect')
+            total = self._mark - _STARTED
+            STARTUP_SECONDS.set(total)
+            breakdown = ', '.join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self._phases.items())
+            logger.info(f"Startup took {total * 1000:.0f}ms: {breakdown}")
+        self.exposition.render()
+        if self.pusher:
+            self.pusher.push()
     
     def run(self):
         """Run the exporter."""
         try:
-            # Get configuration - Railway provides PORT env var
-            port = int(os.environ.get('PORT', self.config.get('exporter', {}).get('port', 8000)))
+            import asyncio
+            from engine import CollectionEngine, OnScrapeCollection, TickScheduler
+            from push import create_pusher
+            
             interval = self.config.get('exporter', {}).get('interval', 60)
+            timeout = self.config.get('exporter', {}).get('timeout', 30)
             
-            # Start combined metrics and health server
-            health_server = self._start_health_server(port)
-            logger.info(f"Metrics server started on port {port}")
-            logger.info(f"Health check available at http://localhost:{port}/health")
+            # Reload on config file changes (polled) and on SIGHUP
+            reload_config = self.config.get('exporter', {}).get('reload', {})
+            self.watcher = ConfigWatcher(
+                self.config_loader, self.config, self.reload,
+                interval=reload_config.get('interval', 5)
+            )
             
-            # Initial collection
-            self.collector.collect()
+            # In on-scrape mode /metrics drives collection and the engine
+            # only handles signals; otherwise collect on a fixed-rate schedule
+            collection_config = self.config.get('exporter', {}).get('collection', {})
+            collectors = [self.collector]
+            if collection_config.get('mode', 'scheduled') == 'on_scrape':
+                on_scrape = OnScrapeCollection.from_config(self.collector, collection_config, on_collect=self._on_cycle)
+                REGISTRY.register(on_scrape)
+                self.exposition.refresh = on_scrape.refresh
+                collectors = []
+                logger.info(
+                    f"Collecting on scrape (min_age={on_scrape.min_age}s, max_age={on_scrape.max_age}s)"
+                )
             
-            # Main collection loop
-            while self.running:
-                try:
-                    time.sleep(interval)
-                    if self.running:
-                        self.collector.collect()
-                except Exception as e:
-                    logger.error(f"Error during collection: {e}")
+            scheduler = TickScheduler(interval, **self._schedule_settings(self.config))
+            self.engine = CollectionEngine(
+                collectors,
+                interval=interval,
+                timeout=timeout,
+                on_stop=self._on_engine_stop,
+                on_cycle=self._on_cycle if collectors else None,
+                scheduler=scheduler,
+                on_reload=self.watcher.trigger
+            )
+            self.watcher.start()
             
-            logger.info("Exporter stopped")
+            # Push alongside the pull server when scrapes cannot reach us
+            self.pusher = create_pusher(self.config.get('exporter', {}).get('push', {}), self.exposition)
+            if self.pusher:
+                self.pusher.start()
             
+            # Streamed prices land between cycles; re-render so scrapes see them
+            self.collector.on_stream_update = self.exposition.render
+            self.collector.start_stream()
+            self.collector.start_shards()
+            
+            asyncio.run(self.engine.run())
+            self.running = False
+            self.watcher.stop()
+            if self.pusher:
+                self.pusher.stop()
+            self.collector.close()
+            
+            logger.info("Exporter stopped")
+        
         except Exception as e:
             logger.error(f"Failed to run exporter: {e}")
             sys.exit(1)
 
 
+def backfill(argv):
+    """`main.py backfill ...`: fetch historical candles instead of serving."""
+    from backfill.cli import run
+    config = ConfigLoader().load()
+    logging.getLogger().setLevel(getattr(logging, config.get('logging', {}).get('level', 'INFO')))
+    sys.exit(run(argv, config))
+
+
 def main():
     """Main entry point."""
+    if sys.argv[1:2] == ['backfill']:
+        backfill(sys.argv[2:])
     exporter = BitcoinExporter()
     exporter.initialize()
     exporter.run()
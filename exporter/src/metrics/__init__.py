@@ -0,0 +1,5 @@
+"""Metrics package."""
+from metrics.factory import MetricFactory
+from metrics.rolling import RollingAggregates, RollingWindow
+
+__all__ = ['MetricFactory', 'RollingAggregates', 'RollingWindow']
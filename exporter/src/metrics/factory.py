@@ -0,0 +1,290 @@
+"""Build Prometheus metrics from declarative definitions."""
+import logging
+import threading
+import time
+import weakref
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Tuple
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram, Summary
+
+
+logger = logging.getLogger(__name__)
+
+
+SERIES = Gauge(
+    'bitcoin_exporter_series',
+    'Labelled series currently exported, for metrics with a series limit or TTL',
+    ['metric']
+)
+
+SERIES_EVICTED = Counter(
+    'bitcoin_exporter_series_evicted_total',
+    'Series removed for going stale (ttl) or to make room under the series limit (overflow)',
+    ['metric', 'reason']
+)
+
+SERIES_REJECTED = Counter(
+    'bitcoin_exporter_series_rejected_total',
+    'Updates dropped because they would add a series past the series limit',
+    ['metric']
+)
+
+
+class _Dropped:
+    """Stand-in child for updates rejected by the series limit."""
+    
+    def set(self, value):
+        pass
+    
+    def inc(self, amount=1):
+        pass
+    
+    def dec(self, amount=1):
+        pass
+    
+    def observe(self, amount):
+        pass
+    
+    def time(self):
+        return nullcontext()
+
+
+_DROPPED = _Dropped()
+
+
+class SeriesHandle:
+    """Label handle that records its last update so the series can be capped and expired.
+    
+    The series is created on the first update rather than when the handle
+    is taken. The factory detaches evicted handles; the next update
+    re-attaches them, subject to the series limit, so callers can keep
+    handles across evictions.
+    """
+    
+    __slots__ = ('factory', 'name', 'labels', 'key', 'child', 'touched', '__weakref__')
+    
+    def __init__(self, factory: 'MetricFactory', name: str, labels: Dict[str, str], key: Tuple):
+        """Initialize a detached handle."""
+        self.factory = factory
+        self.name = name
+        self.labels = labels
+        self.key = key
+        self.child = None
+        self.touched = 0.0
+    
+    def _child(self):
+        child = self.child
+        if child is None:
+            child = self.factory._attach(self)
+            if child is None:
+                return _DROPPED
+        self.touched = time.monotonic()
+        return child
+    
+    def set(self, value):
+        self._child().set(value)
+    
+    def inc(self, amount=1):
+        self._child().inc(amount)
+    
+    def dec(self, amount=1):
+        self._child().dec(amount)
+    
+    def observe(self, amount):
+        self._child().observe(amount)
+    
+    def time(self):
+        return self._child().time()
+
+
+class MetricFactory:
+    """Create every metric in a definitions list once and hand out label handles.
+    
+    Definitions use the metrics.yaml shape: name, type, description, and
+    optional labels and buckets. `name` is the key handles are looked up
+    by; the exported name is namespace_subsystem_name, where a definition
+    may override namespace or subsystem (an empty string drops the part)
+    or give `metric_name` to export a fixed name as-is.
+    
+    `series` holds the app-config `metrics.series` defaults (ttl,
+    max_series, overflow) that apply to labelled gauges; a definition's
+    own `ttl` and `max_series` apply to any labelled metric. Handles of
+    such metrics are SeriesHandles: expire() drops series not updated
+    within ttl seconds, and at max_series a new series is either dropped
+    (overflow: drop) or replaces the least recently updated one
+    (overflow: evict_oldest).
+    """
+    
+    TYPES = {
+        'gauge': Gauge,
+        'counter': Counter,
+        'histogram': Histogram,
+        'summary': Summary,
+    }
+    
+    OVERFLOW = ('drop', 'evict_oldest')
+    
+    def __init__(self, definitions: List[Dict[str, Any]], namespace: str = '',
+                 subsystem: str = '', registry=REGISTRY, series: Optional[Dict[str, Any]] = None):
+        """Initialize factory and create all defined metrics."""
+        series = series or {}
+        self.namespace = namespace
+        self.subsystem = subsystem
+        self.registry = registry
+        self.overflow = series.get('overflow', 'drop')
+        if self.overflow not in self.OVERFLOW:
+            raise ValueError(f"Unknown metrics.series.overflow: {self.overflow}")
+        self.metrics: Dict[str, Any] = {}
+        self._labelnames: Dict[str, List[str]] = {}
+        self._handles: Dict[Tuple[str, Tuple], Any] = {}
+        # (ttl, max_series) and attached SeriesHandles per limited metric
+        self._policies: Dict[str, Tuple[float, int]] = {}
+        self._series: Dict[str, Dict[Tuple, SeriesHandle]] = {}
+        # Every live SeriesHandle, attached or not, so one label set has one handle
+        self._series_handles = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        
+        for definition in definitions:
+            name = definition['name']
+            self.metrics[name] = self._build(definition)
+            self._labelnames[name] = definition.get('labels') or []
+            policy = self._policy(definition, series)
+            if any(policy):
+                self._policies[name] = policy
+                self._series[name] = {}
+    
+    @staticmethod
+    def merge(*definition_lists: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Combine definition lists; later lists override earlier ones by name."""
+        merged: Dict[str, Dict[str, Any]] = {}
+        for definitions in definition_lists:
+            for definition in definitions or []:
+                merged[definition['name']] = {**merged.get(definition['name'], {}), **definition}
+        return list(merged.values())
+    
+    @staticmethod
+    def _policy(definition: Dict[str, Any], series: Dict[str, Any]) -> Tuple[float, int]:
+        """(ttl, max_series) for one definition; zero disables either."""
+        if not definition.get('labels'):
+            return 0, 0
+        defaults = series if definition.get('type', 'gauge') == 'gauge' else {}
+        return (
+            definition.get('ttl', defaults.get('ttl', 0)) or 0,
+            definition.get('max_series', defaults.get('max_series', 0)) or 0,
+        )
+    
+    def _build(self, definition: Dict[str, Any]):
+        """Create one metric from its definition."""
+        metric_type = definition.get('type', 'gauge')
+        if metric_type not in self.TYPES:
+            raise ValueError(f"Unknown metric type for {definition['name']}: {metric_type}")
+        
+        kwargs = {
+            'name': definition['name'],
+            'documentation': definition.get('description', definition['name']),
+            'labelnames': definition.get('labels') or [],
+            'namespace': definition.get('namespace', self.namespace) or '',
+            'subsystem': definition.get('subsystem', self.subsystem) or '',
+            'registry': self.registry,
+        }
+        if definition.get('metric_name'):
+            kwargs.update(name=definition['metric_name'], namespace='', subsystem='')
+        if metric_type == 'histogram' and definition.get('buckets'):
+            kwargs['buckets'] = definition['buckets']
+        
+        logger.debug("Creating %s metric %s", metric_type, definition['name'])
+        return self.TYPES[metric_type](**kwargs)
+    
+    def __getitem__(self, name: str):
+        return self.metrics[name]
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self.metrics
+    
+    def handle(self, name: str, **labels):
+        """Bound child for one label set, created on first request.
+        
+        Take handles once, outside the collection hot path, and call
+        set()/inc()/observe() on them directly.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        handle = self._handles.get(key)
+        if handle is None:
+            with self._lock:
+                handle = self._handles.get(key)
+                if handle is None:
+                    metric = self.metrics[name]
+                    if labels and name in self._policies:
+                        # Cached in _handles only while attached
+                        handle = self._series_handles.get(key)
+                        if handle is None:
+                            handle = self._series_handles[key] = SeriesHandle(self, name, labels, key)
+                        return handle
+                    handle = metric.labels(**labels) if labels else metric
+                    self._handles[key] = handle
+        return handle
+    
+    def _attach(self, handle: SeriesHandle):
+        """Create the series behind a handle; None if the series limit rejects it."""
+        with self._lock:
+            if handle.child is not None:
+                return handle.child
+            name = handle.name
+            series = self._series[name]
+            _, limit = self._policies[name]
+            if limit and len(series) >= limit:
+                if self.overflow == 'drop':
+                    SERIES_REJECTED.labels(metric=name).inc()
+                    return None
+                self._evict(min(series.values(), key=lambda other: other.touched), 'overflow')
+            
+            handle.child = self.metrics[name].labels(**handle.labels)
+            series[handle.key] = handle
+            self._handles[handle.key] = handle
+            SERIES.labels(metric=name).set(len(series))
+            return handle.child
+    
+    def _evict(self, handle: SeriesHandle, reason: str):
+        """Detach and remove one series; caller holds the lock."""
+        handle.child = None
+        series = self._series[handle.name]
+        series.pop(handle.key, None)
+        self._handles.pop(handle.key, None)
+        try:
+            self.metrics[handle.name].remove(*(handle.labels[label] for label in self._labelnames[handle.name]))
+        except KeyError:
+            pass
+        if reason:
+            SERIES_EVICTED.labels(metric=handle.name, reason=reason).inc()
+        SERIES.labels(metric=handle.name).set(len(series))
+    
+    def expire(self) -> int:
+        """Evict series not updated within their metric's ttl; returns how many."""
+        now = time.monotonic()
+        evicted = 0
+        with self._lock:
+            for name, (ttl, _) in self._policies.items():
+                if not ttl:
+                    continue
+                stale = [handle for handle in self._series[name].values() if now - handle.touched > ttl]
+                for handle in stale:
+                    self._evict(handle, 'ttl')
+                evicted += len(stale)
+        if evicted:
+            logger.info(f"Evicted {evicted} series not updated within their TTL")
+        return evicted
+    
+    def remove(self, name: str, **labels):
+        """Drop one labelled series and its cached handle."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            handle = self._handles.pop(key, None)
+            if isinstance(handle, SeriesHandle):
+                self._evict(handle, '')
+                return
+            if handle is None and name in self._policies:
+                return
+            try:
+                self.metrics[name].remove(*(labels[label] for label in self._labelnames[name]))
+            except KeyError:
+                pass
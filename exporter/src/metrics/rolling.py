@@ -0,0 +1,233 @@
+"""In-memory rolling price windows (24h high/low/change, moving averages)."""
+import math
+import threading
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+# Defaults for the metrics.yaml entries published here
+DEFINITIONS = [
+    {
+        'name': 'daily_high',
+        'type': 'gauge',
+        'description': 'Highest price over the rolling window',
+        'labels': ['currency', 'quote'],
+    },
+    {
+        'name': 'daily_low',
+        'type': 'gauge',
+        'description': 'Lowest price over the rolling window',
+        'labels': ['currency', 'quote'],
+    },
+    {
+        'name': 'price_change_24h',
+        'type': 'gauge',
+        'subsystem': '',
+        'description': 'Price change over the rolling window, percent',
+        'labels': ['currency', 'quote'],
+    },
+    {
+        'name': 'moving_average',
+        'type': 'gauge',
+        'description': 'Mean price over the trailing window',
+        'labels': ['currency', 'quote', 'window'],
+    },
+]
+
+
+def window_label(seconds: int) -> str:
+    """Short label for a window length (e.g. 3600 -> '1h')."""
+    for unit, size in (('d', 86400), ('h', 3600), ('m', 60)):
+        if seconds % size == 0:
+            return f"{seconds // size}{unit}"
+    return f"{seconds}s"
+
+
+class RollingWindow:
+    """Fixed-size ring of time slots covering the last `window` seconds.
+    
+    Each slot keeps the open, high, low, sum and count of the samples that
+    fell into it, so add() is O(1) and memory is fixed regardless of how
+    often prices arrive. Aggregates over the completed slots are cached
+    and rebuilt only when time moves into a new slot.
+    """
+    
+    def __init__(self, window: int = 86400, resolution: int = 60, averages: Tuple[int, ...] = ()):
+        """Initialize an empty window."""
+        self.resolution = resolution
+        self.size = max(1, math.ceil(window / resolution))
+        self.averages = tuple(averages)
+        nan = float('nan')
+        self._slot = array('q', [-1] * self.size)
+        self._open = array('d', [nan] * self.size)
+        self._high = array('d', [nan] * self.size)
+        self._low = array('d', [nan] * self.size)
+        self._sum = array('d', [0.0] * self.size)
+        self._count = array('q', [0] * self.size)
+        self._current = -1
+        self._last = nan
+        self._closed: Dict[str, Any] = {}
+    
+    def add(self, price: float, timestamp: float, rebuild: bool = True):
+        """Record one sample; rebuild=False defers aggregation (see load())."""
+        slot = int(timestamp // self.resolution)
+        if slot > self._current:
+            self._current = slot
+            self._reset(slot)
+            if rebuild:
+                self._rebuild()
+        elif slot <= self._current - self.size:
+            return  # older than the window
+        
+        i = slot % self.size
+        if self._slot[i] != slot:
+            self._reset(slot)
+        if self._count[i] == 0:
+            self._open[i] = price
+            self._high[i] = self._low[i] = price
+        else:
+            if price > self._high[i]:
+                self._high[i] = price
+            if price < self._low[i]:
+                self._low[i] = price
+        self._sum[i] += price
+        self._count[i] += 1
+        
+        if slot == self._current:
+            self._last = price
+        elif rebuild:
+            # Late sample for a completed slot
+            self._rebuild()
+    
+    def load(self, samples: Iterable[Tuple[float, float]]):
+        """Add many (price, timestamp) samples, aggregating once at the end."""
+        for price, timestamp in samples:
+            self.add(price, timestamp, rebuild=False)
+        self._rebuild()
+    
+    def _reset(self, slot: int):
+        i = slot % self.size
+        self._slot[i] = slot
+        self._count[i] = 0
+        self._sum[i] = 0.0
+    
+    def _rebuild(self):
+        """Aggregate the completed slots still inside the window."""
+        high = low = first = None
+        first_slot = None
+        sums = {seconds: [0.0, 0] for seconds in self.averages}
+        for i in range(self.size):
+            slot = self._slot[i]
+            if slot < 0 or slot >= self._current or slot <= self._current - self.size or not self._count[i]:
+                continue
+            if high is None or self._high[i] > high:
+                high = self._high[i]
+            if low is None or self._low[i] < low:
+                low = self._low[i]
+            if first_slot is None or slot < first_slot:
+                first_slot, first = slot, self._open[i]
+            for seconds, total in sums.items():
+                if (self._current - slot) * self.resolution < seconds:
+                    total[0] += self._sum[i]
+                    total[1] += self._count[i]
+        self._closed = {'high': high, 'low': low, 'first': first, 'sums': sums}
+    
+    def stats(self) -> Optional[Dict[str, Any]]:
+        """High, low, change (percent) and averages over the window; None if empty."""
+        i = self._current % self.size
+        count = self._count[i] if self._current >= 0 and self._slot[i] == self._current else 0
+        closed = self._closed
+        high, low, first = closed.get('high'), closed.get('low'), closed.get('first')
+        if count:
+            high = self._high[i] if high is None else max(high, self._high[i])
+            low = self._low[i] if low is None else min(low, self._low[i])
+            if first is None:
+                first = self._open[i]
+        if high is None:
+            return None
+        
+        averages = {}
+        for seconds, (total, samples) in closed.get('sums', {}).items():
+            if count:
+                total, samples = total + self._sum[i], samples + count
+            if samples:
+                averages[seconds] = total / samples
+        
+        return {
+            'high': high,
+            'low': low,
+            'change_pct': (self._last - first) / first * 100 if first else 0.0,
+            'averages': averages,
+        }
+
+
+class RollingAggregates:
+    """Rolling windows per (currency, quote) series, published as gauges."""
+    
+    def __init__(self, factory, window: int = 86400, resolution: int = 60,
+                 averages: List[int] = (3600, 86400)):
+        """Initialize aggregates publishing through a MetricFactory."""
+        self.factory = factory
+        self.window = window
+        self.resolution = resolution
+        self.averages = tuple(averages)
+        self._windows: Dict[Tuple[str, str], RollingWindow] = {}
+        self._handles: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_config(cls, factory, config: Dict[str, Any]) -> Optional['RollingAggregates']:
+        """Build from the `metrics.rolling` config section; None when disabled."""
+        if not config.get('enabled', True):
+            return None
+        return cls(
+            factory,
+            window=config.get('window', 86400),
+            resolution=config.get('resolution', 60),
+            averages=config.get('averages', [3600, 86400])
+        )
+    
+    def _series(self, key: Tuple[str, str]):
+        """Window and gauge handles for a series, created on first use."""
+        window = self._windows.get(key)
+        if window is None:
+            currency, quote = key
+            window = self._windows[key] = RollingWindow(self.window, self.resolution, self.averages)
+            self._handles[key] = {
+                'high': self.factory.handle('daily_high', currency=currency, quote=quote),
+                'low': self.factory.handle('daily_low', currency=currency, quote=quote),
+                'change': self.factory.handle('price_change_24h', currency=currency, quote=quote),
+                'averages': {
+                    seconds: self.factory.handle(
+                        'moving_average', currency=currency, quote=quote, window=window_label(seconds)
+                    )
+                    for seconds in self.averages
+                },
+            }
+        return window, self._handles[key]
+    
+    def observe(self, currency: str, quote: str, price: float, timestamp: float):
+        """Add a price sample and refresh the series' gauges."""
+        with self._lock:
+            window, handles = self._series((currency, quote))
+            window.add(price, timestamp)
+            stats = window.stats()
+        self._publish(handles, stats)
+    
+    def load(self, currency: str, quote: str, samples: Iterable[Tuple[float, float]]):
+        """Bulk-add (price, timestamp) samples, e.g. replayed history, and publish once."""
+        with self._lock:
+            window, handles = self._series((currency, quote))
+            window.load(samples)
+            stats = window.stats()
+        self._publish(handles, stats)
+    
+    @staticmethod
+    def _publish(handles: Dict[str, Any], stats: Optional[Dict[str, Any]]):
+        if stats is None:
+            return
+        handles['high'].set(stats['high'])
+        handles['low'].set(stats['low'])
+        handles['change'].set(stats['change_pct'])
+        for seconds, average in stats['averages'].items():
+            handles['averages'][seconds].set(average)
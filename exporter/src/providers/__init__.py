@@ -1,5 +1,28 @@
 """Providers package."""
-from providers.base import BaseProvider
+from providers.base import BaseProvider, Candle
+from providers.coinbase import CoinbaseProvider
 from providers.coindesk import CoindeskProvider
+from providers.coingecko import CoinGeckoProvider
+from providers.fanout import PriceAggregator
+from providers.registry import (
+    available_providers, create_provider, create_stream, register_provider, register_stream
+)
+from providers.streaming import CoinbaseTickerStream, StreamingProvider
+from providers import timing
 
-__all__ = ['BaseProvider', 'CoindeskProvider']
+__all__ = [
+    'BaseProvider',
+    'Candle',
+    'CoinbaseProvider',
+    'CoindeskProvider',
+    'CoinGeckoProvider',
+    'PriceAggregator',
+    'StreamingProvider',
+    'CoinbaseTickerStream',
+    'available_providers',
+    'create_provider',
+    'create_stream',
+    'register_provider',
+    'register_stream',
+    'timing',
+]
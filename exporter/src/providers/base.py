@@ -1,29 +1,298 @@
 """Base class for data providers."""
+import asyncio
+import logging
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+import requests
+from providers.breaker import BreakerRegistry, CircuitOpenError
+from providers.cache import ResponseCache
+from providers.codec import loads
+from providers.registry import price_extractors
+from providers.retry import RetryPolicy
+from providers.session import build_session
+from providers.singleflight import SingleFlight
+from providers.timing import timed_send
+
+
+logger = logging.getLogger(__name__)
+
+
+class Candle(NamedTuple):
+    """One OHLC bucket; timestamp is the bucket start, unix seconds."""
+    timestamp: float
+    open: float
+    high: float
+    low: float
+    close: float
 
 
 class BaseProvider(ABC):
     """Abstract base class for data providers."""
     
+    # Registry name, also used as the metric `source` label
+    name = 'base'
+    default_endpoint: Optional[str] = None
+    # Most candles one fetch_candles() call may return, and the candle
+    # sizes (seconds) it accepts; empty means any
+    max_candles = 300
+    history_granularities: Tuple[int, ...] = ()
+    
+    # Shared by every provider so identical requests from different
+    # collectors or threads ride on one upstream call
+    _flights = SingleFlight()
+    
     def __init__(self, config: Dict[str, Any]):
         """Initialize provider with configuration."""
         self.config = config
-        self.endpoint = config.get('endpoint')
+        self.endpoint = config.get('endpoint') or self.default_endpoint
         self.timeout = config.get('timeout', 30)
         self.retry_config = config.get('retry', {})
+        self.retry_policy = RetryPolicy.from_config(self.retry_config)
+        self.breakers = BreakerRegistry(config.get('circuit_breaker', {}))
+        self.batch_size = config.get('batch_size', 250)
+        self.session = build_session(config.get('pool', {}))
+        self.cache = ResponseCache.from_config(config.get('cache', {}))
+        self.endpoint_label = self._endpoint_label(self.endpoint) if self.endpoint else ''
+        # Response format of this provider's endpoint, detected on first use
+        self._extract: Optional[Callable[[Any], Optional[float]]] = None
     
-    @abstractmethod
-    def fetch_data(self) -> Optional[Dict[str, Any]]:
+    def reconfigure(self, config: Dict[str, Any]) -> bool:
+        """Apply reloaded settings in place, keeping pooled connections.
+        
+        Only the parts whose config changed are rebuilt; the session is
+        replaced only when `pool` changed. Returns False when the
+        endpoint changed and the provider must be recreated instead.
+        """
+        if (config.get('endpoint') or self.default_endpoint) != self.endpoint:
+            return False
+        old, self.config = self.config, config
+        self.timeout = config.get('timeout', 30)
+        self.batch_size = config.get('batch_size', 250)
+        
+        if config.get('retry', {}) != old.get('retry', {}):
+            self.retry_config = config.get('retry', {})
+            self.retry_policy = RetryPolicy.from_config(self.retry_config)
+        if config.get('circuit_breaker', {}) != old.get('circuit_breaker', {}):
+            self.breakers = BreakerRegistry(config.get('circuit_breaker', {}))
+        if config.get('cache', {}) != old.get('cache', {}):
+            self.cache = ResponseCache.from_config(config.get('cache', {}))
+        if config.get('pool', {}) != old.get('pool', {}):
+            session, self.session = self.session, build_session(config.get('pool', {}))
+            session.close()
+        return True
+    
+    def fetch_data(self, params: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
         """Fetch data from provider."""
-        pass
+        try:
+            return self._get_json(self._request_url(params), params)
+        except CircuitOpenError as e:
+            logger.warning(f"Skipping fetch: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Failed to fetch data: {e}")
+            return None
+    
+    async def fetch_data_async(self, params: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
+        """Fetch data without blocking the event loop."""
+        return await asyncio.to_thread(self.fetch_data, params)
+    
+    def supports_batching(self) -> bool:
+        """Whether one upstream call can price many asset/currency pairs."""
+        return False
+    
+    def build_batches(self, assets: List[str]) -> List[List[str]]:
+        """Split assets into as few upstream-sized batches as possible."""
+        size = max(1, self.batch_size if self.supports_batching() else 1)
+        return [assets[i:i + size] for i in range(0, len(assets), size)]
+    
+    def fetch_batch(self, assets: List[str], currencies: List[str]) -> Optional[Dict[str, Any]]:
+        """Fetch prices for every asset/currency pair in one upstream call."""
+        raise NotImplementedError(f"{type(self).__name__} does not support batched fetches")
+    
+    async def fetch_batch_async(self, assets: List[str], currencies: List[str]) -> Optional[Dict[str, Any]]:
+        """Fetch a batch without blocking the event loop."""
+        return await asyncio.to_thread(self.fetch_batch, assets, currencies)
+    
+    def parse_batch(self, response: Any, assets: List[str],
+                    currencies: List[str]) -> Dict[Tuple[str, str], float]:
+        """Parse a batched response into {(asset, currency): price}."""
+        raise NotImplementedError(f"{type(self).__name__} does not support batched fetches")
+    
+    def asset_id(self, symbol: str) -> str:
+        """Id this provider's `assets` use for a ticker symbol (e.g. ETH)."""
+        return symbol.lower()
     
+    def supports_history(self) -> bool:
+        """Whether historical OHLC candles can be fetched (for backfill)."""
+        return False
+    
+    def fetch_candles(self, product: str, start: float, end: float, granularity: int) -> List[Candle]:
+        """Fetch candles for a product (e.g. BTC-USD) in [start, end), oldest first.
+        
+        At most max_candles per call; raises on upstream failure.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support historical candles")
+    
+    @staticmethod
     @abstractmethod
+    def extract_price(response: Any) -> Optional[float]:
+        """Pull the BTC/USD price out of this provider's response shape.
+        
+        Runs on every response, so it must be cheap and must not log;
+        return None when the response is not in this shape.
+        """
+        pass
+    
     def parse_response(self, response: Any) -> Dict[str, float]:
         """Parse provider response into metrics."""
-        pass
+        if not response:
+            return {}
+        
+        try:
+            price = self._extract(response) if self._extract else None
+        except (AttributeError, KeyError, TypeError, ValueError):
+            price = None
+        if price is None:
+            # First response, or the endpoint changed shape: detect again
+            price = self._detect_format(response)
+            if price is None:
+                return {'last_updated': time.time()}
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Parsed %s response: $%s", self.name, price)
+        return {'bitcoin_price': price, 'last_updated': time.time()}
+    
+    def _detect_format(self, response: Any) -> Optional[float]:
+        """Find the parser matching this endpoint's responses and bind it.
+        
+        This provider's own format is tried first; the others cover
+        mirrors or proxies that serve another API's shape.
+        """
+        candidates = [(self.name, self.extract_price)]
+        candidates += [(name, fn) for name, fn in price_extractors() if name != self.name]
+        for name, extract in candidates:
+            try:
+                price = extract(response)
+            except (AttributeError, KeyError, TypeError, ValueError):
+                continue
+            if price is not None:
+                if name != self.name:
+                    logger.warning(f"Endpoint {self.endpoint} returns {name} responses, parsing them as such")
+                self._extract = extract
+                return price
+        
+        keys = list(response.keys()) if isinstance(response, dict) else type(response).__name__
+        logger.warning(f"Unknown response format: {keys}")
+        self._extract = None
+        return None
     
-    @abstractmethod
     def validate_config(self) -> bool:
         """Validate provider configuration."""
-        pass
+        if not self.endpoint:
+            logger.error("No endpoint configured")
+            return False
+        return True
+    
+    def _request_url(self, params: Optional[Dict[str, str]]) -> str:
+        """Get request URL; explicit params replace the endpoint's query string."""
+        if params is None:
+            return self.endpoint
+        return self.endpoint.split('?', 1)[0]
+    
+    def _fetch_response(self, url: str, params: Optional[Dict[str, str]] = None) -> requests.Response:
+        """GET a URL over the pooled session under the retry policy.
+        
+        The endpoint's circuit breaker wraps the whole retry ladder, so an
+        open circuit fails fast with CircuitOpenError.
+        """
+        endpoint = self._endpoint_label(url)
+        
+        def send(timeout):
+            return timed_send(
+                self.name, endpoint,
+                lambda: self.session.get(url, params=params, timeout=timeout)
+            )
+        
+        def attempt():
+            return self.retry_policy.call(send, timeout=self.timeout, endpoint=endpoint)
+        
+        breaker = self.breakers.get(endpoint)
+        if breaker is None:
+            return attempt()
+        return breaker.call(attempt)
+    
+    def _fetch_shared(self, url: str, params: Optional[Dict[str, str]] = None) -> requests.Response:
+        """Fetch a URL, joining an identical request already in flight."""
+        return self._flights.do(
+            ResponseCache.key(url, params),
+            lambda: self._fetch_response(url, params),
+            endpoint=self._endpoint_label(url)
+        )
+    
+    def _get_json(self, url: str, params: Optional[Dict[str, str]] = None) -> Any:
+        """GET a JSON document, served from the response cache when possible.
+        
+        Fresh entries skip the network; stale ones are returned while a
+        background refresh runs; on upstream failure (including 429) the
+        last good value is served for up to stale_if_error seconds.
+        """
+        if self.cache is None:
+            return loads(self._fetch_shared(url, params).content)
+        
+        key = self.cache.key(url, params)
+        endpoint = self._endpoint_label(url)
+        entry, state = self.cache.lookup(key)
+        
+        if state == ResponseCache.FRESH:
+            self.cache.record_staleness(endpoint, entry)
+            return entry.value
+        
+        if state == ResponseCache.STALE:
+            if self.cache.begin_refresh(key):
+                threading.Thread(
+                    target=self._refresh, args=(key, url, params), daemon=True
+                ).start()
+            self.cache.record_staleness(endpoint, entry)
+            return entry.value
+        
+        try:
+            response = self._fetch_shared(url, params)
+            value = loads(response.content)
+        except Exception as e:
+            if entry is not None and self.cache.usable_on_error(entry):
+                logger.warning(f"Upstream failed, serving cached response for {endpoint}: {e}")
+                self.cache.record_staleness(endpoint, entry)
+                return entry.value
+            raise
+        
+        self.cache.store(key, value, response.headers)
+        self.cache.record_staleness(endpoint, None)
+        return value
+    
+    def _refresh(self, key, url: str, params: Optional[Dict[str, str]]):
+        """Revalidate a stale cache entry in the background."""
+        try:
+            response = self._fetch_shared(url, params)
+            self.cache.store(key, loads(response.content), response.headers)
+        except Exception as e:
+            logger.warning(f"Background refresh failed for {self._endpoint_label(url)}: {e}")
+        finally:
+            self.cache.end_refresh(key)
+    
+    @staticmethod
+    def _endpoint_label(url: str) -> str:
+        """Low-cardinality endpoint label (host and path, no query)."""
+        parts = urlsplit(url)
+        return f"{parts.netloc}{parts.path}"
+    
+    def pool_stats(self) -> Dict[str, int]:
+        """Get connection pool hit/miss counts for this provider."""
+        adapter = self.session.get_adapter('https://')
+        return dict(getattr(adapter, 'stats', {}))
+    
+    def close(self):
+        """Release pooled connections."""
+        self.session.close()
@@ -0,0 +1,156 @@
+"""Circuit breakers for upstream endpoints."""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+import requests
+from prometheus_client import Counter, Gauge
+
+
+logger = logging.getLogger(__name__)
+
+
+BREAKER_STATE = Gauge(
+    'bitcoin_exporter_circuit_breaker_state',
+    'Circuit breaker state per endpoint (0=closed, 1=open, 2=half-open)',
+    labelnames=['endpoint']
+)
+
+BREAKER_REJECTIONS = Counter(
+    'bitcoin_exporter_circuit_breaker_rejections_total',
+    'Calls failed fast because the endpoint circuit was open',
+    labelnames=['endpoint']
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open."""
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """Whether an error says the endpoint is unhealthy: connection errors, timeouts, 5xx and 429."""
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return False
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one endpoint.
+    
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls fail fast for `cooldown` seconds. It then goes half-open and
+    lets up to `half_open_max_calls` trial calls through: a success
+    closes it, a failure opens it for another cooldown. Only errors
+    is_upstream_failure() accepts count as failures; any other error,
+    such as a 404, means the endpoint answered and counts as a success.
+    """
+    
+    CLOSED = 0
+    OPEN = 1
+    HALF_OPEN = 2
+    
+    def __init__(self, endpoint: str, failure_threshold: int = 5, cooldown: float = 60,
+                 half_open_max_calls: int = 1, clock: Callable[[], float] = time.monotonic):
+        """Initialize a closed breaker."""
+        self.endpoint = endpoint
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self.clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_calls = 0
+        self._lock = threading.Lock()
+        BREAKER_STATE.labels(endpoint=endpoint).set(self.CLOSED)
+    
+    @property
+    def state(self) -> int:
+        """Current state, moving open to half-open once the cooldown ends."""
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+    
+    def _set_state(self, state: int):
+        if state != self._state:
+            names = {self.CLOSED: 'closed', self.OPEN: 'open', self.HALF_OPEN: 'half-open'}
+            logger.warning(f"Circuit for {self.endpoint} is now {names[state]}")
+        self._state = state
+        BREAKER_STATE.labels(endpoint=self.endpoint).set(state)
+    
+    def _maybe_half_open(self):
+        if self._state == self.OPEN and self.clock() - self._opened_at >= self.cooldown:
+            self._trial_calls = 0
+            self._set_state(self.HALF_OPEN)
+    
+    def allow(self) -> bool:
+        """Whether a call may go through now."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._trial_calls < self.half_open_max_calls:
+                self._trial_calls += 1
+                return True
+            return False
+    
+    def record_success(self):
+        """Close the circuit after a successful call."""
+        with self._lock:
+            self._failures = 0
+            self._set_state(self.CLOSED)
+    
+    def record_failure(self):
+        """Count a failure, opening the circuit at the threshold."""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = self.clock()
+                self._set_state(self.OPEN)
+    
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """Run fn through the breaker; raises CircuitOpenError if open."""
+        if not self.allow():
+            BREAKER_REJECTIONS.labels(endpoint=self.endpoint).inc()
+            raise CircuitOpenError(f"Circuit open for {self.endpoint}")
+        try:
+            result = fn()
+        except Exception as e:
+            if is_upstream_failure(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        self.record_success()
+        return result
+
+
+class BreakerRegistry:
+    """Lazily created breakers, one per endpoint."""
+    
+    def __init__(self, config: Dict[str, Any]):
+        """Initialize registry from the `api.circuit_breaker` section."""
+        self.enabled = config.get('enabled', True)
+        self.failure_threshold = config.get('failure_threshold', 5)
+        self.cooldown = config.get('cooldown', 60)
+        self.half_open_max_calls = config.get('half_open_max_calls', 1)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, endpoint: str) -> Optional[CircuitBreaker]:
+        """Get the breaker for an endpoint, or None if breakers are disabled."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = self._breakers[endpoint] = CircuitBreaker(
+                    endpoint,
+                    failure_threshold=self.failure_threshold,
+                    cooldown=self.cooldown,
+                    half_open_max_calls=self.half_open_max_calls
+                )
+            return breaker
@@ -0,0 +1,165 @@
+"""Provider-side response cache with TTL and stale-while-revalidate."""
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Tuple
+from prometheus_client import Gauge
+
+
+logger = logging.getLogger(__name__)
+
+
+CACHE_STALENESS = Gauge(
+    'bitcoin_exporter_provider_cache_staleness_seconds',
+    'How far past its TTL the last value served from the provider cache was',
+    labelnames=['endpoint']
+)
+
+_MAX_AGE = re.compile(r'max-age=(\d+)')
+
+CacheKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class CacheEntry(NamedTuple):
+    """A cached upstream response body."""
+    value: Any
+    stored_at: float
+    ttl: float
+    
+    def age(self, now: float) -> float:
+        return now - self.stored_at
+    
+    def staleness(self, now: float) -> float:
+        return max(0.0, self.age(now) - self.ttl)
+
+
+class ResponseCache:
+    """LRU cache of parsed upstream responses keyed by endpoint and params.
+    
+    Entries are fresh for their TTL, which comes from the upstream's
+    Cache-Control max-age (less Age) when present and from `ttl`
+    otherwise. For `stale_while_revalidate` seconds past the TTL an entry
+    is served while a refresh runs in the background, and for
+    `stale_if_error` seconds it is served when the upstream fails.
+    
+    No entry is reused, fresh or stale, once it is `max_age` seconds old,
+    whatever its TTL: collectors set it below their collection interval
+    so a cycle never publishes the previous cycle's response as current.
+    Entries stored with Cache-Control: no-cache are never served stale.
+    """
+    
+    FRESH = 'fresh'
+    STALE = 'stale'
+    EXPIRED = 'expired'
+    
+    def __init__(self, ttl: float = 30, max_entries: int = 256,
+                 stale_while_revalidate: float = 60, stale_if_error: float = 600,
+                 honor_headers: bool = True, max_age: Optional[float] = None, clock=time.monotonic):
+        """Initialize cache with freshness settings."""
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stale_if_error = stale_if_error
+        self.honor_headers = honor_headers
+        self.max_age = max_age
+        self.clock = clock
+        self._entries: 'OrderedDict[CacheKey, CacheEntry]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional['ResponseCache']:
+        """Build a cache from the `api.cache` section, or None if disabled."""
+        if not config.get('enabled', True):
+            return None
+        return cls(
+            ttl=config.get('ttl', 30),
+            max_entries=config.get('max_entries', 256),
+            stale_while_revalidate=config.get('stale_while_revalidate', 60),
+            stale_if_error=config.get('stale_if_error', 600),
+            honor_headers=config.get('honor_headers', True),
+            max_age=config.get('max_age')
+        )
+    
+    @staticmethod
+    def key(url: str, params: Optional[Mapping[str, str]]) -> CacheKey:
+        """Build a cache key from the endpoint and request params."""
+        return url, tuple(sorted((params or {}).items()))
+    
+    def lookup(self, key: CacheKey) -> Tuple[Optional[CacheEntry], Optional[str]]:
+        """Find an entry and classify it as fresh, stale or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, None
+            self._entries.move_to_end(key)
+        
+        now = self.clock()
+        if self.max_age is not None and entry.age(now) > self.max_age:
+            return entry, self.EXPIRED
+        staleness = entry.staleness(now)
+        if staleness == 0:
+            return entry, self.FRESH
+        if staleness <= self.stale_while_revalidate and entry.ttl > 0:
+            return entry, self.STALE
+        return entry, self.EXPIRED
+    
+    def usable_on_error(self, entry: CacheEntry) -> bool:
+        """Whether an entry may stand in for a failed upstream call."""
+        return entry.staleness(self.clock()) <= self.stale_if_error
+    
+    def store(self, key: CacheKey, value: Any, headers: Optional[Mapping[str, str]] = None):
+        """Store a response, honoring upstream Cache-Control/Age headers."""
+        ttl = self._ttl_from_headers(headers) if self.honor_headers and headers else None
+        if ttl is None:
+            ttl = self.ttl
+        elif ttl < 0:
+            # Cache-Control: no-store
+            return
+        
+        with self._lock:
+            self._entries[key] = CacheEntry(value, self.clock(), ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    @staticmethod
+    def _ttl_from_headers(headers: Mapping[str, str]) -> Optional[float]:
+        """Remaining freshness from Cache-Control/Age; -1 means do not store."""
+        cache_control = headers.get('Cache-Control', '').lower()
+        if 'no-store' in cache_control:
+            return -1
+        if 'no-cache' in cache_control:
+            return 0.0
+        
+        match = _MAX_AGE.search(cache_control)
+        if not match:
+            return None
+        try:
+            age = float(headers.get('Age', 0))
+        except ValueError:
+            age = 0.0
+        return max(0.0, int(match.group(1)) - age)
+    
+    def begin_refresh(self, key: CacheKey) -> bool:
+        """Claim the background refresh for a key; False if one is running."""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+    
+    def end_refresh(self, key: CacheKey):
+        """Release a background refresh claim."""
+        with self._lock:
+            self._refreshing.discard(key)
+    
+    def record_staleness(self, endpoint: str, entry: Optional[CacheEntry]):
+        """Export how stale the value just served was."""
+        staleness = entry.staleness(self.clock()) if entry else 0.0
+        CACHE_STALENESS.labels(endpoint=endpoint).set(staleness)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
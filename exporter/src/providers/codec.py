@@ -0,0 +1,19 @@
+"""JSON decoding for provider responses."""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+
+# Name of the decoder in use, for logs and benchmarks
+DECODER = 'orjson' if orjson else 'json'
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode a JSON document with the fastest available decoder."""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,49 @@
+"""Coinbase API provider implementation."""
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+from providers.base import BaseProvider, Candle
+from providers.codec import loads
+from providers.registry import register_provider
+
+
+logger = logging.getLogger(__name__)
+
+
+@register_provider
+class CoinbaseProvider(BaseProvider):
+    """Provider for the Coinbase spot price API."""
+    
+    name = 'coinbase'
+    # Better rate limits, no auth required
+    default_endpoint = "https://api.coinbase.com/v2/prices/BTC-USD/spot"
+    # Exchange candles API; returns at most 300 buckets per request
+    history_endpoint = "https://api.exchange.coinbase.com/products/{product}/candles"
+    max_candles = 300
+    history_granularities = (60, 300, 900, 3600, 21600, 86400)
+    
+    def supports_history(self) -> bool:
+        """Candles come from the public Exchange API."""
+        return True
+    
+    def fetch_candles(self, product: str, start: float, end: float, granularity: int) -> List[Candle]:
+        """Fetch `[time, low, high, open, close, volume]` rows from the candles API."""
+        url = self.config.get('history_endpoint') or self.history_endpoint
+        response = self._fetch_response(url.format(product=product), params={
+            'granularity': str(granularity),
+            'start': datetime.fromtimestamp(start, timezone.utc).isoformat(),
+            'end': datetime.fromtimestamp(end, timezone.utc).isoformat(),
+        })
+        candles = [
+            Candle(float(t), float(o), float(h), float(l), float(c))
+            for t, l, h, o, c, *_ in loads(response.content)
+            if start <= t < end
+        ]
+        candles.sort()
+        return candles
+    
+    @staticmethod
+    def extract_price(response: Dict[str, Any]) -> Optional[float]:
+        """Parse Coinbase `{"data": {"amount": "..."}}` response."""
+        amount = response.get('data', {}).get('amount')
+        return float(amount) if amount is not None else None
@@ -0,0 +1,77 @@
+"""CoinGecko API provider implementation."""
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+from providers.base import BaseProvider
+from providers.registry import register_provider
+
+
+logger = logging.getLogger(__name__)
+
+
+@register_provider
+class CoinGeckoProvider(BaseProvider):
+    """Provider for the CoinGecko simple/price API."""
+    
+    name = 'coingecko'
+    default_endpoint = "https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd"
+    
+    # CoinGecko ids of common ticker symbols; `api.asset_ids` adds or overrides
+    ASSET_IDS = {
+        'btc': 'bitcoin',
+        'eth': 'ethereum',
+        'sol': 'solana',
+        'ada': 'cardano',
+        'xrp': 'ripple',
+        'doge': 'dogecoin',
+        'ltc': 'litecoin',
+        'dot': 'polkadot',
+        'avax': 'avalanche-2',
+        'link': 'chainlink',
+        'usdt': 'tether',
+        'usdc': 'usd-coin',
+    }
+    
+    def asset_id(self, symbol: str) -> str:
+        """CoinGecko id (e.g. ethereum) for a ticker symbol (e.g. ETH)."""
+        symbol = symbol.lower()
+        overrides = {k.lower(): v for k, v in self.config.get('asset_ids', {}).items()}
+        return overrides.get(symbol) or self.ASSET_IDS.get(symbol, symbol)
+    
+    def supports_batching(self) -> bool:
+        """simple/price prices many ids in many currencies per call."""
+        return 'simple/price' in self.endpoint
+    
+    def fetch_batch(self, assets: List[str], currencies: List[str]) -> Optional[Dict[str, Any]]:
+        """Fetch many assets in all quote currencies with one simple/price call."""
+        if not self.supports_batching():
+            return super().fetch_batch(assets, currencies)
+        return self.fetch_data(params={
+            'ids': ','.join(assets),
+            'vs_currencies': ','.join(currencies)
+        })
+    
+    def parse_batch(self, response: Dict[str, Any], assets: List[str],
+                    currencies: List[str]) -> Dict[Tuple[str, str], float]:
+        """Parse a CoinGecko simple/price response into per-pair prices."""
+        prices = {}
+        if not response:
+            return prices
+        
+        for asset in assets:
+            quotes = response.get(asset)
+            if not isinstance(quotes, dict):
+                logger.warning(f"No prices returned for asset: {asset}")
+                continue
+            for currency in currencies:
+                try:
+                    prices[(asset, currency)] = float(quotes[currency])
+                except (KeyError, ValueError, TypeError):
+                    logger.warning(f"No {currency} price returned for asset: {asset}")
+        
+        return prices
+    
+    @staticmethod
+    def extract_price(response: Dict[str, Any]) -> Optional[float]:
+        """Parse CoinGecko `{"bitcoin": {"usd": ...}}` response."""
+        price = response.get('bitcoin', {}).get('usd')
+        return float(price) if price is not None else None
@@ -0,0 +1,185 @@
+"""Multi-provider fan-out with hedged requests and consensus pricing."""
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError, as_completed, wait
+from typing import Any, Deque, Dict, List, Optional
+from prometheus_client import Counter, Gauge
+from providers.base import BaseProvider
+from providers.registry import create_provider
+
+
+logger = logging.getLogger(__name__)
+
+
+HEDGED_REQUESTS = Counter(
+    'bitcoin_exporter_hedged_requests_total',
+    'Backup provider requests sent because the previous one was slower than the hedge threshold'
+)
+
+CONSENSUS_SPREAD = Gauge(
+    'bitcoin_exporter_consensus_spread_ratio',
+    'Spread between the highest and lowest quorum price, relative to the median'
+)
+
+
+class PriceAggregator:
+    """Query several providers concurrently and produce one price.
+    
+    Strategies:
+    - hedged: ask providers in order, sending the next request only when
+      the previous one has not answered within its latency percentile
+      (or has failed); the first price back wins.
+    - median: ask every provider at once and return the median as soon
+      as `quorum` of them have answered.
+    """
+    
+    STRATEGIES = ('hedged', 'median')
+    
+    def __init__(self, providers: List[BaseProvider], strategy: str = 'median',
+                 quorum: Optional[int] = None, hedge_percentile: float = 95,
+                 hedge_min_delay: float = 0.1, timeout: float = 30, latency_window: int = 100):
+        """Initialize aggregator over already-built providers."""
+        if not providers:
+            raise ValueError("PriceAggregator needs at least one provider")
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown fan-out strategy: {strategy}")
+        
+        self.providers = providers
+        self.strategy = strategy
+        self.quorum = min(quorum or len(providers) // 2 + 1, len(providers))
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.timeout = timeout
+        self._latencies: Dict[str, Deque[float]] = {
+            p.name: deque(maxlen=latency_window) for p in providers
+        }
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(providers) * 2, thread_name_prefix='fanout'
+        )
+    
+    @classmethod
+    def from_config(cls, api_config: Dict[str, Any]) -> 'PriceAggregator':
+        """Build providers named in `api.providers` and wrap them."""
+        endpoints = api_config.get('endpoints', {})
+        providers = []
+        for name in api_config['providers']:
+            provider_config = dict(api_config, endpoint=endpoints.get(name))
+            providers.append(create_provider(name, provider_config))
+        
+        return cls(
+            providers,
+            strategy=api_config.get('strategy', 'median'),
+            quorum=api_config.get('quorum'),
+            hedge_percentile=api_config.get('hedge_percentile', 95),
+            hedge_min_delay=api_config.get('hedge_min_delay', 0.1),
+            timeout=api_config.get('timeout', 30)
+        )
+    
+    def _query(self, provider: BaseProvider) -> Optional[float]:
+        """Fetch and parse one provider's price, recording its latency."""
+        start = time.perf_counter()
+        raw_data = provider.fetch_data()
+        metrics = provider.parse_response(raw_data) if raw_data else {}
+        price = metrics.get('bitcoin_price')
+        if price is not None:
+            with self._lock:
+                self._latencies[provider.name].append(time.perf_counter() - start)
+        return price
+    
+    def hedge_delay(self, provider: BaseProvider) -> float:
+        """How long to wait on a provider before hedging to the next one."""
+        with self._lock:
+            samples = sorted(self._latencies[provider.name])
+        if not samples:
+            return max(self.hedge_min_delay, self.timeout / 2)
+        index = min(len(samples) - 1, int(len(samples) * self.hedge_percentile / 100))
+        return max(self.hedge_min_delay, samples[index])
+    
+    def fetch_price(self) -> Dict[str, float]:
+        """Get one price using the configured strategy; {} on failure."""
+        if self.strategy == 'hedged':
+            price = self._fetch_hedged()
+        else:
+            price = self._fetch_median()
+        
+        if price is None:
+            return {}
+        return {
+            'bitcoin_price': price,
+            'last_updated': time.time()
+        }
+    
+    def _fetch_hedged(self) -> Optional[float]:
+        """First successful answer, hedging slow providers."""
+        deadline = time.monotonic() + self.timeout
+        queue = list(self.providers)
+        pending = {}
+        last = None
+        
+        def launch():
+            nonlocal last
+            last = queue.pop(0)
+            pending[self._executor.submit(self._query, last)] = last
+        
+        launch()
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            wait_time = min(self.hedge_delay(last), remaining) if queue else remaining
+            done, _ = wait(pending, timeout=wait_time, return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                provider = pending.pop(future)
+                price = future.result()
+                if price is not None:
+                    logger.debug("Hedged fetch answered by %s", provider.name)
+                    return price
+                # Failed outright: move on without waiting for the threshold
+                if queue:
+                    launch()
+            
+            if not done and queue:
+                HEDGED_REQUESTS.inc()
+                launch()
+        
+        logger.error("No provider returned a price before the timeout")
+        return None
+    
+    def _fetch_median(self) -> Optional[float]:
+        """Median of the first `quorum` successful answers."""
+        futures = {self._executor.submit(self._query, p): p for p in self.providers}
+        prices: Dict[str, float] = {}
+        try:
+            for future in as_completed(futures, timeout=self.timeout):
+                price = future.result()
+                if price is not None:
+                    prices[futures[future].name] = price
+                    if len(prices) >= self.quorum:
+                        break
+        except TimeoutError:
+            pass
+        
+        if len(prices) < self.quorum:
+            logger.error(f"Only {len(prices)} of {self.quorum} required providers answered")
+            return None
+        
+        median = statistics.median(prices.values())
+        if median:
+            CONSENSUS_SPREAD.set((max(prices.values()) - min(prices.values())) / median)
+        logger.debug("Consensus from %s: %s", sorted(prices), median)
+        return median
+    
+    def validate(self) -> bool:
+        """Validate every wrapped provider."""
+        return all(p.validate_config() for p in self.providers)
+    
+    def close(self):
+        """Stop worker threads and release provider connections."""
+        self._executor.shutdown(wait=False)
+        for provider in self.providers:
+            provider.close()
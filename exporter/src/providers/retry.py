@@ -0,0 +1,185 @@
+"""Retry policy shared by all providers."""
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+import requests
+from prometheus_client import Counter
+
+
+logger = logging.getLogger(__name__)
+
+
+RETRIES = Counter(
+    'bitcoin_exporter_provider_retries_total',
+    'Upstream request retries',
+    labelnames=['endpoint', 'reason']
+)
+
+RETRIES_DENIED = Counter(
+    'bitcoin_exporter_provider_retries_denied_total',
+    'Retries abandoned because of the retry budget or the per-call deadline',
+    labelnames=['endpoint', 'reason']
+)
+
+
+class RetryBudget:
+    """Token bucket capping retries to a fraction of requests.
+    
+    Every request deposits `ratio` tokens and every retry spends one, so
+    over time retries cannot exceed ratio * requests. `min_tokens` lets a
+    low-traffic exporter still retry occasionally.
+    """
+    
+    def __init__(self, ratio: float = 0.2, min_tokens: float = 10):
+        """Initialize a full bucket."""
+        self.ratio = ratio
+        self.max_tokens = min_tokens
+        self._tokens = min_tokens
+        self._lock = threading.Lock()
+    
+    def record_request(self):
+        """Deposit tokens for a new request."""
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+    
+    def try_spend(self) -> bool:
+        """Take a token for a retry; False if the budget is exhausted."""
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+# One budget for every provider so a broad outage cannot multiply load
+GLOBAL_BUDGET = RetryBudget()
+
+
+def configure_budget(config: Dict[str, Any]):
+    """Size the shared budget from the top-level `api.retry` section.
+    
+    Called once per loaded config by the collector that owns it, not per
+    provider, so providers built from other sections cannot resize it.
+    """
+    GLOBAL_BUDGET.ratio = config.get('budget_ratio', 0.2)
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, a deadline and a retry budget.
+    
+    Attempt N (0-based) sleeps a random time in [0, min(max_delay,
+    base_delay * backoff ** N)]; a Retry-After header on 429/503 replaces
+    that delay, still capped at max_delay. Retries stop at max_attempts,
+    when the next attempt would start after the per-call deadline (so no
+    sleep outlasts it), or when the budget is exhausted. Backoff sleeps happen on the fetching worker thread, never
+    on the event loop or an HTTP serving thread.
+    """
+    
+    def __init__(self, max_attempts: int = 3, backoff: float = 2, base_delay: float = 1,
+                 max_delay: float = 30, deadline: Optional[float] = None,
+                 retry_on: Iterable[int] = (429, 500, 502, 503, 504),
+                 budget: RetryBudget = GLOBAL_BUDGET,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        """Initialize retry policy."""
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.retry_on = frozenset(retry_on)
+        self.budget = budget
+        self.clock = clock
+        self.sleep = sleep
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'RetryPolicy':
+        """Build a policy from an `api.retry` section; budget_ratio is applied by configure_budget()."""
+        return cls(
+            max_attempts=config.get('max_attempts', 3),
+            backoff=config.get('backoff', 2),
+            base_delay=config.get('base_delay', 1),
+            max_delay=config.get('max_delay', 30),
+            deadline=config.get('deadline'),
+            retry_on=config.get('retry_on', (429, 500, 502, 503, 504))
+        )
+    
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter delay before retry number `attempt` (0-based)."""
+        ceiling = min(self.max_delay, self.base_delay * self.backoff ** attempt)
+        return random.uniform(0, ceiling)
+    
+    @staticmethod
+    def retry_after(response: Optional[requests.Response]) -> Optional[float]:
+        """Seconds requested by a Retry-After header, if any."""
+        if response is None or response.status_code not in (429, 503):
+            return None
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+            return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+    
+    def call(self, send: Callable[[float], requests.Response], timeout: float,
+             endpoint: str = '') -> requests.Response:
+        """Call send(timeout) until it succeeds or the policy gives up.
+        
+        Raises the last error (HTTPError for a bad status) on give-up.
+        """
+        start = self.clock()
+        self.budget.record_request()
+        attempt = 0
+        
+        while True:
+            attempt_timeout = timeout
+            if self.deadline is not None:
+                attempt_timeout = max(0.001, min(timeout, start + self.deadline - self.clock()))
+            
+            response = None
+            try:
+                response = send(attempt_timeout)
+                if response.status_code not in self.retry_on:
+                    response.raise_for_status()
+                    return response
+                reason = str(response.status_code)
+                error: Exception = requests.exceptions.HTTPError(
+                    f"{response.status_code} Error for url: {response.url}", response=response
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                reason = type(e).__name__.lower()
+                error = e
+            
+            attempt += 1
+            if attempt >= self.max_attempts:
+                raise error
+            
+            delay = self.retry_after(response)
+            if delay is None:
+                delay = self.backoff_delay(attempt - 1)
+            elif delay > self.max_delay:
+                # A server asking for longer than we would ever wait gets one capped retry
+                delay = self.max_delay
+            
+            if self.deadline is not None and self.clock() + delay - start >= self.deadline:
+                RETRIES_DENIED.labels(endpoint=endpoint, reason='deadline').inc()
+                logger.warning(f"Giving up on {endpoint}: retry would pass the {self.deadline}s deadline")
+                raise error
+            if not self.budget.try_spend():
+                RETRIES_DENIED.labels(endpoint=endpoint, reason='budget').inc()
+                logger.warning(f"Giving up on {endpoint}: retry budget exhausted")
+                raise error
+            
+            RETRIES.labels(endpoint=endpoint, reason=reason).inc()
+            logger.warning(f"Attempt {attempt} failed: {error}; retrying in {delay:.2f}s")
+            self.sleep(delay)
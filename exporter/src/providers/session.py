@@ -0,0 +1,161 @@
+"""Pooled keep-alive HTTP sessions for data providers."""
+import logging
+import socket
+import threading
+import time
+from typing import Dict, Any, List
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from prometheus_client import Counter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.util.connection import allowed_gai_family
+from providers.timing import record_connection
+
+
+logger = logging.getLogger(__name__)
+
+
+POOL_HITS = Counter(
+    'bitcoin_exporter_http_pool_hits_total',
+    'HTTP requests sent over a reused pooled connection',
+    labelnames=['host']
+)
+
+POOL_MISSES = Counter(
+    'bitcoin_exporter_http_pool_misses_total',
+    'HTTP requests that had to open a new connection',
+    labelnames=['host']
+)
+
+
+# Set by a connection opened on this thread; read back by PooledAdapter.send
+_opened = threading.local()
+
+
+class TimedHTTPConnection(HTTPConnection):
+    """Connection that reports DNS lookup and TCP connect time separately."""
+    
+    def _resolve(self) -> List[str]:
+        """Addresses for the host, in resolver order; [] if the lookup fails."""
+        try:
+            infos = socket.getaddrinfo(self._dns_host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except socket.gaierror:
+            return []
+        return list(dict.fromkeys(info[4][0] for info in infos))
+    
+    def _new_conn(self):
+        _opened.value = True
+        start = time.perf_counter()
+        addresses = self._resolve()
+        resolved = time.perf_counter()
+        record_connection('dns', resolved - start)
+        
+        if not addresses:
+            # Let urllib3 look up again and raise its usual NameResolutionError
+            sock = super()._new_conn()
+        else:
+            # Connect to the resolved addresses in turn, as urllib3 would
+            # after its own lookup; `host` follows _dns_host, so restore it
+            host = self._dns_host
+            try:
+                for address in addresses:
+                    self._dns_host = address
+                    try:
+                        sock = super()._new_conn()
+                        break
+                    except ConnectTimeoutError as e:  # includes NewConnectionError
+                        error = e
+                else:
+                    raise error
+            finally:
+                self._dns_host = host
+        
+        self.connect_seconds = time.perf_counter() - start
+        record_connection('connect', time.perf_counter() - resolved)
+        return sock
+
+
+class TimedHTTPSConnection(TimedHTTPConnection, HTTPSConnection):
+    """Connection that also reports TLS handshake time."""
+    
+    def connect(self):
+        start = time.perf_counter()
+        self.connect_seconds = 0.0
+        super().connect()
+        record_connection('tls', time.perf_counter() - start - self.connect_seconds)
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    """HTTP pool opening timed connections."""
+    
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    """HTTPS pool opening timed connections."""
+    
+    ConnectionCls = TimedHTTPSConnection
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTP adapter that counts connection reuse per host."""
+    
+    def __init__(self, pool_connections: int = 4, pool_maxsize: int = 10,
+                 pool_block: bool = False):
+        """Initialize adapter with pool limits."""
+        super().__init__(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block
+        )
+        self.stats = {'hits': 0, 'misses': 0}
+        self._stats_lock = threading.Lock()
+    
+    def init_poolmanager(self, *args, **kwargs):
+        """Create the pool manager with connection-timing pools."""
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool
+        }
+    
+    def send(self, request, **kwargs):
+        """Send request and record whether a pooled connection was reused.
+        
+        Connections open on the calling thread, so a flag set by
+        _new_conn() during this send attributes the miss to this request
+        even when other threads share the pool.
+        """
+        _opened.value = False
+        response = super().send(request, **kwargs)
+        
+        host = urlsplit(request.url).hostname or 'unknown'
+        outcome = 'misses' if _opened.value else 'hits'
+        with self._stats_lock:
+            self.stats[outcome] += 1
+        (POOL_MISSES if outcome == 'misses' else POOL_HITS).labels(host=host).inc()
+        return response
+
+
+def build_session(pool_config: Dict[str, Any]) -> requests.Session:
+    """Build a long-lived session from the `api.pool` config section."""
+    adapter = PooledAdapter(
+        pool_connections=pool_config.get('connections', 4),
+        pool_maxsize=pool_config.get('maxsize', 10),
+        pool_block=pool_config.get('block', False)
+    )
+    
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    
+    if pool_config.get('keepalive', True):
+        session.headers['Connection'] = 'keep-alive'
+    else:
+        session.headers['Connection'] = 'close'
+    
+    logger.debug(f"HTTP session pool configured: {pool_config}")
+    return session
@@ -0,0 +1,72 @@
+"""Single-flight deduplication of identical in-flight requests."""
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+from prometheus_client import Counter, Gauge
+
+
+INFLIGHT_REQUESTS = Gauge(
+    'bitcoin_exporter_provider_inflight_requests',
+    'Upstream requests currently in flight',
+    labelnames=['endpoint']
+)
+
+COALESCED_REQUESTS = Counter(
+    'bitcoin_exporter_provider_coalesced_requests_total',
+    'Requests that waited on an identical in-flight request instead of issuing their own',
+    labelnames=['endpoint']
+)
+
+
+class _Call:
+    """One in-flight call and the callers waiting on it."""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers share it.
+    
+    The first caller for a key (the leader) runs the function; callers
+    arriving while it runs block until it finishes and receive the same
+    result or exception.
+    """
+    
+    def __init__(self):
+        """Initialize an empty call group."""
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+    
+    def do(self, key: Hashable, fn: Callable[[], Any], endpoint: str = '') -> Any:
+        """Run fn for key, or wait for the identical call already running."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        
+        if not leader:
+            COALESCED_REQUESTS.labels(endpoint=endpoint).inc()
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        INFLIGHT_REQUESTS.labels(endpoint=endpoint).inc()
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            INFLIGHT_REQUESTS.labels(endpoint=endpoint).dec()
+            call.done.set()
+    
+    def inflight(self) -> int:
+        """Number of distinct calls currently running."""
+        return len(self._calls)
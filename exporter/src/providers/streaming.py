@@ -0,0 +1,182 @@
+"""Streaming (WebSocket) price providers."""
+import json
+import logging
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from prometheus_client import Counter, Gauge
+from providers.codec import loads
+from providers.registry import register_stream
+from providers.websocket import WebSocketClient
+
+
+logger = logging.getLogger(__name__)
+
+
+STREAM_CONNECTED = Gauge(
+    'bitcoin_exporter_stream_connected',
+    'Whether the streaming price feed is connected (1) or not (0)',
+    labelnames=['stream']
+)
+
+STREAM_MESSAGES = Counter(
+    'bitcoin_exporter_stream_messages_total',
+    'Price messages received from the streaming feed',
+    labelnames=['stream']
+)
+
+STREAM_RECONNECTS = Counter(
+    'bitcoin_exporter_stream_reconnects_total',
+    'Reconnect attempts to the streaming feed',
+    labelnames=['stream']
+)
+
+
+class StreamingProvider(ABC):
+    """Abstract base class for push-based price feeds.
+    
+    A reader thread keeps a WebSocket subscription open, reconnecting with
+    jittered exponential backoff, and conflates incoming ticks into the
+    latest price per product. A publisher thread hands the changed prices
+    to a callback at most once per `publish_interval`.
+    """
+    
+    name = 'stream'
+    default_endpoint: Optional[str] = None
+    
+    def __init__(self, config: Dict[str, Any]):
+        """Initialize stream with the `api.stream` config section."""
+        self.config = config
+        self.endpoint = config.get('endpoint') or self.default_endpoint
+        self.products = config.get('products', ['BTC-USD'])
+        self.publish_interval = config.get('publish_interval', 1.0)
+        self.stale_after = config.get('stale_after', 30)
+        self.backoff_base = config.get('reconnect_backoff', 1.0)
+        self.backoff_max = config.get('reconnect_max_backoff', 60)
+        self._latest: Dict[str, float] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._connected = False
+        self._last_message = 0.0
+        self._client: Optional[WebSocketClient] = None
+        self._threads: List[threading.Thread] = []
+    
+    @abstractmethod
+    def subscribe_message(self) -> Dict[str, Any]:
+        """Message subscribing to the configured products."""
+        pass
+    
+    @abstractmethod
+    def parse_message(self, message: Dict[str, Any]) -> Optional[Tuple[str, float]]:
+        """Extract (product, price) from a feed message, or None to ignore it."""
+        pass
+    
+    def start(self, on_prices: Callable[[Dict[str, float]], None]):
+        """Start reader and publisher threads."""
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._read_loop, name=f"{self.name}-reader", daemon=True),
+            threading.Thread(target=self._publish_loop, args=(on_prices,),
+                             name=f"{self.name}-publisher", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+    
+    def stop(self):
+        """Stop the feed and close the connection."""
+        self._stop.set()
+        client = self._client
+        if client:
+            client.close()
+    
+    def is_healthy(self) -> bool:
+        """Connected and receiving prices recently enough to skip polling."""
+        return self._connected and time.monotonic() - self._last_message < self.stale_after
+    
+    def latest(self) -> Dict[str, float]:
+        """Most recent price per product."""
+        with self._lock:
+            return dict(self._latest)
+    
+    def _read_loop(self):
+        """Keep a subscription open until stop()."""
+        failures = 0
+        while not self._stop.is_set():
+            client = WebSocketClient(self.endpoint, timeout=self.stale_after)
+            try:
+                client.connect()
+                self._client = client
+                client.send_text(json.dumps(self.subscribe_message()))
+                logger.info(f"Subscribed to {self.name} feed for {self.products}")
+                
+                while not self._stop.is_set():
+                    message = loads(client.recv())
+                    parsed = self.parse_message(message)
+                    if parsed is None:
+                        continue
+                    product, price = parsed
+                    with self._lock:
+                        self._latest[product] = price
+                        self._dirty.add(product)
+                    self._last_message = time.monotonic()
+                    if not self._connected:
+                        self._set_connected(True)
+                    failures = 0
+                    STREAM_MESSAGES.labels(stream=self.name).inc()
+            
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                logger.warning(f"{self.name} feed disconnected: {e}")
+            finally:
+                self._set_connected(False)
+                self._client = None
+                client.close()
+            
+            failures += 1
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (failures - 1)))
+            STREAM_RECONNECTS.labels(stream=self.name).inc()
+            self._stop.wait(delay)
+    
+    def _publish_loop(self, on_prices: Callable[[Dict[str, float]], None]):
+        """Hand conflated price updates to the callback."""
+        while not self._stop.wait(self.publish_interval):
+            with self._lock:
+                if not self._dirty:
+                    continue
+                changed = {product: self._latest[product] for product in self._dirty}
+                self._dirty.clear()
+            try:
+                on_prices(changed)
+            except Exception as e:
+                logger.error(f"Error publishing streamed prices: {e}")
+    
+    def _set_connected(self, connected: bool):
+        self._connected = connected
+        STREAM_CONNECTED.labels(stream=self.name).set(1 if connected else 0)
+
+
+@register_stream
+class CoinbaseTickerStream(StreamingProvider):
+    """Coinbase Exchange `ticker` channel."""
+    
+    name = 'coinbase'
+    default_endpoint = 'wss://ws-feed.exchange.coinbase.com'
+    
+    def subscribe_message(self) -> Dict[str, Any]:
+        return {
+            'type': 'subscribe',
+            'product_ids': self.products,
+            'channels': ['ticker']
+        }
+    
+    def parse_message(self, message: Dict[str, Any]) -> Optional[Tuple[str, float]]:
+        if message.get('type') != 'ticker' or 'price' not in message:
+            return None
+        try:
+            return message['product_id'], float(message['price'])
+        except (KeyError, ValueError, TypeError):
+            return None
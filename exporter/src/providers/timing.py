@@ -0,0 +1,113 @@
+"""Latency histograms for upstream requests and collection phases."""
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from metrics.factory import MetricFactory
+
+
+# Defaults for the metrics.yaml entries used here; metrics.yaml may
+# override any field (buckets, description) per metric
+DEFINITIONS = [
+    {
+        'name': 'api_latency_seconds',
+        'type': 'histogram',
+        'subsystem': 'exporter',
+        'description': 'API request latency',
+        'labels': ['provider', 'endpoint', 'phase'],
+        'buckets': [0.1, 0.25, 0.5, 1, 2.5, 5, 10],
+    },
+    {
+        'name': 'api_requests_total',
+        'type': 'counter',
+        'subsystem': 'exporter',
+        'description': 'Total API requests made',
+        'labels': ['provider', 'endpoint', 'status'],
+    },
+    {
+        'name': 'collection_duration_seconds',
+        'type': 'histogram',
+        'subsystem': 'exporter',
+        'description': 'Time spent in each collection phase',
+        'labels': ['provider', 'endpoint', 'phase'],
+        'buckets': [0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10],
+    },
+]
+
+# (latency, requests) of every bound factory; weak, so the factory of a
+# collector that was replaced stops receiving observations
+_bound: 'weakref.WeakKeyDictionary[MetricFactory, Tuple[Any, Any]]' = weakref.WeakKeyDictionary()
+_fallback: List[Tuple[Any, Any]] = []
+_lock = threading.Lock()
+_sink: Optional[Callable[[Tuple[str, str, Dict[str, float], str]], None]] = None
+
+# Connection phases of the request attempt running on this thread
+_local = threading.local()
+
+
+def bind(factory: MetricFactory):
+    """Also record into metrics built by a factory that includes DEFINITIONS."""
+    with _lock:
+        _bound[factory] = (factory['api_latency_seconds'], factory['api_requests_total'])
+
+
+def _targets() -> List[Tuple[Any, Any]]:
+    with _lock:
+        targets = list(_bound.values())
+        if targets:
+            return targets
+        if not _fallback:
+            # Nothing bound yet (e.g. a provider used without a collector)
+            factory = MetricFactory(DEFINITIONS, namespace='bitcoin')
+            _fallback.append((factory['api_latency_seconds'], factory['api_requests_total']))
+        return _fallback
+
+
+def record_connection(phase: str, seconds: float):
+    """Attribute connection setup time (dns, connect, tls) to the current attempt."""
+    phases: Optional[Dict[str, float]] = getattr(_local, 'phases', None)
+    if phases is not None:
+        phases[phase] = phases.get(phase, 0.0) + seconds
+
+
+def redirect(sink: Optional[Callable[[Tuple[str, str, Dict[str, float], str]], None]]):
+    """Hand each attempt to `sink` instead of recording it; None records again.
+    
+    Shard workers use this to send their attempts to the parent process,
+    which passes them to record().
+    """
+    global _sink
+    _sink = sink
+
+
+def record(provider: str, endpoint: str, phases: Dict[str, float], status: str):
+    """Observe one attempt's phases and count its status in every bound factory."""
+    for latency, requests in _targets():
+        for phase, seconds in phases.items():
+            latency.labels(provider, endpoint, phase).observe(seconds)
+        requests.labels(provider, endpoint, status).inc()
+
+
+def timed_send(provider: str, endpoint: str, send: Callable[[], Any]) -> Any:
+    """Run one HTTP attempt and record its phases and status.
+    
+    Phases: dns, connect and tls when a new connection was opened,
+    response (request sent until body read) and attempt (the total).
+    """
+    _local.phases = phases = {}
+    status = 'error'
+    start = time.perf_counter()
+    try:
+        response = send()
+        status = str(response.status_code)
+        return response
+    finally:
+        total = time.perf_counter() - start
+        _local.phases = None
+        phases['response'] = max(0.0, total - sum(phases.values()))
+        phases['attempt'] = total
+        sink = _sink
+        if sink:
+            sink((provider, endpoint, phases, status))
+        else:
+            record(provider, endpoint, phases, status)
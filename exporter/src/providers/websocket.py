@@ -0,0 +1,175 @@
+"""Minimal RFC 6455 WebSocket client for streaming providers."""
+import base64
+import hashlib
+import os
+import socket
+import ssl
+import struct
+from typing import Optional
+from urllib.parse import urlsplit
+
+
+_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+
+class WebSocketClosed(ConnectionError):
+    """The server closed the WebSocket connection."""
+
+
+class WebSocketClient:
+    """Blocking text-message WebSocket client over ws:// or wss://.
+    
+    Supports what a ticker feed needs: the opening handshake, masked
+    client frames, fragmented messages, ping/pong and close.
+    """
+    
+    def __init__(self, url: str, timeout: float = 30):
+        """Initialize client; call connect() to open the connection."""
+        self.url = url
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+    
+    def connect(self):
+        """Open the TCP/TLS connection and perform the opening handshake."""
+        parts = urlsplit(self.url)
+        secure = parts.scheme == 'wss'
+        host = parts.hostname
+        port = parts.port or (443 if secure else 80)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        
+        sock = socket.create_connection((host, port), timeout=self.timeout)
+        if secure:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=host)
+        self._sock = sock
+        self._reader = sock.makefile('rb')
+        
+        key = base64.b64encode(os.urandom(16)).decode()
+        request = (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {host}:{port}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n\r\n"
+        )
+        sock.sendall(request.encode())
+        
+        status_line = self._reader.readline().decode('latin-1')
+        headers = {}
+        while True:
+            line = self._reader.readline().decode('latin-1')
+            if line in ('\r\n', '\n', ''):
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        
+        if ' 101 ' not in status_line:
+            self.close()
+            raise ConnectionError(f"WebSocket upgrade refused: {status_line.strip()}")
+        expected = base64.b64encode(hashlib.sha1((key + _GUID).encode()).digest()).decode()
+        if headers.get('sec-websocket-accept') != expected:
+            self.close()
+            raise ConnectionError("WebSocket handshake failed: bad Sec-WebSocket-Accept")
+    
+    def send_text(self, message: str):
+        """Send one text message."""
+        self._send_frame(OP_TEXT, message.encode())
+    
+    def _send_frame(self, opcode: int, payload: bytes):
+        """Send a single masked frame."""
+        self._sock.sendall(self._encode_frame(opcode, payload))
+    
+    def _encode_frame(self, opcode: int, payload: bytes) -> bytes:
+        header = bytearray([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header.append(0x80 | length)
+        elif length < 1 << 16:
+            header.append(0x80 | 126)
+            header += struct.pack('!H', length)
+        else:
+            header.append(0x80 | 127)
+            header += struct.pack('!Q', length)
+        
+        mask = os.urandom(4)
+        masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return bytes(header) + mask + masked
+    
+    def _read_exact(self, size: int) -> bytes:
+        data = self._reader.read(size)
+        if data is None or len(data) < size:
+            raise WebSocketClosed("Connection closed mid-frame")
+        return data
+    
+    def _read_frame(self):
+        """Read one frame; returns (fin, opcode, payload)."""
+        first, second = self._read_exact(2)
+        fin = bool(first & 0x80)
+        opcode = first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', self._read_exact(2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', self._read_exact(8))[0]
+        mask = self._read_exact(4) if second & 0x80 else None
+        payload = self._read_exact(length) if length else b''
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return fin, opcode, payload
+    
+    def recv(self) -> str:
+        """Receive the next text message, answering pings along the way.
+        
+        Raises WebSocketClosed when the server closes the connection and
+        socket.timeout when nothing arrives within the timeout.
+        """
+        fragments = []
+        while True:
+            fin, opcode, payload = self._read_frame()
+            if opcode == OP_PING:
+                self._send_frame(OP_PONG, payload)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                try:
+                    self._send_frame(OP_CLOSE, payload[:2])
+                except OSError:
+                    pass
+                raise WebSocketClosed("Server closed the WebSocket")
+            
+            fragments.append(payload)
+            if fin:
+                return b''.join(fragments).decode('utf-8')
+    
+    def close(self):
+        """Close the connection, sending a close frame if possible.
+        
+        Safe to call from another thread to interrupt a blocked recv().
+        """
+        sock, reader = self._sock, self._reader
+        if sock is None:
+            return
+        self._sock = self._reader = None
+        try:
+            frame = self._encode_frame(OP_CLOSE, struct.pack('!H', 1000))
+            sock.sendall(frame)
+        except OSError:
+            pass
+        try:
+            # Unblock a reader waiting in recv() before closing its file
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        reader.close()
+        sock.close()
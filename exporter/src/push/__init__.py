@@ -0,0 +1,7 @@
+"""Push mode: remote-write and Pushgateway senders."""
+from push.base import BasePusher
+from push.pushgateway import PushgatewayPusher
+from push.registry import create_pusher
+from push.remote_write import RemoteWriteQueue
+
+__all__ = ['BasePusher', 'PushgatewayPusher', 'RemoteWriteQueue', 'create_pusher']
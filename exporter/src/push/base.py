@@ -0,0 +1,87 @@
+"""Base class and shared self-metrics for push mode."""
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, Tuple
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY
+
+
+logger = logging.getLogger(__name__)
+
+
+PUSH_SAMPLES = Counter(
+    'bitcoin_exporter_push_samples_total',
+    'Samples handled by push mode, by outcome (sent, failed, dropped)',
+    ['mode', 'result']
+)
+
+PUSH_QUEUE_SAMPLES = Gauge(
+    'bitcoin_exporter_push_queue_samples',
+    'Samples waiting to be pushed',
+    ['mode']
+)
+
+PUSH_REQUEST_SECONDS = Histogram(
+    'bitcoin_exporter_push_request_duration_seconds',
+    'Time to send one push request, including retries',
+    ['mode']
+)
+
+PUSH_LAST_SUCCESS = Gauge(
+    'bitcoin_exporter_push_last_success_timestamp_seconds',
+    'Time of the last successful push',
+    ['mode']
+)
+
+
+def registry_samples(registry=REGISTRY, extra_labels: Dict[str, str] = None) -> Iterator[Tuple[Tuple, float]]:
+    """(sorted labels including __name__, value) for every sample in a registry.
+    
+    `_created` samples are skipped: they are exposition-only and would
+    double the series count on the receiver.
+    """
+    extra = tuple((extra_labels or {}).items())
+    for family in registry.collect():
+        for sample in family.samples:
+            if sample.name.endswith('_created'):
+                continue
+            labels = tuple(sorted((('__name__', sample.name), *sample.labels.items(), *extra)))
+            yield labels, sample.value
+
+
+class BasePusher(ABC):
+    """Send the exporter's metrics to a receiver instead of waiting for scrapes.
+    
+    push() is called after every collection cycle on the engine's loop
+    and must return quickly; sending happens on the pusher's own threads.
+    """
+    
+    mode = ''
+    
+    def __init__(self, config: Dict[str, Any]):
+        """Initialize pusher from the `exporter.push` section."""
+        self.config = config
+        self.url = config['url']
+        self.timeout = config.get('timeout', 10)
+    
+    @abstractmethod
+    def start(self):
+        """Start the sending threads."""
+        pass
+    
+    @abstractmethod
+    def push(self):
+        """Hand the current metrics over for sending."""
+        pass
+    
+    @abstractmethod
+    def stop(self, timeout: float = 5):
+        """Send what is pending, waiting up to `timeout` seconds, and stop."""
+        pass
+    
+    def _record(self, samples: int, started: float, ok: bool):
+        """Update the shared push metrics after one request."""
+        PUSH_REQUEST_SECONDS.labels(mode=self.mode).observe(time.perf_counter() - started)
+        PUSH_SAMPLES.labels(mode=self.mode, result='sent' if ok else 'failed').inc(samples)
+        if ok:
+            PUSH_LAST_SUCCESS.labels(mode=self.mode).set(time.time())
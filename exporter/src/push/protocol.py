@@ -0,0 +1,166 @@
+"""Prometheus remote-write wire format: protobuf WriteRequest and snappy framing.
+
+Encoded by hand so push mode needs no protobuf runtime; python-snappy is
+used for compression when installed.
+"""
+import struct
+from typing import Dict, Iterable, List, Tuple
+
+try:
+    import snappy
+except ImportError:  # optional: pip install python-snappy
+    snappy = None
+
+
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[float, int]
+
+COMPRESSOR = 'snappy' if snappy else 'literal'
+
+_DOUBLE = struct.Struct('<d')
+# Largest literal the fallback encoder emits in one element
+_LITERAL_CHUNK = 1 << 16
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _field(tag: bytes, payload: bytes) -> bytes:
+    """Length-delimited field."""
+    return tag + _varint(len(payload)) + payload
+
+
+def encode_labels(labels: Labels) -> bytes:
+    """Encoded `repeated Label labels = 1` of a TimeSeries; labels must be sorted by name."""
+    return b''.join(
+        _field(b'\x0a', _field(b'\x0a', name.encode()) + _field(b'\x12', value.encode()))
+        for name, value in labels
+    )
+
+
+def encode_write_request(series: Iterable[Tuple[bytes, List[Sample]]]) -> bytes:
+    """WriteRequest from (encoded labels, [(value, timestamp_ms)]) pairs."""
+    out = []
+    for labels, samples in series:
+        body = [labels]
+        for value, timestamp in samples:
+            sample = b'\x09' + _DOUBLE.pack(value) + b'\x10' + _varint(timestamp & 0xffffffffffffffff)
+            body.append(_field(b'\x12', sample))
+        out.append(_field(b'\x0a', b''.join(body)))
+    return b''.join(out)
+
+
+def compress(data: bytes) -> bytes:
+    """Snappy block format, as remote-write requires.
+    
+    Without python-snappy the block is written as literals only: valid
+    for every decoder, just not smaller than the input.
+    """
+    if snappy:
+        return snappy.compress(data)
+    out = [_varint(len(data))]
+    for offset in range(0, len(data), _LITERAL_CHUNK):
+        chunk = data[offset:offset + _LITERAL_CHUNK]
+        n = len(chunk) - 1
+        if n < 60:
+            out.append(bytes((n << 2,)))
+        elif n < 0x100:
+            out.append(bytes((60 << 2, n)))
+        else:
+            out.append(bytes((61 << 2,)) + struct.pack('<H', n))
+        out.append(chunk)
+    return b''.join(out)
+
+
+def decompress(data: bytes) -> bytes:
+    """Decode a snappy block (literals and copies)."""
+    length, pos = _read_varint(data, 0)
+    out = bytearray()
+    while pos < len(data):
+        tag = data[pos]
+        pos += 1
+        kind = tag & 3
+        if kind == 0:
+            n = tag >> 2
+            if n >= 60:
+                size = n - 59
+                n = int.from_bytes(data[pos:pos + size], 'little')
+                pos += size
+            out += data[pos:pos + n + 1]
+            pos += n + 1
+            continue
+        if kind == 1:
+            n = ((tag >> 2) & 7) + 4
+            offset = ((tag >> 5) << 8) | data[pos]
+            pos += 1
+        else:
+            size = 2 if kind == 2 else 4
+            n = (tag >> 2) + 1
+            offset = int.from_bytes(data[pos:pos + size], 'little')
+            pos += size
+        if not 0 < offset <= len(out):
+            raise ValueError("Corrupt snappy block: bad copy offset")
+        for _ in range(n):
+            out.append(out[-offset])
+    if len(out) != length:
+        raise ValueError(f"Corrupt snappy block: expected {length} bytes, got {len(out)}")
+    return bytes(out)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _fields(data: bytes):
+    """Yield (field number, wire type, value) of one protobuf message."""
+    pos = 0
+    while pos < len(data):
+        key, pos = _read_varint(data, pos)
+        number, wire = key >> 3, key & 7
+        if wire == 0:
+            value, pos = _read_varint(data, pos)
+        elif wire == 1:
+            value, pos = data[pos:pos + 8], pos + 8
+        elif wire == 2:
+            size, pos = _read_varint(data, pos)
+            value, pos = data[pos:pos + size], pos + size
+        elif wire == 5:
+            value, pos = data[pos:pos + 4], pos + 4
+        else:
+            raise ValueError(f"Unsupported protobuf wire type {wire}")
+        yield number, wire, value
+
+
+def decode_write_request(data: bytes) -> Dict[Labels, List[Sample]]:
+    """Samples per label set of an uncompressed WriteRequest."""
+    result: Dict[Labels, List[Sample]] = {}
+    for number, _, series in _fields(data):
+        if number != 1:
+            continue
+        labels = []
+        samples = []
+        for field, _, value in _fields(series):
+            if field == 1:
+                label = {n: v.decode() for n, _, v in _fields(value)}
+                labels.append((label.get(1, ''), label.get(2, '')))
+            elif field == 2:
+                sample = {n: v for n, _, v in _fields(value)}
+                timestamp = sample.get(2, 0)
+                if timestamp >= 1 << 63:
+                    timestamp -= 1 << 64
+                samples.append((_DOUBLE.unpack(sample.get(1, bytes(8)))[0], timestamp))
+        result.setdefault(tuple(labels), []).extend(samples)
+    return result
@@ -0,0 +1,22 @@
+"""Pusher selection by `exporter.push.mode`."""
+from typing import Any, Dict, Optional
+from push.base import BasePusher
+from push.pushgateway import PushgatewayPusher
+from push.remote_write import RemoteWriteQueue
+
+
+PUSH_MODES = ('remote_write', 'pushgateway')
+
+
+def create_pusher(config: Dict[str, Any], exposition) -> Optional[BasePusher]:
+    """Pusher for the `exporter.push` section; None when push mode is off."""
+    mode = config.get('mode')
+    if not mode:
+        return None
+    if not config.get('url'):
+        raise ValueError("exporter.push.url is required when exporter.push.mode is set")
+    if mode == 'remote_write':
+        return RemoteWriteQueue(config, registry=exposition.registry)
+    if mode == 'pushgateway':
+        return PushgatewayPusher(config, exposition)
+    raise ValueError(f"Unknown push mode: {mode} (available: {', '.join(PUSH_MODES)})")
@@ -0,0 +1,177 @@
+"""Sharded, batched Prometheus remote-write."""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Tuple
+import requests
+from prometheus_client import REGISTRY
+from providers.retry import RetryBudget, RetryPolicy
+from providers.session import build_session
+from push.base import PUSH_QUEUE_SAMPLES, PUSH_SAMPLES, BasePusher, registry_samples
+from push.protocol import Labels, compress, encode_labels, encode_write_request
+
+
+logger = logging.getLogger(__name__)
+
+
+QueuedSample = Tuple[Labels, float, int]
+
+
+class _Shard:
+    """Bounded FIFO of samples drained by one sending thread."""
+    
+    def __init__(self, capacity: int):
+        """Initialize an empty shard."""
+        self.capacity = capacity
+        self.samples: Deque[QueuedSample] = deque()
+        self.cond = threading.Condition()
+        self.closed = False
+    
+    def put(self, samples: List[QueuedSample]) -> int:
+        """Queue what fits without waiting; returns how many samples were dropped."""
+        with self.cond:
+            if self.closed:
+                return len(samples)
+            queued = max(0, min(len(samples), self.capacity - len(self.samples)))
+            if queued:
+                self.samples.extend(samples[:queued])
+                self.cond.notify_all()
+            return len(samples) - queued
+    
+    def take(self, batch_size: int, flush_interval: float) -> List[QueuedSample]:
+        """Wait for a full batch, or a partial one `flush_interval` old; empty once closed and drained."""
+        with self.cond:
+            deadline = None
+            while len(self.samples) < batch_size and not self.closed:
+                if not self.samples:
+                    deadline = None
+                    self.cond.wait()
+                    continue
+                if deadline is None:
+                    deadline = time.monotonic() + flush_interval
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.cond.wait(remaining)
+            batch = [self.samples.popleft() for _ in range(min(batch_size, len(self.samples)))]
+            self.cond.notify_all()
+            return batch
+
+
+class RemoteWriteQueue(BasePusher):
+    """Queue every cycle's samples and send them as remote-write requests.
+    
+    Each series always lands on the same shard, so its samples are sent
+    in order; every shard has its own thread, connection and bounded
+    queue of `capacity / shards` samples, and sends once `batch_size`
+    samples are queued or the oldest has waited `flush_interval`
+    seconds. Failed requests are retried with backoff on 429/5xx. push()
+    runs on the engine's loop and never waits: while a slow receiver
+    keeps the queues full, the samples that do not fit are dropped.
+    """
+    
+    mode = 'remote_write'
+    
+    def __init__(self, config: Dict[str, Any], registry=REGISTRY):
+        """Initialize queue; start() launches the shard threads."""
+        super().__init__(config)
+        self.registry = registry
+        shards = max(1, config.get('shards', 2))
+        capacity = max(shards, config.get('capacity', 10000))
+        self.batch_size = max(1, config.get('batch_size', 2000))
+        self.flush_interval = config.get('flush_interval', 5)
+        self.external_labels = config.get('external_labels', {})
+        self.shards = [_Shard(capacity // shards) for _ in range(shards)]
+        self.headers = {
+            'Content-Encoding': 'snappy',
+            'Content-Type': 'application/x-protobuf',
+            'X-Prometheus-Remote-Write-Version': '0.1.0',
+            **config.get('headers', {}),
+        }
+        retry_config = config.get('retry', {})
+        self.retry = RetryPolicy(
+            max_attempts=retry_config.get('max_attempts', 5),
+            backoff=retry_config.get('backoff', 2),
+            base_delay=retry_config.get('base_delay', 0.5),
+            max_delay=retry_config.get('max_delay', 30),
+            budget=RetryBudget(ratio=retry_config.get('budget_ratio', 0.5))
+        )
+        self.session = build_session({'connections': 1, 'maxsize': shards})
+        self._threads: List[threading.Thread] = []
+    
+    def start(self):
+        """Start one sending thread per shard."""
+        for index, shard in enumerate(self.shards):
+            thread = threading.Thread(target=self._run, args=(shard,), name=f"remote-write-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Remote write to {self.url} with {len(self.shards)} shards")
+    
+    def push(self):
+        """Snapshot the registry and queue its samples on their shards."""
+        timestamp = int(time.time() * 1000)
+        buckets: List[List[QueuedSample]] = [[] for _ in self.shards]
+        for labels, value in registry_samples(self.registry, self.external_labels):
+            buckets[hash(labels) % len(buckets)].append((labels, value, timestamp))
+        
+        dropped = sum(shard.put(samples) for shard, samples in zip(self.shards, buckets))
+        if dropped:
+            PUSH_SAMPLES.labels(mode=self.mode, result='dropped').inc(dropped)
+            logger.warning(f"Remote write queue full, dropped {dropped} samples")
+        self._update_queue_size()
+    
+    def _update_queue_size(self):
+        PUSH_QUEUE_SAMPLES.labels(mode=self.mode).set(sum(len(shard.samples) for shard in self.shards))
+    
+    def _run(self, shard: _Shard):
+        # Encoded label sets by series; owned by this thread
+        encoded: Dict[Labels, bytes] = {}
+        while True:
+            batch = shard.take(self.batch_size, self.flush_interval)
+            if not batch:
+                return
+            self._update_queue_size()
+            if len(encoded) > 4 * shard.capacity:
+                encoded.clear()
+            self._send(batch, encoded)
+    
+    def _send(self, batch: List[QueuedSample], encoded: Dict[Labels, bytes]):
+        """Encode and post one batch, retrying per the retry policy."""
+        series: Dict[Labels, List[Tuple[float, int]]] = {}
+        for labels, value, timestamp in batch:
+            series.setdefault(labels, []).append((value, timestamp))
+        payload = []
+        for labels, samples in series.items():
+            labels_bytes = encoded.get(labels)
+            if labels_bytes is None:
+                labels_bytes = encoded[labels] = encode_labels(labels)
+            payload.append((labels_bytes, samples))
+        body = compress(encode_write_request(payload))
+        
+        started = time.perf_counter()
+        try:
+            self.retry.call(
+                lambda timeout: self.session.post(self.url, data=body, headers=self.headers, timeout=timeout),
+                self.timeout,
+                endpoint=self.mode
+            )
+            ok = True
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Remote write of {len(batch)} samples failed: {e}")
+            ok = False
+        self._record(len(batch), started, ok)
+    
+    def stop(self, timeout: float = 5):
+        """Close the queues, let the shards send what is queued, and wait up to `timeout`."""
+        for shard in self.shards:
+            with shard.cond:
+                shard.closed = True
+                shard.cond.notify_all()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        left = sum(len(shard.samples) for shard in self.shards)
+        if left:
+            logger.warning(f"Remote write stopped with {left} samples unsent")
+        self.session.close()
@@ -0,0 +1,5 @@
+"""HTTP serving package."""
+from server.exposition import ExpositionCache, Exposition
+from server.httpd import start_server
+
+__all__ = ['ExpositionCache', 'Exposition', 'start_server']
@@ -0,0 +1,150 @@
+"""asyncio HTTP server mode."""
+import asyncio
+import logging
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, Dict, Mapping
+from server.httpd import Response, route
+
+
+logger = logging.getLogger(__name__)
+
+
+BUSY: Response = (503, [], b'')
+
+
+class AsyncMetricsServer:
+    """asyncio HTTP/1.1 server running on its own event loop thread.
+    
+    /metrics is built on a pool of max_workers threads, since it can
+    block on an on-scrape collection; a request that finds every worker
+    busy, or takes longer than request_timeout, is answered with 503.
+    /health is cheap and answered on the loop, so it is never queued
+    behind slow scrapes.
+    """
+    
+    def __init__(self, address, app: Any, request_timeout: float, max_workers: int):
+        """Initialize server bound to an app."""
+        self.address = address
+        self.app = app
+        self.request_timeout = request_timeout
+        self.max_workers = max_workers
+        self._loop = asyncio.new_event_loop()
+        self._server = None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='http')
+        self._busy = 0
+        
+        # Bind synchronously so port errors surface to the caller
+        self._socket = socket.create_server(address)
+        self.server_port = self._socket.getsockname()[1]
+    
+    def serve_forever(self):
+        """Run the server loop until shutdown()."""
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle_connection, sock=self._socket)
+        )
+        self._loop.run_forever()
+        
+        # Drop idle keep-alive connections before closing the loop
+        self._server.close()
+        pending = asyncio.all_tasks(self._loop)
+        for task in pending:
+            task.cancel()
+        self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        self._loop.close()
+        self._executor.shutdown(wait=False)
+    
+    def shutdown(self):
+        """Stop the server loop."""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+    
+    async def _handle_connection(self, reader, writer):
+        """Serve requests on one connection until it closes or idles out."""
+        try:
+            while True:
+                request = await asyncio.wait_for(
+                    self._read_request(reader), timeout=self.request_timeout
+                )
+                if request is None:
+                    break
+                method, path, version, headers = request
+                keep_alive = self._keep_alive(version, headers)
+                
+                if method != 'GET':
+                    response = (501, [], b'')
+                elif path == '/health':
+                    response = route(self.app, path, headers)
+                else:
+                    response = await self._route_in_worker(path, headers)
+                writer.write(self._format_response(response, keep_alive))
+                await writer.drain()
+                
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # Shutdown dropping an idle keep-alive connection
+            pass
+        except Exception as e:
+            logger.error(f"Error serving HTTP request: {e}")
+        finally:
+            writer.close()
+    
+    async def _route_in_worker(self, path: str, headers: Mapping[str, str]) -> Response:
+        """Build a response on the worker pool, or 503 when it is full or too slow."""
+        if self._busy >= self.max_workers:
+            logger.warning(f"All HTTP workers busy, answering 503 for {path}")
+            return BUSY
+        self._busy += 1
+        future = self._loop.run_in_executor(self._executor, route, self.app, path, headers)
+        # The slot is freed when the worker finishes, not when the client gives up on it
+        future.add_done_callback(self._release_worker)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=self.request_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{path} not ready after {self.request_timeout}s, answering 503")
+            return BUSY
+    
+    def _release_worker(self, future):
+        self._busy -= 1
+        if not future.cancelled():
+            # Retrieve the error of a request that already got its 503; a timely one is raised to the connection
+            future.exception()
+    
+    @staticmethod
+    async def _read_request(reader):
+        """Read a request line and headers; None on a cleanly closed connection."""
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        method, path, version = request_line.decode('latin-1').split()
+        
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().title()] = value.strip()
+        return method, path, version, headers
+    
+    @staticmethod
+    def _keep_alive(version: str, headers: Mapping[str, str]) -> bool:
+        """Apply HTTP/1.0 and HTTP/1.1 persistent connection defaults."""
+        connection = headers.get('Connection', '').lower()
+        if version == 'HTTP/1.1':
+            return connection != 'close'
+        return connection == 'keep-alive'
+    
+    @staticmethod
+    def _format_response(response: Response, keep_alive: bool) -> bytes:
+        """Serialize a response with framing headers."""
+        status, headers, body = response
+        lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+        lines.extend(f"{name}: {value}" for name, value in headers)
+        lines.append(f"Content-Length: {len(body)}")
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
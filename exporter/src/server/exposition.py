@@ -0,0 +1,89 @@
+"""Pre-rendered, cached /metrics exposition."""
+import gzip
+import hashlib
+import logging
+import threading
+import time
+from typing import Callable, NamedTuple, Optional
+from prometheus_client import Gauge, REGISTRY, generate_latest
+
+
+logger = logging.getLogger(__name__)
+
+
+RENDER_SECONDS = Gauge(
+    'bitcoin_exporter_metrics_render_seconds',
+    'Time spent rendering the last /metrics exposition'
+)
+
+CACHE_HIT_RATIO = Gauge(
+    'bitcoin_exporter_metrics_cache_hit_ratio',
+    'Ratio of /metrics requests that reused an already served rendering; the first request '
+    'after each re-render is a miss'
+)
+
+
+class Exposition(NamedTuple):
+    """One immutable rendering of the registry."""
+    body: bytes
+    gzipped: Optional[bytes]
+    etag: str
+    rendered_at: float
+
+
+class ExpositionCache:
+    """Render the registry once per collection cycle and serve the bytes.
+    
+    render() is called after every collection cycle; get() returns the
+    current snapshot and only renders when none exists yet. An optional
+    `refresh` callable runs at the start of every get(), for on-scrape
+    collection that re-renders through the same post-cycle path;
+    callers on that path pass refresh=False, or they would wait on the
+    collection they are part of.
+    """
+    
+    def __init__(self, registry=REGISTRY, gzip_enabled: bool = True):
+        """Initialize cache for a registry."""
+        self.registry = registry
+        self.gzip_enabled = gzip_enabled
+        self.refresh: Optional[Callable[[], None]] = None
+        self._snapshot: Optional[Exposition] = None
+        self._served: Optional[Exposition] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def render(self) -> Exposition:
+        """Serialize the registry into a new immutable snapshot."""
+        start = time.perf_counter()
+        body = generate_latest(self.registry)
+        gzipped = gzip.compress(body, compresslevel=6) if self.gzip_enabled else None
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        snapshot = Exposition(body, gzipped, etag, time.time())
+        
+        # Swap in the new snapshot; readers keep whichever they already hold
+        self._snapshot = snapshot
+        RENDER_SECONDS.set(time.perf_counter() - start)
+        return snapshot
+    
+    def get(self, refresh: bool = True) -> Exposition:
+        """Get the current snapshot, rendering only if there is none."""
+        if refresh and self.refresh:
+            self.refresh()
+        snapshot = self._snapshot
+        with self._lock:
+            if snapshot is None:
+                self.misses += 1
+                snapshot = self._snapshot or self.render()
+            elif snapshot is not self._served:
+                # The registry changed and was re-rendered since the last request
+                self.misses += 1
+            else:
+                self.hits += 1
+            self._served = snapshot
+            CACHE_HIT_RATIO.set(self.hits / (self.hits + self.misses))
+        return snapshot
+    
+    def invalidate(self):
+        """Drop the current snapshot so the next get() re-renders."""
+        self._snapshot = None
@@ -0,0 +1,149 @@
+"""Concurrent HTTP servers for /metrics and /health."""
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
+from typing import Any, Dict, List, Mapping, Tuple
+from prometheus_client import CONTENT_TYPE_LATEST
+
+
+logger = logging.getLogger(__name__)
+
+
+Response = Tuple[int, List[Tuple[str, str]], bytes]
+
+
+def route(app: Any, path: str, headers: Mapping[str, str]) -> Response:
+    """Build the response for a GET request.
+    
+    `app` provides health_status() and an `exposition` cache; both server
+    implementations share this so they behave identically.
+    """
+    if path == '/health':
+        body = json.dumps(app.health_status()).encode()
+        return 200, [('Content-type', 'application/json')], body
+    
+    if path == '/metrics':
+        snapshot = app.exposition.get()
+        if headers.get('If-None-Match') == snapshot.etag:
+            return 304, [('ETag', snapshot.etag), ('Vary', 'Accept-Encoding')], b''
+        
+        body = snapshot.body
+        response_headers = [
+            ('Content-type', CONTENT_TYPE_LATEST),
+            ('ETag', snapshot.etag),
+            ('Vary', 'Accept-Encoding')
+        ]
+        if snapshot.gzipped is not None and 'gzip' in headers.get('Accept-Encoding', ''):
+            body = snapshot.gzipped
+            response_headers.append(('Content-Encoding', 'gzip'))
+        return 200, response_headers, body
+    
+    return 404, [], b''
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 keep-alive handler for /metrics and /health."""
+    
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; without TCP_NODELAY the body
+    # waits on the client's delayed ACK (~40ms per keep-alive request)
+    disable_nagle_algorithm = True
+    
+    def setup(self):
+        """Apply the server's per-connection read timeout."""
+        self.timeout = self.server.request_timeout
+        super().setup()
+    
+    def do_GET(self):
+        status, headers, body = route(self.server.app, self.path, self.headers)
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        # Suppress default logging
+        pass
+
+
+class SimpleMetricsServer(HTTPServer):
+    """Single-threaded server, one request at a time."""
+    
+    def __init__(self, address, app: Any, request_timeout: float):
+        """Initialize server bound to an app."""
+        self.app = app
+        self.request_timeout = request_timeout
+        super().__init__(address, MetricsRequestHandler)
+
+
+class BoundedThreadingServer(ThreadingHTTPServer):
+    """Thread-per-connection server with a cap on concurrent workers.
+    
+    Connections beyond max_workers are answered with 503 straight away:
+    the accept thread never waits for a worker, so a pile of stuck
+    scrapes or idle keep-alive connections cannot exhaust threads or
+    stop /health from being answered.
+    """
+    
+    def __init__(self, address, app: Any, request_timeout: float, max_workers: int):
+        """Initialize server bound to an app."""
+        self.app = app
+        self.request_timeout = request_timeout
+        self._workers = threading.BoundedSemaphore(max_workers)
+        super().__init__(address, MetricsRequestHandler)
+    
+    def process_request(self, request, client_address):
+        """Hand the connection to a worker thread if one is free."""
+        if not self._workers.acquire(blocking=False):
+            logger.warning(f"All HTTP workers busy, rejecting {client_address[0]}")
+            try:
+                request.sendall(
+                    b'HTTP/1.1 503 Service Unavailable\r\n'
+                    b'Content-Length: 0\r\nConnection: close\r\n\r\n'
+                )
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        super().process_request(request, client_address)
+    
+    def process_request_thread(self, request, client_address):
+        """Release the worker slot once the connection is done."""
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._workers.release()
+
+
+def start_server(app: Any, port: int, server_config: Dict[str, Any]):
+    """Start the configured HTTP server on a daemon thread.
+    
+    Modes: 'threaded' (default, bounded thread-per-connection), 'async'
+    (asyncio on a dedicated loop) or 'simple' (single-threaded).
+    """
+    mode = server_config.get('mode', 'threaded')
+    max_workers = server_config.get('max_workers', 8)
+    request_timeout = server_config.get('request_timeout', 10)
+    address = ('', port)
+    
+    if mode == 'threaded':
+        server = BoundedThreadingServer(address, app, request_timeout, max_workers)
+    elif mode == 'async':
+        # Imported on demand: asyncio is a large import and the other
+        # modes, which bind before the collector loads, do not need it
+        from server.aio import AsyncMetricsServer
+        server = AsyncMetricsServer(address, app, request_timeout, max_workers)
+    elif mode == 'simple':
+        server = SimpleMetricsServer(address, app, request_timeout)
+    else:
+        raise ValueError(f"Unknown server mode: {mode}")
+    
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    logger.info(f"HTTP server running in {mode} mode (max_workers={max_workers})")
+    return server
@@ -0,0 +1,4 @@
+"""Storage package."""
+from storage.history import HistoryStore
+
+__all__ = ['HistoryStore']
@@ -0,0 +1,347 @@
+"""Append-only, memory-mapped price history file."""
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from prometheus_client import Gauge
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory file locks
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+
+HISTORY_BYTES = Gauge(
+    'bitcoin_exporter_history_bytes',
+    'Bytes of sample data in the local history file'
+)
+
+
+# File layout: 16-byte header, then records until a zero kind byte.
+#   series:  kind=2, id u16, length u16, utf-8 key (fields joined by \x1f)
+#   sample:  kind=1, id u16, timestamp f64, value f64
+MAGIC = b'BTCHIST1'
+HEADER = struct.Struct('<8sQ')
+SERIES = struct.Struct('<BHH')
+SAMPLE = struct.Struct('<BHdd')
+KIND_END, KIND_SAMPLE, KIND_SERIES = 0, 1, 2
+# Series ids are u16
+MAX_SERIES = 1 << 16
+
+Key = Tuple[str, ...]
+
+
+class HistoryStore:
+    """Price samples persisted to a memory-mapped file.
+    
+    Appends are plain memory writes into a pre-sized mapping, so the OS
+    flushes them in the background and a restarted process can replay
+    them. Compaction rewrites the file with only the samples inside the
+    retention window, atomically replacing the old one. Appends start it
+    on a background thread every `compact_interval` seconds and whenever
+    the data passes max_bytes, and keep going while it runs; if the
+    retained samples alone exceed max_bytes, the oldest are dropped down
+    to three quarters of it so appends have room before the next
+    compaction. At most MAX_SERIES series can be stored; samples
+    for further series are dropped until compaction frees ids.
+    """
+    
+    def __init__(self, path: str, retention: float = 86400, max_bytes: int = 16 << 20,
+                 compact_interval: float = 3600, grow_bytes: int = 1 << 20):
+        """Initialize store; call open() before use."""
+        self.path = path
+        self.retention = retention
+        self.max_bytes = max_bytes
+        self.compact_interval = compact_interval
+        self.grow_bytes = grow_bytes
+        self._series: Dict[Key, int] = {}
+        self._keys: List[Key] = []
+        self._file = None
+        self._lockfile = None
+        self._map: Optional[mmap.mmap] = None
+        self._offset = HEADER.size
+        self._compacted_at = time.time()
+        self._series_full = False
+        self._compactor: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Serializes compactions; taken before _lock, never while holding it
+        self._compact_lock = threading.Lock()
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional['HistoryStore']:
+        """Build and open from the `exporter.history` section; None when disabled."""
+        if not config.get('enabled', False):
+            return None
+        store = cls(
+            config.get('path', '/tmp/bitcoin-exporter/history.bin'),
+            retention=config.get('retention', 86400),
+            max_bytes=config.get('max_bytes', 16 << 20),
+            compact_interval=config.get('compact_interval', 3600)
+        )
+        store.open()
+        return store
+    
+    def open(self):
+        """Map the file, creating it if needed, and index its series."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        # One writer per file: the exporter and a backfill must not interleave appends
+        self._lockfile = open(f"{self.path}.lock", 'w')
+        if fcntl is None:
+            logger.warning(f"Cannot lock {self.path} on this platform; do not backfill it while the exporter runs")
+        else:
+            try:
+                fcntl.flock(self._lockfile, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self._lockfile.close()
+                raise ValueError(f"History file {self.path} is in use by another process")
+        
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < HEADER.size:
+            with open(self.path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, 0))
+                f.truncate(self.grow_bytes)
+        
+        self._file = open(self.path, 'r+b')
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, _ = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            logger.warning(f"{self.path} is not a history file, starting a new one")
+            self._reset()
+        self._offset = self._scan()
+        HISTORY_BYTES.set(self._offset)
+    
+    def _reset(self):
+        self._map.close()
+        self._file.seek(0)
+        self._file.truncate(0)
+        self._file.write(HEADER.pack(MAGIC, 0))
+        self._file.truncate(self.grow_bytes)
+        self._file.flush()
+        self._map = mmap.mmap(self._file.fileno(), 0)
+    
+    def _scan(self) -> int:
+        """Index series records and return the end-of-data offset."""
+        buf, offset, size = self._map, HEADER.size, len(self._map)
+        self._series.clear()
+        self._keys.clear()
+        while offset < size:
+            kind = buf[offset]
+            if kind == KIND_SAMPLE and offset + SAMPLE.size <= size:
+                offset += SAMPLE.size
+            elif kind == KIND_SERIES and offset + SERIES.size <= size:
+                _, series_id, length = SERIES.unpack_from(buf, offset)
+                start = offset + SERIES.size
+                if start + length > size:
+                    break
+                key = tuple(bytes(buf[start:start + length]).decode().split('\x1f'))
+                self._series[key] = series_id
+                self._keys.append(key)
+                offset = start + length
+            else:
+                break
+        return offset
+    
+    def _ensure(self, needed: int):
+        """Grow the file and mapping so `needed` more bytes fit."""
+        if self._offset + needed < len(self._map):
+            return
+        size = len(self._map) + max(self.grow_bytes, needed)
+        self._map.close()
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+    
+    def _series_id(self, key: Key) -> Optional[int]:
+        """Id for a key, writing its series record first if new; None when ids are exhausted."""
+        series_id = self._series.get(key)
+        if series_id is None:
+            if len(self._keys) >= MAX_SERIES:
+                if not self._series_full:
+                    logger.warning(f"History file {self.path} holds {MAX_SERIES} series, "
+                                   "dropping samples of new series until compaction")
+                    self._series_full = True
+                return None
+            series_id = self._series[key] = len(self._keys)
+            self._keys.append(key)
+            encoded = '\x1f'.join(key).encode()
+            self._ensure(SERIES.size + len(encoded))
+            SERIES.pack_into(self._map, self._offset, KIND_SERIES, series_id, len(encoded))
+            self._map[self._offset + SERIES.size:self._offset + SERIES.size + len(encoded)] = encoded
+            self._offset += SERIES.size + len(encoded)
+        return series_id
+    
+    def append(self, key: Key, timestamp: float, value: float):
+        """Append one sample, starting a background compaction when due.
+        
+        Retention and the compaction interval are measured from the wall
+        clock, not the sample's timestamp: backfills append old samples,
+        and in any order.
+        """
+        with self._lock:
+            if self._map is None:
+                return
+            series_id = self._series_id(key)
+            if series_id is None:
+                return
+            self._ensure(SAMPLE.size)
+            SAMPLE.pack_into(self._map, self._offset, KIND_SAMPLE, series_id, timestamp, value)
+            self._offset += SAMPLE.size
+            HISTORY_BYTES.set(self._offset)
+            
+            now = time.time()
+            due = self._offset > self.max_bytes or now - self._compacted_at > self.compact_interval
+            if due and not (self._compactor and self._compactor.is_alive()):
+                self._compactor = threading.Thread(
+                    target=self._compact_in_background, args=(now,), name='history-compact', daemon=True
+                )
+                self._compactor.start()
+    
+    def replay(self, since: Optional[float] = None) -> Iterator[Tuple[Key, float, float]]:
+        """Yield (key, timestamp, value) in file order, optionally from `since`."""
+        with self._lock:
+            if self._map is None:
+                return
+            data = bytes(self._map[:self._offset])
+            keys = list(self._keys)
+        offset, end = HEADER.size, len(data)
+        unpack = SAMPLE.unpack_from
+        while offset < end:
+            kind = data[offset]
+            if kind == KIND_SAMPLE:
+                _, series_id, timestamp, value = unpack(data, offset)
+                offset += SAMPLE.size
+                if since is None or timestamp >= since:
+                    yield keys[series_id], timestamp, value
+            else:
+                offset += SERIES.size + SERIES.unpack_from(data, offset)[2]
+    
+    def compact(self, now: Optional[float] = None):
+        """Drop samples older than the retention window."""
+        self._compact(now or time.time())
+    
+    def _compact_in_background(self, now: float):
+        try:
+            self._compact(now)
+        except Exception as e:
+            logger.error(f"History compaction failed: {e}")
+    
+    def _compact(self, now: float):
+        """Rewrite the file from a snapshot, then carry over what was appended meanwhile."""
+        with self._compact_lock:
+            start = time.perf_counter()
+            with self._lock:
+                if self._map is None:
+                    return
+                data = bytes(self._map[:self._offset])
+                old_keys = list(self._keys)
+            
+            samples = []
+            offset = HEADER.size
+            while offset < len(data):
+                kind = data[offset]
+                if kind == KIND_SAMPLE:
+                    record = SAMPLE.unpack_from(data, offset)
+                    if record[2] >= now - self.retention:
+                        samples.append(record)
+                    offset += SAMPLE.size
+                else:
+                    offset += SERIES.size + SERIES.unpack_from(data, offset)[2]
+            
+            kept = len(samples)
+            series_bytes = sum(SERIES.size + len('\x1f'.join(old_keys[i]).encode())
+                               for i in {record[1] for record in samples})
+            if HEADER.size + series_bytes + kept * SAMPLE.size > self.max_bytes:
+                # Retention alone does not fit: keep the newest samples, in file order
+                budget = max(0, (self.max_bytes * 3 // 4 - HEADER.size - series_bytes) // SAMPLE.size)
+                if budget < kept:
+                    newest = sorted(range(kept), key=lambda i: samples[i][2])[kept - budget:]
+                    samples = [samples[i] for i in sorted(newest)]
+                    logger.warning(f"History within retention exceeds max_bytes ({self.max_bytes}), "
+                                   f"dropped the {kept - budget} oldest samples")
+            
+            # Renumber the series that still have samples
+            used = sorted({record[1] for record in samples})
+            remap = {old: new for new, old in enumerate(used)}
+            keys = [old_keys[old] for old in used]
+            body = bytearray(HEADER.pack(MAGIC, 0))
+            for series_id, key in enumerate(keys):
+                body += self._series_record(series_id, key)
+            for kind, series_id, timestamp, value in samples:
+                body += SAMPLE.pack(kind, remap[series_id], timestamp, value)
+            
+            tmp = f"{self.path}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(body)
+                f.flush()
+                os.fsync(f.fileno())
+                
+                with self._lock:
+                    if self._map is None:
+                        f.close()
+                        os.remove(tmp)
+                        return
+                    # Samples appended since the snapshot, renumbered onto the new series ids
+                    ids = {key: i for i, key in enumerate(keys)}
+                    tail = bytearray()
+                    offset = len(data)
+                    while offset < self._offset:
+                        kind = self._map[offset]
+                        if kind == KIND_SAMPLE:
+                            _, series_id, timestamp, value = SAMPLE.unpack_from(self._map, offset)
+                            key = self._keys[series_id]
+                            if key not in ids:
+                                ids[key] = len(keys)
+                                keys.append(key)
+                                tail += self._series_record(ids[key], key)
+                            tail += SAMPLE.pack(KIND_SAMPLE, ids[key], timestamp, value)
+                            offset += SAMPLE.size
+                        else:
+                            offset += SERIES.size + SERIES.unpack_from(self._map, offset)[2]
+                    f.write(tail)
+                    f.truncate(len(body) + len(tail) + self.grow_bytes)
+                    f.close()
+                    
+                    self._map.close()
+                    self._file.close()
+                    os.replace(tmp, self.path)
+                    self._file = open(self.path, 'r+b')
+                    self._map = mmap.mmap(self._file.fileno(), 0)
+                    self._keys = keys
+                    self._series = ids
+                    self._offset = len(body) + len(tail)
+                    self._compacted_at = now
+                    self._series_full = False
+                    HISTORY_BYTES.set(self._offset)
+            logger.info(f"Compacted history to {len(samples)} samples in {time.perf_counter() - start:.3f}s")
+    
+    @staticmethod
+    def _series_record(series_id: int, key: Key) -> bytes:
+        encoded = '\x1f'.join(key).encode()
+        return SERIES.pack(KIND_SERIES, series_id, len(encoded)) + encoded
+    
+    def flush(self):
+        """Write dirty pages to disk."""
+        with self._lock:
+            if self._map is not None:
+                self._map.flush()
+    
+    def close(self):
+        """Wait for a running compaction, then flush and unmap the file."""
+        compactor = self._compactor
+        if compactor:
+            compactor.join()
+        with self._lock:
+            if self._map is None:
+                return
+            self._map.flush()
+            self._map.close()
+            self._file.close()
+            self._lockfile.close()
+            self._map = None
@@ -0,0 +1,61 @@
+"""Shared fixtures: exporter sources on sys.path and local HTTP stand-ins."""
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from prometheus_client import REGISTRY
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'exporter', 'src')
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    """Unregister metrics a test created, so collectors can be built again."""
+    before = set(REGISTRY._collector_to_names)
+    yield
+    for collector in set(REGISTRY._collector_to_names) - before:
+        REGISTRY.unregister(collector)
+
+
+class PriceHandler(BaseHTTPRequestHandler):
+    """Answer every GET with a CoinGecko simple/price document."""
+    
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        body = json.dumps(self.server.document).encode()
+        self.send_response(self.server.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with self.server.lock:
+            self.server.requests += 1
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def upstream():
+    """Keep-alive price API on an ephemeral port."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PriceHandler)
+    server.daemon_threads = True
+    server.document = {'bitcoin': {'usd': 67012.34}}
+    server.status = 200
+    server.delay = 0
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.url = f"http://127.0.0.1:{server.server_port}/api/v3/simple/price?ids=bitcoin&vs_currencies=usd"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,126 @@
+"""Tests for backfilling into the history file."""
+import threading
+import time
+
+import pytest
+
+from backfill import cli
+from providers import create_provider
+from providers.base import Candle
+from storage.history import HistoryStore
+
+
+class FakeHistoryProvider:
+    """Candle source whose chunks finish in reverse order."""
+    
+    name = 'fake'
+    max_candles = 10
+    history_granularities = (60,)
+    
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+        self.calls = []
+        self._lock = threading.Lock()
+        self._turn = threading.Condition(self._lock)
+    
+    def supports_history(self):
+        return True
+    
+    def fetch_candles(self, product, start, end, granularity):
+        with self._turn:
+            self.calls.append(start)
+            # Hold every chunk until all are in flight, then release newest first
+            self._turn.wait_for(lambda: len(self.calls) == self.chunks, 5)
+            self._turn.wait_for(lambda: max(self.calls) == start, 5)
+            self.calls.remove(start)
+            self._turn.notify_all()
+        return [Candle(t, 1.0, 1.0, 1.0, float(t)) for t in range(int(start), int(end), granularity)]
+    
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def history_config(tmp_path):
+    return {'path': str(tmp_path / 'history.bin'), 'retention': 86400}
+
+
+def backfill(monkeypatch, provider, history_config, start, end, api_config=None, args=()):
+    # The backfill provider is faked; the live provider only names the series
+    monkeypatch.setattr(cli, 'create_provider', lambda name, config: (
+        provider if 'history_endpoint' in config else create_provider(name, config)
+    ))
+    config = {'exporter': {'history': history_config}, 'api': api_config or {}}
+    argv = ['--start', str(start), '--end', str(end), '--history', '--concurrency', '4', *args]
+    return cli.run(argv, config)
+
+
+def replayed(history_config):
+    store = HistoryStore(history_config['path'], retention=86400)
+    store.open()
+    try:
+        return list(store.replay())
+    finally:
+        store.close()
+
+
+def test_out_of_order_chunks_survive_size_compaction(monkeypatch, history_config):
+    end = time.time() // 60 * 60
+    start = end - 40 * 60
+    # Big enough for the series and 30 samples, so appends trigger compactions
+    history_config['max_bytes'] = 1024
+    provider = FakeHistoryProvider(chunks=4)
+    
+    assert backfill(monkeypatch, provider, history_config, start, end) == 0
+    assert provider.closed
+    
+    timestamps = [timestamp for key, timestamp, value in replayed(history_config)]
+    # Size compaction keeps the newest candles, whatever order they arrived in
+    assert timestamps
+    assert sorted(timestamps) == [end - 60 * i for i in range(len(timestamps), 0, -1)]
+
+
+def test_range_beyond_retention_is_refused(monkeypatch, history_config):
+    end = time.time()
+    provider = FakeHistoryProvider(chunks=1)
+    
+    assert backfill(monkeypatch, provider, history_config, end - 2 * 86400, end) == 2
+    assert provider.closed
+    assert provider.calls == []
+
+
+def test_history_file_held_by_the_exporter_is_reported(monkeypatch, history_config, caplog):
+    exporter = HistoryStore(history_config['path'])
+    exporter.open()
+    end = time.time()
+    provider = FakeHistoryProvider(chunks=1)
+    try:
+        assert backfill(monkeypatch, provider, history_config, end - 600, end) == 2
+    finally:
+        exporter.close()
+    assert provider.closed
+    assert provider.calls == []
+    assert 'in use by another process' in caplog.text
+
+
+@pytest.mark.parametrize('api_config, key', [
+    ({'endpoint': 'https://api.coingecko.com/api/v3/simple/price'}, ('ethereum', 'USD', 'coingecko')),
+    ({'provider': 'coingecko', 'asset_ids': {'ETH': 'ether'}}, ('ether', 'USD', 'coingecko')),
+    ({'provider': 'coinbase'}, ('eth', 'USD', 'coinbase')),
+    ({'providers': ['coingecko', 'coinbase'], 'strategy': 'hedged'}, ('eth', 'USD', 'hedged')),
+])
+def test_samples_join_the_live_series(monkeypatch, history_config, api_config, key):
+    end = time.time() // 60 * 60
+    provider = FakeHistoryProvider(chunks=1)
+    args = ['--products', 'BTC-USD', 'ETH-USD', '--concurrency', '1']
+    assert backfill(monkeypatch, provider, history_config, end - 300, end, api_config, args) == 0
+    keys = {k for k, _, _ in replayed(history_config)}
+    assert keys == {('BTC', 'USD', key[2]), key}
+
+
+def test_source_flag_overrides_the_live_source(monkeypatch, history_config):
+    end = time.time() // 60 * 60
+    provider = FakeHistoryProvider(chunks=1)
+    assert backfill(monkeypatch, provider, history_config, end - 300, end, args=['--source', 'candles']) == 0
+    assert {k for k, _, _ in replayed(history_config)} == {('BTC', 'USD', 'candles')}
@@ -0,0 +1,116 @@
+"""Tests for the circuit breaker state machine."""
+import pytest
+import requests
+
+from providers.breaker import BreakerRegistry, CircuitBreaker, CircuitOpenError, is_upstream_failure
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.exceptions.HTTPError(f"{status} Error", response=response)
+
+
+def fail(error):
+    def fn():
+        raise error
+    return fn
+
+
+def trip(breaker, times, error=None):
+    for _ in range(times):
+        with pytest.raises(Exception):
+            breaker.call(fail(error or requests.exceptions.ConnectionError('refused')))
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker('upstream.test/price', failure_threshold=3, cooldown=60, clock=clock)
+
+
+def test_opens_after_consecutive_failures(breaker):
+    trip(breaker, 2)
+    assert breaker.state == CircuitBreaker.CLOSED
+    trip(breaker, 1)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: 'ok')
+
+
+def test_success_resets_the_failure_count(breaker):
+    trip(breaker, 2)
+    assert breaker.call(lambda: 'ok') == 'ok'
+    trip(breaker, 2)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_after_cooldown_then_closes_on_success(breaker, clock):
+    trip(breaker, 3)
+    clock.now += 60
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.call(lambda: 'ok') == 'ok'
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_failure_reopens_for_another_cooldown(breaker, clock):
+    trip(breaker, 3)
+    clock.now += 60
+    trip(breaker, 1)
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 59
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_half_open_admits_limited_trial_calls(clock):
+    breaker = CircuitBreaker('upstream.test/price', failure_threshold=1, cooldown=10,
+                             half_open_max_calls=2, clock=clock)
+    trip(breaker, 1)
+    clock.now += 10
+    assert [breaker.allow() for _ in range(3)] == [True, True, False]
+
+
+@pytest.mark.parametrize('status', [400, 401, 403, 404, 422])
+def test_client_errors_do_not_open_the_circuit(breaker, status):
+    trip(breaker, 10, http_error(status))
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_client_error_in_half_open_closes_the_circuit(breaker, clock):
+    trip(breaker, 3)
+    clock.now += 60
+    trip(breaker, 1, http_error(404))
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.parametrize('error, expected', [
+    (requests.exceptions.ConnectionError('refused'), True),
+    (requests.exceptions.ReadTimeout('slow'), True),
+    (http_error(429), True),
+    (http_error(500), True),
+    (http_error(503), True),
+    (http_error(404), False),
+    (requests.exceptions.HTTPError('no response'), False),
+    (ValueError('bad json'), False),
+])
+def test_is_upstream_failure(error, expected):
+    assert is_upstream_failure(error) is expected
+
+
+def test_registry_shares_one_breaker_per_endpoint():
+    registry = BreakerRegistry({'failure_threshold': 2})
+    assert registry.get('a') is registry.get('a')
+    assert registry.get('a') is not registry.get('b')
+    assert BreakerRegistry({'enabled': False}).get('a') is None
@@ -0,0 +1,196 @@
+"""Tests for the provider response cache and stale-while-revalidate."""
+import time
+
+import pytest
+
+from collectors.bitcoin import BitcoinCollector
+from providers import create_provider
+from providers.cache import ResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(clock):
+    return ResponseCache(ttl=30, max_entries=2, stale_while_revalidate=60, stale_if_error=600, clock=clock)
+
+
+KEY = ResponseCache.key('http://upstream.test/price', {'ids': 'bitcoin'})
+
+
+def test_key_ignores_param_order():
+    assert ResponseCache.key('u', {'a': '1', 'b': '2'}) == ResponseCache.key('u', {'b': '2', 'a': '1'})
+
+
+def test_entry_is_fresh_then_stale_then_expired(cache, clock):
+    assert cache.lookup(KEY) == (None, None)
+    cache.store(KEY, {'price': 1})
+    assert cache.lookup(KEY)[1] == ResponseCache.FRESH
+    clock.now += 31
+    assert cache.lookup(KEY)[1] == ResponseCache.STALE
+    clock.now += 60
+    entry, state = cache.lookup(KEY)
+    assert state == ResponseCache.EXPIRED
+    assert entry.value == {'price': 1}
+
+
+def test_stale_if_error_window(cache, clock):
+    cache.store(KEY, {'price': 1})
+    entry, _ = cache.lookup(KEY)
+    clock.now += 30 + 600
+    assert cache.usable_on_error(entry)
+    clock.now += 1
+    assert not cache.usable_on_error(entry)
+
+
+def test_cache_control_max_age_less_age_sets_the_ttl(cache, clock):
+    cache.store(KEY, 1, {'Cache-Control': 'public, max-age=10', 'Age': '4'})
+    clock.now += 6
+    assert cache.lookup(KEY)[1] == ResponseCache.FRESH
+    clock.now += 1
+    assert cache.lookup(KEY)[1] == ResponseCache.STALE
+
+
+def test_no_store_and_no_cache(cache, clock):
+    cache.store(KEY, 1, {'Cache-Control': 'no-store'})
+    assert cache.lookup(KEY) == (None, None)
+    cache.store(KEY, 1, {'Cache-Control': 'no-cache'})
+    clock.now += 0.001
+    # no-cache must be revalidated: never served stale, only on error
+    entry, state = cache.lookup(KEY)
+    assert state == ResponseCache.EXPIRED
+    assert cache.usable_on_error(entry)
+
+
+def test_max_age_bounds_fresh_and_stale_reuse(clock):
+    cache = ResponseCache(ttl=30, stale_while_revalidate=60, max_age=20, clock=clock)
+    cache.store(KEY, 1, {'Cache-Control': 'max-age=300'})
+    clock.now += 20
+    assert cache.lookup(KEY)[1] == ResponseCache.FRESH
+    clock.now += 1
+    assert cache.lookup(KEY)[1] == ResponseCache.EXPIRED
+    
+    cache.store(KEY, 2)
+    clock.now += 21
+    entry, state = cache.lookup(KEY)
+    assert state == ResponseCache.EXPIRED
+    assert cache.usable_on_error(entry)
+
+
+def test_headers_ignored_when_not_honored(clock):
+    cache = ResponseCache(ttl=30, honor_headers=False, clock=clock)
+    cache.store(KEY, 1, {'Cache-Control': 'no-store'})
+    assert cache.lookup(KEY)[1] == ResponseCache.FRESH
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    a, b, c = (ResponseCache.key(url, None) for url in 'abc')
+    cache.store(a, 1)
+    cache.store(b, 2)
+    cache.lookup(a)
+    cache.store(c, 3)
+    assert cache.lookup(b) == (None, None)
+    assert cache.lookup(a)[0].value == 1
+    assert len(cache) == 2
+
+
+def test_one_background_refresh_per_key(cache):
+    assert cache.begin_refresh(KEY)
+    assert not cache.begin_refresh(KEY)
+    cache.end_refresh(KEY)
+    assert cache.begin_refresh(KEY)
+
+
+def test_from_config_disabled():
+    assert ResponseCache.from_config({'enabled': False}) is None
+
+
+def cached_provider(upstream, **cache):
+    provider = create_provider('coingecko', {
+        'endpoint': upstream.url,
+        'cache': {'ttl': 30, 'stale_while_revalidate': 60, 'stale_if_error': 600, 'honor_headers': False, **cache},
+        'retry': {'max_attempts': 1},
+        'circuit_breaker': {'enabled': False},
+    })
+    provider.cache.clock = FakeClock()
+    return provider
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_provider_serves_stale_while_revalidating(upstream):
+    provider = cached_provider(upstream)
+    try:
+        assert provider.fetch_data() == {'bitcoin': {'usd': 67012.34}}
+        assert provider.fetch_data() == {'bitcoin': {'usd': 67012.34}}
+        assert upstream.requests == 1
+        
+        upstream.document = {'bitcoin': {'usd': 70000}}
+        provider.cache.clock.now += 45
+        # Stale: the old value is served at once and refreshed in the background
+        assert provider.fetch_data() == {'bitcoin': {'usd': 67012.34}}
+        assert wait_for(lambda: provider.fetch_data() == {'bitcoin': {'usd': 70000}})
+        assert upstream.requests == 2
+    finally:
+        provider.close()
+
+
+def test_provider_serves_cached_value_when_upstream_fails(upstream):
+    provider = cached_provider(upstream)
+    try:
+        provider.fetch_data()
+        provider.cache.clock.now += 200
+        upstream.status = 500
+        assert provider.fetch_data() == {'bitcoin': {'usd': 67012.34}}
+        provider.cache.clock.now += 500
+        assert provider.fetch_data() is None
+    finally:
+        provider.close()
+
+
+@pytest.mark.parametrize('interval', [30, 60, 300])
+def test_scheduled_cycles_never_publish_the_previous_cycles_response(upstream, interval):
+    collector = BitcoinCollector({
+        'exporter': {'interval': interval},
+        'api': {
+            'provider': 'coingecko',
+            'endpoint': upstream.url,
+            'cache': {'ttl': 30, 'stale_while_revalidate': 60, 'honor_headers': False},
+        },
+    })
+    try:
+        clock = collector.provider.cache.clock = FakeClock()
+        assert collector.collect()['bitcoin_price'] == 67012.34
+        upstream.document = {'bitcoin': {'usd': 70000}}
+        clock.now += interval
+        assert collector.collect()['bitcoin_price'] == 70000
+        assert upstream.requests == 2
+    finally:
+        collector.close()
+
+
+def test_on_scrape_mode_bounds_the_cache_by_min_age(upstream):
+    collector = BitcoinCollector({
+        'exporter': {'interval': 60, 'collection': {'mode': 'on_scrape', 'min_age': 10}},
+        'api': {'provider': 'coingecko', 'endpoint': upstream.url},
+    })
+    try:
+        assert collector.provider.cache.max_age == 5
+    finally:
+        collector.close()
@@ -0,0 +1,152 @@
+"""Tests for BitcoinCollector collection cycles."""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from collectors import bitcoin
+from collectors.bitcoin import BitcoinCollector
+from engine.shards import ShardPool
+
+
+def make_collector(url, **api):
+    return BitcoinCollector({'api': {'provider': 'coingecko', 'endpoint': url, 'cache': {'enabled': False}, **api}})
+
+
+class SlowStream:
+    """Stream stand-in whose stop() blocks like joining a feed thread."""
+    
+    def __init__(self, delay):
+        self.delay = delay
+    
+    def is_healthy(self):
+        return False
+    
+    def stop(self):
+        time.sleep(self.delay)
+
+
+def test_collect_async_publishes(upstream):
+    collector = make_collector(upstream.url)
+    try:
+        metrics = asyncio.run(collector.collect_async())
+        assert metrics['bitcoin_price'] == 67012.34
+    finally:
+        collector.close()
+
+
+def test_reload_during_async_fetch_does_not_wait_and_discards_results(upstream):
+    upstream.delay = 0.5
+    collector = make_collector(upstream.url)
+    
+    async def scenario():
+        cycle = asyncio.create_task(collector.collect_async())
+        await asyncio.sleep(0.1)
+        started = time.monotonic()
+        await asyncio.to_thread(collector.reconfigure, collector.config, {'api.timeout'})
+        reload_seconds = time.monotonic() - started
+        return reload_seconds, await cycle
+    
+    try:
+        reload_seconds, metrics = asyncio.run(scenario())
+    finally:
+        collector.close()
+    # The reload did not wait for the in-flight request ...
+    assert reload_seconds < 0.3
+    # ... and the cycle dropped what it fetched through the old components
+    assert metrics == {}
+
+
+def test_slow_reload_does_not_block_the_event_loop(upstream):
+    collector = make_collector(upstream.url)
+    collector.stream = SlowStream(delay=1)
+    
+    async def scenario():
+        reload = threading.Thread(target=collector.reconfigure, args=(collector.config, {'api.stream'}))
+        reload.start()
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        metrics = await collector.collect_async()
+        elapsed = time.monotonic() - started
+        await asyncio.to_thread(reload.join)
+        return elapsed, metrics
+    
+    try:
+        elapsed, metrics = asyncio.run(scenario())
+    finally:
+        collector.stream = None
+        collector.close()
+    assert elapsed < 0.5
+    assert metrics['bitcoin_price'] == 67012.34
+
+
+def error_count(collector, error_type):
+    return collector.metrics.handle('errors_total', error_type=error_type)._value.get()
+
+
+def test_missing_and_unconfigured_pairs_are_counted_not_raised(upstream):
+    upstream.document = {'bitcoin': {'usd': 67012.34}, 'ethereum': {}}
+    collector = make_collector(upstream.url, assets=['bitcoin', 'ethereum'], currencies=['usd'])
+    try:
+        metrics = collector.collect()
+        assert metrics['bitcoin_usd'] == 67012.34
+        assert error_count(collector, 'missing_pair') == 1
+        
+        # A response for a pair that is no longer configured is skipped
+        collector._publish_prices({('solana', 'usd'): 150.0, ('bitcoin', 'usd'): 1.0}, 0)
+        assert error_count(collector, 'missing_pair') == 3
+    finally:
+        collector.close()
+
+
+def test_bitcoin_usd_pair_is_recorded_once(upstream, monkeypatch):
+    collector = make_collector(upstream.url, assets=['bitcoin'], currencies=['usd'])
+    observed = []
+    monkeypatch.setattr(collector, '_observe', lambda *args: observed.append(args[:3]))
+    try:
+        collector.collect()
+    finally:
+        collector.close()
+    assert observed == [('BTC', 'USD', 'coingecko')]
+
+
+def test_failed_reload_keeps_the_running_components(upstream, monkeypatch):
+    collector = make_collector(upstream.url)
+    provider, config = collector.provider, collector.config
+    closed = []
+    create_provider = bitcoin.create_provider
+    
+    def tracked(name, api_config):
+        built = create_provider(name, api_config)
+        monkeypatch.setattr(built, 'close', lambda: closed.append(built))
+        return built
+    monkeypatch.setattr(bitcoin, 'create_provider', tracked)
+    
+    api = dict(config['api'], endpoint=upstream.url + '&x=1', stream={'provider': 'nope'})
+    try:
+        with pytest.raises(ValueError, match='Unknown stream'):
+            collector.reconfigure(dict(config, api=api), {'api.endpoint', 'api.stream'})
+        # The replacement provider was discarded; nothing was swapped in
+        assert len(closed) == 1 and closed[0] is not provider
+        assert collector.provider is provider
+        assert collector.config is config
+        assert collector.stream is None
+        assert collector.collect()['bitcoin_price'] == 67012.34
+    finally:
+        collector.close()
+
+
+def test_shard_workers_start_outside_the_collection_lock(upstream, monkeypatch):
+    collector = make_collector(upstream.url, assets=['bitcoin', 'ethereum'])
+    collector._started = True
+    locked = []
+    monkeypatch.setattr(ShardPool, 'start', lambda pool: locked.append(collector._lock.locked()))
+    
+    api = dict(collector.config['api'], shards={'workers': 2})
+    try:
+        collector.reconfigure(dict(collector.config, api=api), {'api.shards'})
+        assert locked == [False]
+        assert collector.shards is not None
+    finally:
+        collector.close()
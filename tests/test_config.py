@@ -0,0 +1,184 @@
+"""Tests for config loading, the validated snapshot and live reload."""
+import json
+
+import pytest
+
+from config import ConfigLoader, ConfigWatcher
+from config.loader import validate_config
+
+APP_CONFIG = """
+exporter:
+  port: 8000
+  interval: 60
+api:
+  provider: coingecko
+  retry:
+    max_attempts: 3
+logging:
+  level: INFO
+"""
+
+
+@pytest.fixture
+def config_dir(tmp_path, monkeypatch):
+    for name in ('ENV', 'EXPORTER_PORT', 'LOG_LEVEL', 'API_ENDPOINT'):
+        monkeypatch.delenv(name, raising=False)
+    (tmp_path / 'environments').mkdir()
+    (tmp_path / 'app-config.yaml').write_text(APP_CONFIG)
+    (tmp_path / 'environments' / 'local.yaml').write_text("exporter:\n  interval: 15\n")
+    (tmp_path / 'metrics.yaml').write_text("metrics:\n  - name: current_price\n    type: gauge\n")
+    return tmp_path
+
+
+def test_environment_file_overrides_the_base(config_dir):
+    config = ConfigLoader(str(config_dir)).load()
+    assert config['exporter'] == {'port': 8000, 'interval': 15}
+    assert config['metrics_definitions']['metrics'][0]['name'] == 'current_price'
+
+
+def test_environment_variables_override_files(config_dir, monkeypatch):
+    monkeypatch.setenv('EXPORTER_PORT', '9100')
+    monkeypatch.setenv('LOG_LEVEL', 'DEBUG')
+    config = ConfigLoader(str(config_dir)).load()
+    assert config['exporter']['port'] == 9100
+    assert config['logging']['level'] == 'DEBUG'
+
+
+def test_snapshot_is_written_and_reused(config_dir, monkeypatch):
+    first = ConfigLoader(str(config_dir)).load()
+    snapshot = json.loads((config_dir / '.snapshot-local.json').read_text())
+    assert snapshot['config'] == first
+    
+    def no_parsing(self):
+        raise AssertionError('YAML parsed despite a current snapshot')
+    monkeypatch.setattr(ConfigLoader, '_merge_files', no_parsing)
+    assert ConfigLoader(str(config_dir)).load() == first
+
+
+def test_changed_file_invalidates_the_snapshot(config_dir):
+    ConfigLoader(str(config_dir)).load()
+    (config_dir / 'environments' / 'local.yaml').write_text("exporter:\n  interval: 30\n")
+    assert ConfigLoader(str(config_dir)).load()['exporter']['interval'] == 30
+
+
+def test_environment_variables_are_not_baked_into_the_snapshot(config_dir, monkeypatch):
+    monkeypatch.setenv('EXPORTER_PORT', '9100')
+    ConfigLoader(str(config_dir)).load()
+    monkeypatch.delenv('EXPORTER_PORT')
+    assert ConfigLoader(str(config_dir)).load()['exporter']['port'] == 8000
+
+
+def test_invalid_config_is_not_snapshotted(config_dir):
+    (config_dir / 'environments' / 'local.yaml').write_text("exporter:\n  port: 0\n")
+    ConfigLoader(str(config_dir)).load()
+    assert not (config_dir / '.snapshot-local.json').exists()
+    with pytest.raises(ValueError):
+        ConfigLoader(str(config_dir)).load(strict=True)
+
+
+def test_strict_load_raises_on_malformed_yaml(config_dir):
+    (config_dir / 'app-config.yaml').write_text("exporter: [unclosed\n")
+    assert ConfigLoader(str(config_dir)).load() == {'exporter': {'interval': 15}, 'metrics_definitions': {
+        'metrics': [{'name': 'current_price', 'type': 'gauge'}]}}
+    with pytest.raises(Exception):
+        ConfigLoader(str(config_dir)).load(strict=True)
+
+
+@pytest.mark.parametrize('config, problem', [
+    ({'exporter': {'port': 70000}}, 'exporter.port'),
+    ({'exporter': {'interval': -1}}, 'exporter.interval'),
+    ({'api': []}, 'api must be a mapping'),
+    ({'metrics_definitions': {'metrics': [{'type': 'gauge'}]}}, 'without a name'),
+])
+def test_validate_config(config, problem):
+    assert any(problem in error for error in validate_config(config))
+
+
+def test_diff_reports_changed_paths():
+    old = {'exporter': {'interval': 60, 'port': 8000}, 'api': {'retry': {'max_attempts': 3}}}
+    new = {'exporter': {'interval': 30, 'port': 8000}, 'api': {'retry': {'max_attempts': 5}}, 'push': {}}
+    assert ConfigLoader.diff(old, new) == {'exporter.interval', 'api.retry', 'push'}
+
+
+def test_changed_tracks_modified_and_created_files(config_dir):
+    loader = ConfigLoader(str(config_dir))
+    loader.load()
+    assert not loader.changed()
+    (config_dir / 'labels.yaml').write_text("title: x\n")
+    assert loader.changed()
+
+
+def watcher_for(config_dir, applied):
+    loader = ConfigLoader(str(config_dir))
+    config = loader.load()
+    return ConfigWatcher(loader, config, lambda new, changes: applied.append(changes), interval=0)
+
+
+def test_reload_applies_changed_paths(config_dir):
+    applied = []
+    watcher = watcher_for(config_dir, applied)
+    (config_dir / 'environments' / 'local.yaml').write_text("exporter:\n  interval: 5\n")
+    assert watcher.reload() == {'exporter.interval'}
+    assert applied == [{'exporter.interval'}]
+    assert watcher.config['exporter']['interval'] == 5
+
+
+def test_reload_keeps_the_current_config_when_a_file_is_broken(config_dir):
+    applied = []
+    watcher = watcher_for(config_dir, applied)
+    (config_dir / 'environments' / 'local.yaml').write_text("exporter: {interval: [\n")
+    assert watcher.reload() == set()
+    assert applied == []
+    assert watcher.config['exporter']['interval'] == 15
+
+
+def test_reload_keeps_the_current_config_when_applying_fails(config_dir):
+    loader = ConfigLoader(str(config_dir))
+    config = loader.load()
+    
+    def reject(new, changes):
+        raise RuntimeError('cannot apply')
+    watcher = ConfigWatcher(loader, config, reject, interval=0)
+    (config_dir / 'environments' / 'local.yaml').write_text("exporter:\n  interval: 5\n")
+    assert watcher.reload() == set()
+    assert watcher.config['exporter']['interval'] == 15
+
+
+def test_unchanged_reload_applies_nothing(config_dir):
+    applied = []
+    watcher = watcher_for(config_dir, applied)
+    assert watcher.reload() == set()
+    assert applied == []
+
+
+def test_trigger_reloads_from_the_watcher_thread(config_dir):
+    import threading
+    done = threading.Event()
+    loader = ConfigLoader(str(config_dir))
+    watcher = ConfigWatcher(loader, loader.load(), lambda new, changes: done.set(), interval=0)
+    watcher.start()
+    try:
+        (config_dir / 'environments' / 'local.yaml').write_text("exporter:\n  interval: 7\n")
+        watcher.trigger()
+        assert done.wait(5)
+    finally:
+        watcher.stop()
+
+
+def test_exporter_reload_checks_settings_before_applying_any(upstream):
+    from collectors.bitcoin import BitcoinCollector
+    from main import BitcoinExporter
+    
+    exporter = BitcoinExporter()
+    exporter.config = {'api': {'provider': 'coingecko', 'endpoint': upstream.url}, 'logging': {'level': 'INFO'}}
+    exporter.collector = BitcoinCollector(exporter.config)
+    provider = exporter.collector.provider
+    config = dict(exporter.config, api={'provider': 'coingecko', 'endpoint': upstream.url + '&x=1'},
+                  logging={'level': 'LOUD'})
+    try:
+        with pytest.raises(ValueError, match='logging.level'):
+            exporter.reload(config, {'api.endpoint', 'logging.level'})
+        assert exporter.collector.provider is provider
+        assert exporter.config['logging']['level'] == 'INFO'
+    finally:
+        exporter.collector.close()
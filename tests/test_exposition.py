@@ -0,0 +1,96 @@
+"""Tests for the pre-rendered /metrics exposition and its HTTP handling."""
+import gzip
+
+from prometheus_client import CollectorRegistry, Gauge
+
+from server.exposition import ExpositionCache
+from server.httpd import route
+
+
+class App:
+    def __init__(self, exposition):
+        self.exposition = exposition
+    
+    def health_status(self):
+        return {'status': 'healthy'}
+
+
+def make_cache(gzip_enabled=True):
+    registry = CollectorRegistry()
+    gauge = Gauge('bitcoin_price', 'Price', registry=registry)
+    gauge.set(67012.34)
+    return ExpositionCache(registry=registry, gzip_enabled=gzip_enabled), gauge
+
+
+def test_get_renders_once_then_serves_the_snapshot():
+    cache, gauge = make_cache()
+    first = cache.get()
+    gauge.set(1)
+    assert cache.get() is first
+    assert b'bitcoin_price 67012.34' in first.body
+    assert gzip.decompress(first.gzipped) == first.body
+
+
+def test_re_renders_count_as_misses():
+    cache, gauge = make_cache()
+    cache.get()
+    cache.get()
+    cache.get()
+    assert (cache.hits, cache.misses) == (2, 1)
+    
+    # Each cycle re-renders; the first scrape of the new rendering is a miss
+    for value in range(3):
+        gauge.set(value)
+        cache.render()
+        cache.get()
+    assert (cache.hits, cache.misses) == (2, 4)
+
+
+def test_changed_registry_changes_the_etag():
+    cache, gauge = make_cache()
+    first = cache.render()
+    assert cache.render().etag == first.etag
+    gauge.set(1)
+    assert cache.render().etag != first.etag
+
+
+def test_matching_if_none_match_returns_304_with_vary():
+    cache, _ = make_cache()
+    app = App(cache)
+    status, headers, body = route(app, '/metrics', {})
+    etag = dict(headers)['ETag']
+    
+    status, headers, body = route(app, '/metrics', {'If-None-Match': etag})
+    assert status == 304
+    assert body == b''
+    assert dict(headers) == {'ETag': etag, 'Vary': 'Accept-Encoding'}
+    
+    assert route(app, '/metrics', {'If-None-Match': '"stale"'})[0] == 200
+
+
+def test_gzip_is_negotiated_from_accept_encoding():
+    cache, _ = make_cache()
+    app = App(cache)
+    status, headers, body = route(app, '/metrics', {'Accept-Encoding': 'deflate, gzip;q=0.8'})
+    headers = dict(headers)
+    assert status == 200
+    assert headers['Content-Encoding'] == 'gzip'
+    assert headers['Vary'] == 'Accept-Encoding'
+    assert gzip.decompress(body) == cache.get().body
+    
+    status, headers, body = route(app, '/metrics', {'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in dict(headers)
+    assert body == cache.get().body
+
+
+def test_gzip_disabled_serves_identity():
+    cache, _ = make_cache(gzip_enabled=False)
+    status, headers, body = route(App(cache), '/metrics', {'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in dict(headers)
+    assert body == cache.get().body
+
+
+def test_health_and_unknown_paths():
+    app = App(make_cache()[0])
+    assert route(app, '/health', {})[2] == b'{"status": "healthy"}'
+    assert route(app, '/nope', {})[0] == 404
@@ -0,0 +1,138 @@
+"""Tests for the hedged and median multi-provider fan-out."""
+import threading
+import time
+
+import pytest
+
+from providers.fanout import HEDGED_REQUESTS, PriceAggregator
+
+
+class FakeProvider:
+    """Provider stand-in answering `price` after `delay`, or failing with None."""
+    
+    def __init__(self, name, price, delay=0.0):
+        self.name = name
+        self.price = price
+        self.delay = delay
+        self.started = threading.Event()
+        self.started_at = None
+        self.closed = False
+    
+    def fetch_data(self):
+        self.started_at = time.monotonic()
+        self.started.set()
+        time.sleep(self.delay)
+        return None if self.price is None else {'price': self.price}
+    
+    def parse_response(self, raw_data):
+        return {'bitcoin_price': raw_data['price']}
+    
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def aggregate():
+    aggregators = []
+    
+    def make(providers, **kwargs):
+        aggregator = PriceAggregator(providers, **kwargs)
+        aggregators.append(aggregator)
+        return aggregator
+    yield make
+    for aggregator in aggregators:
+        aggregator.close()
+
+
+def test_hedged_sends_the_backup_after_the_hedge_delay(aggregate):
+    slow = FakeProvider('slow', 1.0, delay=1)
+    fast = FakeProvider('fast', 2.0)
+    aggregator = aggregate([slow, fast], strategy='hedged', hedge_min_delay=0.05, timeout=5)
+    # Usually answers within 0.2s, so hedge after that rather than after timeout / 2
+    aggregator._latencies['slow'].extend([0.2] * 20)
+    hedged = HEDGED_REQUESTS._value.get()
+    
+    started = time.monotonic()
+    assert aggregator.fetch_price()['bitcoin_price'] == 2.0
+    elapsed = time.monotonic() - started
+    assert 0.2 <= fast.started_at - slow.started_at < 0.5
+    assert elapsed < 0.8
+    assert HEDGED_REQUESTS._value.get() == hedged + 1
+
+
+def test_hedged_does_not_hedge_a_fast_primary(aggregate):
+    primary = FakeProvider('primary', 1.0)
+    backup = FakeProvider('backup', 2.0)
+    aggregator = aggregate([primary, backup], strategy='hedged', hedge_min_delay=0.5, timeout=5)
+    assert aggregator.fetch_price()['bitcoin_price'] == 1.0
+    assert not backup.started.is_set()
+
+
+def test_hedged_moves_on_at_once_when_a_provider_fails(aggregate):
+    broken = FakeProvider('broken', None)
+    backup = FakeProvider('backup', 2.0)
+    aggregator = aggregate([broken, backup], strategy='hedged', hedge_min_delay=5, timeout=10)
+    started = time.monotonic()
+    assert aggregator.fetch_price()['bitcoin_price'] == 2.0
+    assert time.monotonic() - started < 1
+
+
+def test_hedge_delay_follows_the_latency_percentile(aggregate):
+    provider = FakeProvider('p', 1.0)
+    aggregator = aggregate([provider], strategy='hedged', hedge_min_delay=0.1, timeout=8)
+    assert aggregator.hedge_delay(provider) == 4
+    aggregator._latencies['p'].extend([0.2] * 95 + [3.0] * 5)
+    assert aggregator.hedge_delay(provider) == 3.0
+    aggregator.hedge_percentile = 50
+    assert aggregator.hedge_delay(provider) == 0.2
+
+
+def test_median_of_an_odd_number_of_providers(aggregate):
+    providers = [FakeProvider('a', 100.0), FakeProvider('b', 103.0), FakeProvider('c', 101.0)]
+    aggregator = aggregate(providers, quorum=3)
+    assert aggregator.fetch_price()['bitcoin_price'] == 101.0
+
+
+def test_median_of_an_even_number_of_providers(aggregate):
+    providers = [FakeProvider(name, price) for name, price in zip('abcd', [100.0, 104.0, 101.0, 103.0])]
+    aggregator = aggregate(providers, quorum=4)
+    assert aggregator.fetch_price()['bitcoin_price'] == 102.0
+
+
+def test_median_returns_once_the_quorum_answers(aggregate):
+    providers = [FakeProvider('a', 100.0), FakeProvider('b', 102.0), FakeProvider('slow', 500.0, delay=2)]
+    aggregator = aggregate(providers)
+    assert aggregator.quorum == 2
+    started = time.monotonic()
+    assert aggregator.fetch_price()['bitcoin_price'] == 101.0
+    assert time.monotonic() - started < 1
+
+
+def test_median_without_a_quorum_returns_nothing(aggregate):
+    providers = [FakeProvider('a', 100.0), FakeProvider('b', None), FakeProvider('c', None)]
+    assert aggregate(providers).fetch_price() == {}
+
+
+@pytest.mark.parametrize('strategy', PriceAggregator.STRATEGIES)
+def test_all_providers_failing_returns_nothing(aggregate, strategy):
+    providers = [FakeProvider('a', None), FakeProvider('b', None), FakeProvider('c', None, delay=0.1)]
+    aggregator = aggregate(providers, strategy=strategy, hedge_min_delay=0.05, timeout=2)
+    started = time.monotonic()
+    assert aggregator.fetch_price() == {}
+    assert time.monotonic() - started < 1
+    assert all(p.started.is_set() for p in providers)
+
+
+@pytest.mark.parametrize('strategy', PriceAggregator.STRATEGIES)
+def test_providers_that_never_answer_time_out(aggregate, strategy):
+    providers = [FakeProvider('a', 1.0, delay=2), FakeProvider('b', 2.0, delay=2)]
+    aggregator = aggregate(providers, strategy=strategy, hedge_min_delay=0.05, timeout=0.3)
+    started = time.monotonic()
+    assert aggregator.fetch_price() == {}
+    assert time.monotonic() - started < 1
+
+
+def test_close_closes_every_provider():
+    providers = [FakeProvider('a', 1.0), FakeProvider('b', 2.0)]
+    PriceAggregator(providers).close()
+    assert all(p.closed for p in providers)
@@ -0,0 +1,266 @@
+"""Tests for the memory-mapped history file."""
+import os
+import threading
+import time
+
+import pytest
+
+from storage import history as history_module
+from storage.history import HEADER, MAGIC, SAMPLE, SERIES, HistoryStore
+
+KEY = ('BTC', 'USD', 'coingecko')
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'history.bin')
+
+
+def opened(path, **kwargs):
+    store = HistoryStore(path, **kwargs)
+    store.open()
+    return store
+
+
+def data_of(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_file_layout(path):
+    store = opened(path)
+    store.append(KEY, 1700000000.5, 67012.34)
+    store.append(KEY, 1700000060.0, 67020.0)
+    store.close()
+    
+    data = data_of(path)
+    assert HEADER.unpack_from(data, 0) == (MAGIC, 0)
+    offset = HEADER.size
+    encoded = b'BTC\x1fUSD\x1fcoingecko'
+    assert SERIES.unpack_from(data, offset) == (2, 0, len(encoded))
+    offset += SERIES.size
+    assert data[offset:offset + len(encoded)] == encoded
+    offset += len(encoded)
+    assert SAMPLE.unpack_from(data, offset) == (1, 0, 1700000000.5, 67012.34)
+    assert SAMPLE.unpack_from(data, offset + SAMPLE.size) == (1, 0, 1700000060.0, 67020.0)
+    # End of data is marked by a zero kind byte
+    assert data[offset + 2 * SAMPLE.size] == 0
+
+
+def test_reopen_replays_samples_in_file_order(path):
+    store = opened(path)
+    other = ('ethereum', 'USD', 'coingecko')
+    store.append(KEY, 10.0, 1.0)
+    store.append(other, 11.0, 2.0)
+    store.append(KEY, 12.0, 3.0)
+    store.close()
+    
+    store = opened(path)
+    assert list(store.replay()) == [(KEY, 10.0, 1.0), (other, 11.0, 2.0), (KEY, 12.0, 3.0)]
+    assert list(store.replay(since=11.0)) == [(other, 11.0, 2.0), (KEY, 12.0, 3.0)]
+    store.append(other, 13.0, 4.0)
+    assert list(store.replay(since=13.0)) == [(other, 13.0, 4.0)]
+    store.close()
+
+
+def test_torn_sample_at_the_end_is_dropped_and_overwritten(path):
+    store = opened(path, grow_bytes=4096)
+    store.append(KEY, 10.0, 1.0)
+    store.append(KEY, 11.0, 2.0)
+    end = store._offset
+    store.close()
+    with open(path, 'r+b') as f:
+        f.truncate(end - SAMPLE.size // 2)
+    
+    store = opened(path, grow_bytes=4096)
+    assert list(store.replay()) == [(KEY, 10.0, 1.0)]
+    store.append(KEY, 12.0, 3.0)
+    store.close()
+    store = opened(path, grow_bytes=4096)
+    assert list(store.replay()) == [(KEY, 10.0, 1.0), (KEY, 12.0, 3.0)]
+    store.close()
+
+
+def test_torn_series_record_is_dropped(path):
+    store = opened(path, grow_bytes=4096)
+    store.append(KEY, 10.0, 1.0)
+    end = store._offset
+    store.append(('ethereum', 'USD', 'coingecko'), 11.0, 2.0)
+    store.close()
+    with open(path, 'r+b') as f:
+        f.truncate(end + SERIES.size + 3)
+    
+    store = opened(path, grow_bytes=4096)
+    assert list(store.replay()) == [(KEY, 10.0, 1.0)]
+    assert store._offset == end
+    store.close()
+
+
+def test_unknown_record_kind_ends_the_data(path):
+    store = opened(path, grow_bytes=4096)
+    store.append(KEY, 10.0, 1.0)
+    end = store._offset
+    store.close()
+    with open(path, 'r+b') as f:
+        f.seek(end)
+        f.write(b'\x07garbage')
+    
+    store = opened(path, grow_bytes=4096)
+    assert list(store.replay()) == [(KEY, 10.0, 1.0)]
+    store.close()
+
+
+def test_foreign_file_is_replaced(path):
+    with open(path, 'wb') as f:
+        f.write(b'not a history file at all')
+    store = opened(path)
+    assert list(store.replay()) == []
+    store.close()
+    assert data_of(path).startswith(MAGIC)
+
+
+def test_second_writer_is_refused(path):
+    store = opened(path)
+    try:
+        with pytest.raises(ValueError, match='in use'):
+            opened(path)
+    finally:
+        store.close()
+
+
+def test_compaction_drops_samples_outside_retention_and_unused_series(path):
+    store = opened(path, retention=100)
+    gone = ('solana', 'USD', 'coingecko')
+    store.append(gone, 50.0, 9.0)
+    store.append(KEY, 100.0, 1.0)
+    store.append(KEY, 200.0, 2.0)
+    store.compact(now=250.0)
+    assert list(store.replay()) == [(KEY, 200.0, 2.0)]
+    assert store._keys == [KEY]
+    store.close()
+    
+    store = opened(path, retention=100)
+    assert list(store.replay()) == [(KEY, 200.0, 2.0)]
+    store.close()
+
+
+def test_size_compaction_is_not_repeated_on_every_append(path, monkeypatch):
+    compactions = []
+    original = HistoryStore._compact
+    
+    def counting(self, now):
+        compactions.append(now)
+        original(self, now)
+    monkeypatch.setattr(HistoryStore, '_compact', counting)
+    
+    max_bytes = 4096
+    store = opened(path, retention=10 ** 9, max_bytes=max_bytes, grow_bytes=4096)
+    for i in range(3000):
+        store.append(KEY, 1000.0 + i, float(i))
+        if store._compactor:
+            store._compactor.join()
+        assert store._offset <= max_bytes + SAMPLE.size
+    samples = list(store.replay())
+    store.close()
+    
+    # Each compaction frees a quarter of max_bytes, so appends run between them
+    assert len(compactions) <= 3000 * SAMPLE.size // (max_bytes // 4) + 1
+    # What is kept is the newest samples
+    assert samples[-1] == (KEY, 3999.0, 2999.0)
+    assert [t for _, t, _ in samples] == sorted(t for _, t, _ in samples)
+
+
+def test_append_does_not_wait_for_compaction(path, monkeypatch):
+    store = opened(path, retention=100, compact_interval=0)
+    entered, release = threading.Event(), threading.Event()
+    fsync = os.fsync
+    
+    def slow_fsync(fd):
+        entered.set()
+        release.wait(5)
+        fsync(fd)
+    monkeypatch.setattr(history_module.os, 'fsync', slow_fsync)
+    
+    now = time.time()
+    store.append(KEY, now - 500, 1.0)
+    assert entered.wait(5)
+    # Compaction is parked after its snapshot; appends and replays carry on
+    started = time.monotonic()
+    store.append(KEY, now, 2.0)
+    store.append(('ETH', 'USD', 'coingecko'), now, 3.0)
+    assert [value for _, _, value in store.replay()] == [1.0, 2.0, 3.0]
+    assert time.monotonic() - started < 1
+    
+    release.set()
+    store._compactor.join(5)
+    # The expired sample is gone; those appended during compaction were carried over
+    assert list(store.replay()) == [(KEY, now, 2.0), (('ETH', 'USD', 'coingecko'), now, 3.0)]
+    store.close()
+    
+    store = opened(path, retention=100)
+    assert [value for _, _, value in store.replay()] == [2.0, 3.0]
+    store.close()
+
+
+def test_close_waits_for_a_running_compaction(path, monkeypatch):
+    store = opened(path, retention=100, compact_interval=0)
+    entered = threading.Event()
+    fsync = os.fsync
+    
+    def slow_fsync(fd):
+        entered.set()
+        time.sleep(0.2)
+        fsync(fd)
+    monkeypatch.setattr(history_module.os, 'fsync', slow_fsync)
+    
+    store.append(KEY, time.time(), 1.0)
+    assert entered.wait(5)
+    store.close()
+    assert not store._compactor.is_alive()
+    assert not os.path.exists(f"{path}.tmp")
+    
+    store = opened(path, retention=100)
+    assert [value for _, _, value in store.replay()] == [1.0]
+    store.close()
+
+
+def test_without_fcntl_the_file_opens_unlocked(path, monkeypatch):
+    monkeypatch.setattr(history_module, 'fcntl', None)
+    store = opened(path)
+    store.append(KEY, 1.0, 2.0)
+    assert list(store.replay()) == [(KEY, 1.0, 2.0)]
+    store.close()
+
+
+def test_series_id_limit_drops_new_series_instead_of_failing(path, monkeypatch):
+    monkeypatch.setattr(history_module, 'MAX_SERIES', 3)
+    store = opened(path)
+    for i in range(5):
+        store.append((f"asset{i}", 'USD', 'test'), 10.0, float(i))
+    assert [key[0] for key, _, _ in store.replay()] == ['asset0', 'asset1', 'asset2']
+    
+    # Compaction renumbers the series with samples, freeing the others' ids;
+    # appends compact against the wall clock, so retention reaches back to t=15
+    now = time.time()
+    store.retention = now - 15
+    store.append(('asset0', 'USD', 'test'), 20.0, 1.0)
+    store.compact(now=now)
+    store.append(('asset9', 'USD', 'test'), 21.0, 2.0)
+    assert [key[0] for key, _, _ in store.replay()] == ['asset0', 'asset9']
+    store.close()
+
+
+def test_u16_series_ids_round_trip_at_the_limit(path):
+    store = opened(path, max_bytes=64 << 20)
+    for i in range(history_module.MAX_SERIES + 1):
+        store.append((str(i),), 1.0, float(i))
+    assert len(store._keys) == history_module.MAX_SERIES
+    store.close()
+    store = opened(path, max_bytes=64 << 20)
+    last = list(store.replay())[-1]
+    assert last == ((str(history_module.MAX_SERIES - 1),), 1.0, float(history_module.MAX_SERIES - 1))
+    store.close()
+
+
+def test_from_config_disabled():
+    assert HistoryStore.from_config({}) is None
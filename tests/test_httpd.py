@@ -0,0 +1,130 @@
+"""Tests for the threaded and async /metrics servers."""
+import http.client
+import socket
+import threading
+import time
+
+import pytest
+from prometheus_client import CollectorRegistry, Gauge
+
+from server.exposition import ExpositionCache
+from server.httpd import start_server
+
+
+class App:
+    """Exporter stand-in whose /metrics blocks until `release` is set."""
+    
+    def __init__(self):
+        registry = CollectorRegistry()
+        Gauge('bitcoin_price', 'Price', registry=registry).set(67012.34)
+        self.exposition = ExpositionCache(registry=registry)
+        self.release = threading.Event()
+        self.release.set()
+        self.entered = threading.Semaphore(0)
+        self.exposition.refresh = self._refresh
+    
+    def _refresh(self):
+        self.entered.release()
+        self.release.wait(10)
+    
+    def health_status(self):
+        return {'status': 'healthy'}
+
+
+@pytest.fixture(params=['threaded', 'async'])
+def serve(request):
+    servers = []
+    apps = []
+    
+    def make(**config):
+        app = App()
+        server = start_server(app, 0, {'mode': request.param, **config})
+        servers.append(server)
+        apps.append(app)
+        return app, server.server_port
+    make.mode = request.param
+    yield make
+    for app in apps:
+        app.release.set()
+    for server in servers:
+        server.shutdown()
+        if hasattr(server, 'server_close'):
+            server.server_close()
+
+
+def get(port, path, timeout=5):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    try:
+        conn.request('GET', path)
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+
+def test_keep_alive_serves_several_requests_on_one_connection(serve):
+    app, port = serve()
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    conn.request('GET', '/metrics')
+    first = conn.getresponse()
+    assert first.status == 200
+    assert b'bitcoin_price 67012.34' in first.read()
+    sock = conn.sock
+    
+    conn.request('GET', '/health')
+    second = conn.getresponse()
+    assert second.status == 200
+    assert second.read() == b'{"status": "healthy"}'
+    assert conn.sock is sock
+    conn.close()
+
+
+def test_requests_beyond_the_worker_cap_get_503_at_once(serve):
+    app, port = serve(max_workers=1, request_timeout=5)
+    app.release.clear()
+    blocked = threading.Thread(target=get, args=(port, '/metrics'))
+    blocked.start()
+    assert app.entered.acquire(timeout=5)
+    
+    started = time.monotonic()
+    assert get(port, '/metrics')[0] == 503
+    # The async server answers /health on its loop; the threaded one has no worker left
+    assert get(port, '/health')[0] == (200 if serve.mode == 'async' else 503)
+    assert time.monotonic() - started < 1
+    
+    app.release.set()
+    blocked.join(5)
+    # The worker is freed once the closed connection is noticed
+    deadline = time.monotonic() + 5
+    while get(port, '/metrics')[0] != 200:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def test_idle_keep_alive_connection_is_closed_after_the_request_timeout(serve):
+    app, port = serve(request_timeout=0.3)
+    sock = socket.create_connection(('127.0.0.1', port), timeout=5)
+    started = time.monotonic()
+    assert sock.recv(1) == b''
+    assert 0.2 < time.monotonic() - started < 3
+    sock.close()
+
+
+def test_async_metrics_slower_than_the_request_timeout_gets_503():
+    app = App()
+    server = start_server(app, 0, {'mode': 'async', 'request_timeout': 0.3, 'max_workers': 1})
+    app.release.clear()
+    try:
+        started = time.monotonic()
+        assert get(server.server_port, '/metrics')[0] == 503
+        assert time.monotonic() - started < 3
+        # The stuck worker still holds the only slot until it finishes
+        assert get(server.server_port, '/metrics')[0] == 503
+        app.release.set()
+        deadline = time.monotonic() + 5
+        while get(server.server_port, '/metrics')[0] != 200:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+    finally:
+        app.release.set()
+        server.shutdown()
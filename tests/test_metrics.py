@@ -0,0 +1,67 @@
+"""Tests for building metrics from metrics.yaml definitions."""
+import pytest
+from prometheus_client import CollectorRegistry
+
+from metrics.factory import MetricFactory
+
+
+def make(definitions, **kwargs):
+    registry = CollectorRegistry()
+    return MetricFactory(definitions, registry=registry, **kwargs), registry
+
+
+def names(registry):
+    return {family.name for family in registry.collect()}
+
+
+def test_exported_names_follow_namespace_and_subsystem():
+    metrics, registry = make([
+        {'name': 'last_updated', 'type': 'gauge'},
+        {'name': 'price_change_24h', 'type': 'gauge', 'subsystem': ''},
+        {'name': 'load_seconds', 'type': 'gauge', 'subsystem': 'exporter'},
+        {'name': 'current_price', 'type': 'gauge', 'metric_name': 'bitcoin_price', 'labels': ['currency']},
+    ], namespace='bitcoin', subsystem='api')
+    assert names(registry) == {
+        'bitcoin_api_last_updated', 'bitcoin_price_change_24h', 'bitcoin_exporter_load_seconds', 'bitcoin_price',
+    }
+    assert 'current_price' in metrics
+    assert 'bitcoin_price' not in metrics
+
+
+def test_types_labels_and_buckets_come_from_the_definition():
+    metrics, registry = make([
+        {'name': 'errors_total', 'type': 'counter', 'labels': ['error_type'], 'description': 'Errors'},
+        {'name': 'latency', 'type': 'histogram', 'buckets': [0.1, 1]},
+        {'name': 'sizes', 'type': 'summary'},
+    ])
+    metrics.handle('errors_total', error_type='timeout').inc()
+    metrics['latency'].observe(0.5)
+    families = {family.name: family for family in registry.collect()}
+    assert families['errors'].type == 'counter'
+    assert families['errors'].documentation == 'Errors'
+    assert families['errors'].samples[0].labels == {'error_type': 'timeout'}
+    buckets = [sample.labels['le'] for sample in families['latency'].samples if sample.name == 'latency_bucket']
+    assert buckets == ['0.1', '1.0', '+Inf']
+    assert families['sizes'].type == 'summary'
+
+
+def test_unknown_type_is_rejected():
+    with pytest.raises(ValueError, match='Unknown metric type'):
+        make([{'name': 'odd', 'type': 'enum'}])
+
+
+def test_merge_overrides_by_name():
+    merged = MetricFactory.merge(
+        [{'name': 'a', 'type': 'gauge', 'description': 'A'}, {'name': 'b', 'type': 'gauge'}],
+        [{'name': 'a', 'description': 'Overridden'}],
+        None,
+    )
+    assert merged == [{'name': 'a', 'type': 'gauge', 'description': 'Overridden'}, {'name': 'b', 'type': 'gauge'}]
+
+
+def test_handles_are_cached_per_label_set():
+    metrics, registry = make([{'name': 'price', 'type': 'gauge', 'labels': ['asset']}, {'name': 'up'}])
+    btc = metrics.handle('price', asset='btc')
+    assert metrics.handle('price', asset='btc') is btc
+    assert metrics.handle('price', asset='eth') is not btc
+    assert metrics.handle('up') is metrics['up']
@@ -0,0 +1,189 @@
+"""Tests for collecting on scrape within freshness bounds."""
+import threading
+import time
+
+import pytest
+from prometheus_client import CollectorRegistry, Gauge
+
+from engine.on_scrape import ON_SCRAPE_REQUESTS, OnScrapeCollection
+from server.exposition import ExpositionCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+class BlockingCollector:
+    """collect() stand-in that waits for `release` and counts its calls."""
+    
+    def __init__(self):
+        self.calls = 0
+        self.ok = True
+        self.release = threading.Event()
+        self.release.set()
+        self.entered = threading.Event()
+        self._lock = threading.Lock()
+    
+    def collect(self):
+        with self._lock:
+            self.calls += 1
+        self.entered.set()
+        self.release.wait(10)
+        return {'bitcoin_price': 67012.34} if self.ok else {}
+
+
+def served(result):
+    return ON_SCRAPE_REQUESTS.labels(result=result)._value.get()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def collector():
+    collector = BlockingCollector()
+    yield collector
+    collector.release.set()
+
+
+def make(collector, clock, **kwargs):
+    settings = dict(min_age=10, max_age=60, timeout=5, clock=clock)
+    settings.update(kwargs)
+    return OnScrapeCollection(collector, **settings)
+
+
+def scrape_in_thread(on_scrape):
+    thread = threading.Thread(target=on_scrape.refresh)
+    thread.start()
+    return thread
+
+
+def test_first_scrape_waits_for_the_collection(collector, clock):
+    on_scrape = make(collector, clock)
+    assert on_scrape.age() is None
+    on_scrape.refresh()
+    assert collector.calls == 1
+    assert on_scrape.age() == 0
+
+
+def test_data_younger_than_min_age_is_served_without_collecting(collector, clock):
+    on_scrape = make(collector, clock)
+    on_scrape.refresh()
+    cached = served('cached')
+    clock.now += 9
+    on_scrape.refresh()
+    assert collector.calls == 1
+    assert served('cached') == cached + 1
+
+
+def test_data_within_max_age_is_served_while_refreshing(collector, clock):
+    on_scrape = make(collector, clock)
+    on_scrape.refresh()
+    clock.now += 30
+    collector.release.clear()
+    collector.entered.clear()
+    
+    started = time.monotonic()
+    on_scrape.refresh()
+    assert time.monotonic() - started < 1
+    assert collector.entered.wait(5)
+    assert on_scrape.age() == 30
+    
+    collector.release.set()
+    deadline = time.monotonic() + 5
+    while on_scrape.age() != 0:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_data_older_than_max_age_makes_the_scrape_wait(collector, clock):
+    on_scrape = make(collector, clock)
+    on_scrape.refresh()
+    clock.now += 61
+    collector.release.clear()
+    
+    scrape = scrape_in_thread(on_scrape)
+    scrape.join(0.3)
+    assert scrape.is_alive()
+    collector.release.set()
+    scrape.join(5)
+    assert not scrape.is_alive()
+    assert on_scrape.age() == 0
+
+
+def test_concurrent_scrapes_share_one_collection(collector, clock):
+    on_scrape = make(collector, clock)
+    collector.release.clear()
+    scrapes = [scrape_in_thread(on_scrape) for _ in range(10)]
+    assert collector.entered.wait(5)
+    time.sleep(0.1)
+    collector.release.set()
+    for scrape in scrapes:
+        scrape.join(5)
+    assert collector.calls == 1
+    assert on_scrape.age() == 0
+    
+    # Past min_age the next scrapes again start exactly one collection
+    clock.now += 61
+    collector.release.clear()
+    scrapes = [scrape_in_thread(on_scrape) for _ in range(10)]
+    time.sleep(0.1)
+    collector.release.set()
+    for scrape in scrapes:
+        scrape.join(5)
+    assert collector.calls == 2
+
+
+def test_slow_collection_times_out_to_the_last_snapshot(collector, clock):
+    registry = CollectorRegistry()
+    gauge = Gauge('bitcoin_price', 'Price', registry=registry)
+    gauge.set(1.0)
+    exposition = ExpositionCache(registry=registry)
+    on_scrape = make(collector, clock, timeout=0.2, on_collect=exposition.render)
+    exposition.refresh = on_scrape.refresh
+    previous = exposition.get()
+    
+    clock.now += 61
+    collector.release.clear()
+    waited = served('waited')
+    started = time.monotonic()
+    assert exposition.get() is previous
+    assert 0.2 <= time.monotonic() - started < 2
+    assert served('waited') == waited + 1
+    assert on_scrape.age() == 61
+    
+    # The late collection still lands and re-renders
+    gauge.set(2.0)
+    collector.release.set()
+    deadline = time.monotonic() + 5
+    while exposition.get(refresh=False) is previous:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert b'bitcoin_price 2.0' in exposition.get(refresh=False).body
+
+
+def test_failed_collection_is_not_retried_within_min_age(collector, clock):
+    on_scrape = make(collector, clock)
+    collector.ok = False
+    on_scrape.refresh()
+    assert on_scrape.age() is None
+    clock.now += 5
+    on_scrape.refresh()
+    assert collector.calls == 1
+    
+    collector.ok = True
+    clock.now += 5
+    on_scrape.refresh()
+    assert collector.calls == 2
+    assert on_scrape.age() == 0
+
+
+def test_max_age_below_min_age_is_rejected(collector):
+    with pytest.raises(ValueError, match='max_age'):
+        OnScrapeCollection(collector, min_age=30, max_age=10)
@@ -0,0 +1,19 @@
+"""Tests for provider defaults and response parsing."""
+from providers import create_provider
+
+
+def test_coindesk_default_is_the_coinbase_spot_price():
+    provider = create_provider('coindesk', {})
+    try:
+        assert provider.endpoint == 'https://api.coinbase.com/v2/prices/BTC-USD/spot'
+        assert provider.parse_response({'data': {'amount': '67012.34'}})['bitcoin_price'] == 67012.34
+    finally:
+        provider.close()
+
+
+def test_endpoint_host_picks_the_provider():
+    provider = create_provider('coindesk', {'endpoint': 'https://api.coingecko.com/api/v3/simple/price'})
+    try:
+        assert provider.name == 'coingecko'
+    finally:
+        provider.close()
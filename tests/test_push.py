@@ -0,0 +1,343 @@
+"""Tests for push mode: the remote-write wire format and queue, and the Pushgateway pusher."""
+import math
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from prometheus_client import CollectorRegistry, Gauge
+
+from engine.on_scrape import ON_SCRAPE_REQUESTS, OnScrapeCollection
+from push import protocol
+from push.base import PUSH_SAMPLES
+from push.pushgateway import PushgatewayPusher
+from push.protocol import compress, decompress, encode_labels, encode_write_request
+from push.remote_write import RemoteWriteQueue, _Shard
+from server.exposition import ExpositionCache
+
+
+# Reference decoders, written from the protobuf and snappy format
+# descriptions rather than from push.protocol
+
+def read_varint(data, pos):
+    result = 0
+    for shift in range(0, 70, 7):
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return result, pos
+    raise ValueError('varint too long')
+
+
+def message(data):
+    """Fields of one protobuf message as {number: [raw values]}."""
+    fields = {}
+    pos = 0
+    while pos < len(data):
+        key, pos = read_varint(data, pos)
+        number, wire = key >> 3, key & 7
+        if wire == 0:
+            value, pos = read_varint(data, pos)
+        elif wire == 1:
+            value, pos = data[pos:pos + 8], pos + 8
+        elif wire == 2:
+            length, pos = read_varint(data, pos)
+            value, pos = data[pos:pos + length], pos + length
+        else:
+            raise ValueError(f'unexpected wire type {wire}')
+        fields.setdefault(number, []).append((wire, value))
+    assert pos == len(data)
+    return fields
+
+
+def reference_write_request(data):
+    """prometheus.WriteRequest as [(labels, [(value, timestamp)])]."""
+    series = []
+    for wire, timeseries in message(data).get(1, []):
+        assert wire == 2
+        fields = message(timeseries)
+        labels = []
+        for _, label in fields.get(1, []):
+            label = message(label)
+            labels.append((label[1][0][1].decode(), label[2][0][1].decode()))
+        samples = []
+        for _, sample in fields.get(2, []):
+            sample = message(sample)
+            wire, value = sample[1][0]
+            assert wire == 1
+            wire, timestamp = sample[2][0]
+            assert wire == 0
+            # int64 is sent as its two's complement
+            if timestamp >= 1 << 63:
+                timestamp -= 1 << 64
+            samples.append((struct.unpack('<d', value)[0], timestamp))
+        series.append((tuple(labels), samples))
+    return series
+
+
+def reference_snappy(data):
+    """Decode a snappy block: uncompressed length, then literal and copy elements."""
+    length, pos = read_varint(data, 0)
+    out = bytearray()
+    while pos < len(data):
+        tag = data[pos]
+        pos += 1
+        if tag & 3 == 0:
+            size = tag >> 2
+            if size >= 60:
+                extra = size - 59
+                size = int.from_bytes(data[pos:pos + extra], 'little')
+                pos += extra
+            size += 1
+            out += data[pos:pos + size]
+            pos += size
+            continue
+        if tag & 3 == 1:
+            size = 4 + ((tag >> 2) & 7)
+            offset = (tag >> 5) << 8 | data[pos]
+            pos += 1
+        else:
+            extra = 2 if tag & 3 == 2 else 4
+            size = 1 + (tag >> 2)
+            offset = int.from_bytes(data[pos:pos + extra], 'little')
+            pos += extra
+        start = len(out) - offset
+        for i in range(size):
+            out.append(out[start + i])
+    assert len(out) == length
+    return bytes(out)
+
+
+LABELS = (('__name__', 'crypto_price'), ('asset', 'ethereum'), ('currency', 'USD'), ('source', 'coingecko'))
+
+
+def test_write_request_matches_the_reference_decoder():
+    long_labels = (('__name__', 'bitcoin_price'), ('note', 'é' * 200))
+    series = [
+        (encode_labels(LABELS), [(3456.78, 1700000000000), (3457.0, 1700000015000)]),
+        (encode_labels(long_labels), [(-0.5, -1), (float('inf'), 0)]),
+    ]
+    decoded = reference_write_request(encode_write_request(series))
+    assert decoded == [
+        (LABELS, [(3456.78, 1700000000000), (3457.0, 1700000015000)]),
+        (long_labels, [(-0.5, -1), (float('inf'), 0)]),
+    ]
+    
+    nan = reference_write_request(encode_write_request([(encode_labels(LABELS), [(float('nan'), 1)])]))
+    assert math.isnan(nan[0][1][0][0])
+
+
+@pytest.mark.parametrize('size', [0, 59, 60, 255, 256, 70000, 200000])
+def test_compressed_blocks_decode_with_the_reference_decoder(size):
+    data = bytes(i % 251 for i in range(size))
+    assert reference_snappy(compress(data)) == data
+    assert decompress(compress(data)) == data
+
+
+def test_fallback_compressor_writes_literals(monkeypatch):
+    monkeypatch.setattr(protocol, 'snappy', None)
+    data = b'x' * 100
+    assert compress(data) == bytes([100, 60 << 2, 99]) + data
+
+
+def test_decompress_handles_copies():
+    # "abcd" as a literal, then an 8-byte copy at offset 4 (1-byte offset)
+    # and a 4-byte copy at offset 12 (2-byte offset)
+    block = bytes([16, 3 << 2]) + b'abcd' + bytes([(4 << 2) | 1, 4]) + bytes([(3 << 2) | 2, 12, 0])
+    assert reference_snappy(block) == b'abcd' * 4
+    assert decompress(block) == b'abcd' * 4
+    with pytest.raises(ValueError, match='offset'):
+        decompress(bytes([8, 3 << 2]) + b'abcd' + bytes([(0 << 2) | 1, 9]))
+
+
+def queued(count, value=1.0):
+    return [(LABELS, value, i) for i in range(count)]
+
+
+def test_shard_put_queues_what_fits_and_drops_the_rest():
+    shard = _Shard(capacity=5)
+    assert shard.put(queued(3)) == 0
+    assert shard.put(queued(4)) == 2
+    assert len(shard.samples) == 5
+    assert shard.put(queued(1)) == 1
+    
+    shard.closed = True
+    shard.samples.clear()
+    assert shard.put(queued(2)) == 2
+    assert not shard.samples
+
+
+def test_shard_take_waits_for_a_full_batch_or_the_flush_interval():
+    shard = _Shard(capacity=10)
+    shard.put(queued(4))
+    assert len(shard.take(batch_size=3, flush_interval=10)) == 3
+    
+    started = time.monotonic()
+    assert len(shard.take(batch_size=3, flush_interval=0.1)) == 1
+    assert time.monotonic() - started >= 0.1
+    
+    taken = []
+    taker = threading.Thread(target=lambda: taken.append(shard.take(batch_size=3, flush_interval=10)))
+    taker.start()
+    shard.put(queued(3))
+    taker.join(5)
+    assert len(taken[0]) == 3
+    
+    shard.closed = True
+    assert shard.take(batch_size=3, flush_interval=10) == []
+
+
+class ReceiverHandler(BaseHTTPRequestHandler):
+    """Record each remote-write request once `release` is set."""
+    
+    protocol_version = 'HTTP/1.1'
+    
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.release.wait(10)
+        with self.server.lock:
+            self.server.bodies.append((dict(self.headers), body))
+        self.send_response(204)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def receiver():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ReceiverHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.bodies = []
+    server.release = threading.Event()
+    server.release.set()
+    server.url = f"http://127.0.0.1:{server.server_port}/api/v1/write"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.release.set()
+    server.shutdown()
+    server.server_close()
+
+
+def registry_with(series):
+    registry = CollectorRegistry()
+    gauge = Gauge('crypto_price', 'Test series', ['asset'], registry=registry)
+    for i in range(series):
+        gauge.labels(asset=f"asset{i}").set(i)
+    return registry
+
+
+def dropped():
+    return PUSH_SAMPLES.labels(mode='remote_write', result='dropped')._value.get()
+
+
+def test_queue_delivers_decodable_requests(receiver):
+    pusher = RemoteWriteQueue({
+        'url': receiver.url, 'shards': 2, 'batch_size': 3, 'flush_interval': 0.05,
+        'external_labels': {'instance': 'edge-1'},
+    }, registry=registry_with(5))
+    pusher.start()
+    pusher.push()
+    pusher.stop()
+    
+    received = {}
+    for headers, body in receiver.bodies:
+        assert headers['Content-Encoding'] == 'snappy'
+        assert headers['X-Prometheus-Remote-Write-Version'] == '0.1.0'
+        for labels, samples in reference_write_request(reference_snappy(body)):
+            received.setdefault(dict(labels)['asset'], []).extend(samples)
+            assert dict(labels)['instance'] == 'edge-1'
+            assert [name for name, _ in labels] == sorted(name for name, _ in labels)
+    assert {asset: [value for value, _ in samples] for asset, samples in received.items()} == {
+        f"asset{i}": [float(i)] for i in range(5)
+    }
+
+
+def test_full_queue_drops_without_blocking_the_push(receiver):
+    # The receiver holds every request, so the queue fills and stays full
+    receiver.release.clear()
+    pusher = RemoteWriteQueue({
+        'url': receiver.url, 'shards': 1, 'capacity': 4, 'batch_size': 2, 'flush_interval': 0.01,
+        'timeout': 5, 'retry': {'max_attempts': 1},
+    }, registry=registry_with(4))
+    pusher.start()
+    before = dropped()
+    try:
+        started = time.monotonic()
+        for _ in range(5):
+            pusher.push()
+        assert time.monotonic() - started < 0.5
+        # At most one batch in flight and a full queue behind it
+        assert dropped() - before >= 5 * 4 - 4 - 2
+    finally:
+        receiver.release.set()
+        pusher.stop()
+
+
+class GatewayHandler(BaseHTTPRequestHandler):
+    """Record each Pushgateway PUT."""
+    
+    protocol_version = 'HTTP/1.1'
+    
+    def do_PUT(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        with self.server.lock:
+            self.server.bodies.append((self.path, body))
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def gateway():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), GatewayHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.bodies = []
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def on_scrape_requests():
+    return sum(ON_SCRAPE_REQUESTS.labels(result=result)._value.get() for result in ('cached', 'background', 'waited'))
+
+
+def test_pushgateway_push_from_an_on_scrape_collection_does_not_wait_on_it(gateway):
+    registry = registry_with(2)
+    exposition = ExpositionCache(registry=registry)
+    pusher = PushgatewayPusher({'url': gateway.url, 'job': 'test'}, exposition)
+    
+    class Collector:
+        def collect(self):
+            return {'bitcoin_price': 67012.34}
+    
+    def on_cycle():
+        exposition.render()
+        pusher.push()
+    
+    on_scrape = OnScrapeCollection(Collector(), min_age=10, max_age=60, timeout=3, on_collect=on_cycle)
+    exposition.refresh = on_scrape.refresh
+    pusher.start()
+    before = on_scrape_requests()
+    try:
+        started = time.monotonic()
+        body = exposition.get().body
+        elapsed = time.monotonic() - started
+    finally:
+        pusher.stop()
+    
+    # The scrape waited for the first collection only, not on a nested refresh
+    assert elapsed < 1
+    assert on_scrape_requests() - before == 1
+    assert b'crypto_price{asset="asset1"} 1.0' in body
+    assert gateway.bodies == [('/metrics/job/test', body)]
@@ -0,0 +1,137 @@
+"""Tests for the retry policy and retry budget."""
+import pytest
+import requests
+
+from providers.retry import GLOBAL_BUDGET, RetryBudget, RetryPolicy, configure_budget
+
+
+def response(status, headers=None):
+    resp = requests.Response()
+    resp.status_code = status
+    resp.headers.update(headers or {})
+    resp.url = 'http://upstream.test/price'
+    return resp
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+    
+    def __call__(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def policy(clock, **kwargs):
+    kwargs.setdefault('budget', RetryBudget(ratio=1, min_tokens=100))
+    return RetryPolicy(clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def replies(*responses):
+    queue = list(responses)
+    
+    def send(timeout):
+        item = queue.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return item
+    return send
+
+
+def test_budget_caps_retries_to_ratio_of_requests():
+    budget = RetryBudget(ratio=0.5, min_tokens=2)
+    assert budget.try_spend() and budget.try_spend()
+    assert not budget.try_spend()
+    budget.record_request()
+    assert not budget.try_spend()
+    budget.record_request()
+    assert budget.try_spend()
+
+
+def test_budget_is_never_refilled_past_min_tokens():
+    budget = RetryBudget(ratio=1, min_tokens=3)
+    for _ in range(10):
+        budget.record_request()
+    assert [budget.try_spend() for _ in range(4)] == [True, True, True, False]
+
+
+def test_exhausted_budget_stops_retrying():
+    clock = FakeClock()
+    retry = policy(clock, max_attempts=5, budget=RetryBudget(ratio=0, min_tokens=1))
+    send = replies(response(503), response(503), response(200))
+    with pytest.raises(requests.exceptions.HTTPError):
+        retry.call(send, timeout=1)
+    assert len(clock.sleeps) == 1
+
+
+def test_retries_transient_errors_until_success():
+    clock = FakeClock()
+    retry = policy(clock, max_attempts=3, base_delay=1, max_delay=4)
+    send = replies(requests.exceptions.ConnectionError('reset'), response(502), response(200))
+    assert retry.call(send, timeout=1).status_code == 200
+    assert len(clock.sleeps) == 2
+    assert all(0 <= delay <= 4 for delay in clock.sleeps)
+
+
+def test_non_retryable_status_raises_immediately():
+    clock = FakeClock()
+    with pytest.raises(requests.exceptions.HTTPError):
+        policy(clock).call(replies(response(404)), timeout=1)
+    assert clock.sleeps == []
+
+
+def test_retry_after_is_honoured_within_max_delay():
+    clock = FakeClock()
+    retry = policy(clock, max_attempts=2, max_delay=30)
+    retry.call(replies(response(429, {'Retry-After': '7'}), response(200)), timeout=1)
+    assert clock.sleeps == [7.0]
+
+
+def test_retry_after_is_capped_at_max_delay_without_deadline():
+    clock = FakeClock()
+    retry = policy(clock, max_attempts=2, max_delay=5)
+    retry.call(replies(response(503, {'Retry-After': '86400'}), response(200)), timeout=1)
+    assert clock.sleeps == [5]
+
+
+def test_retry_that_would_outlast_the_deadline_is_abandoned():
+    clock = FakeClock()
+    retry = policy(clock, max_attempts=3, max_delay=30, deadline=10)
+    with pytest.raises(requests.exceptions.HTTPError):
+        retry.call(replies(response(429, {'Retry-After': '20'}), response(200)), timeout=1)
+    assert clock.sleeps == []
+
+
+def test_attempt_timeout_shrinks_to_the_remaining_deadline():
+    clock = FakeClock()
+    timeouts = []
+    
+    def send(timeout):
+        timeouts.append(timeout)
+        clock.now += 3
+        return response(503, {'Retry-After': '1'})
+    
+    with pytest.raises(requests.exceptions.HTTPError):
+        policy(clock, max_attempts=3, deadline=10).call(send, timeout=5)
+    assert timeouts == [5, 5, 2]
+
+
+def test_from_config_leaves_the_shared_budget_alone():
+    ratio = GLOBAL_BUDGET.ratio
+    RetryPolicy.from_config({'budget_ratio': 0.9})
+    assert GLOBAL_BUDGET.ratio == ratio
+
+
+def test_configure_budget_sets_the_shared_ratio():
+    ratio = GLOBAL_BUDGET.ratio
+    try:
+        configure_budget({'budget_ratio': 0.05})
+        assert GLOBAL_BUDGET.ratio == 0.05
+        configure_budget({})
+        assert GLOBAL_BUDGET.ratio == 0.2
+    finally:
+        GLOBAL_BUDGET.ratio = ratio
@@ -0,0 +1,83 @@
+"""Tests for the rolling price window."""
+import math
+
+import pytest
+from prometheus_client import CollectorRegistry
+
+from metrics import MetricFactory, RollingAggregates, rolling
+from metrics.rolling import RollingWindow, window_label
+
+DAY = 86400
+
+
+def test_empty_window_has_no_stats():
+    assert RollingWindow(3600, 60).stats() is None
+
+
+def test_high_low_change_and_averages():
+    window = RollingWindow(3600, 60, averages=(120, 3600))
+    for minute, price in enumerate([100, 110, 90, 105]):
+        window.add(price, minute * 60 + 1)
+    stats = window.stats()
+    assert stats['high'] == 110
+    assert stats['low'] == 90
+    assert stats['change_pct'] == pytest.approx(5.0)
+    # The 2 minute average covers the current and the previous slot
+    assert stats['averages'][120] == pytest.approx((90 + 105) / 2)
+    assert stats['averages'][3600] == pytest.approx(101.25)
+
+
+def test_samples_older_than_the_window_fall_out():
+    window = RollingWindow(600, 60)
+    window.add(1000, 0)
+    window.add(100, 120)
+    # Ten slots: the current one (slot 11) and slots 2-10 before it
+    window.add(101, 660)
+    stats = window.stats()
+    assert stats['high'] == 101
+    assert stats['low'] == 100
+
+
+def test_late_sample_for_a_completed_slot_is_counted():
+    window = RollingWindow(600, 60)
+    window.add(100, 120)
+    window.add(500, 30)
+    assert window.stats()['high'] == 500
+    window.add(1, -1000)
+    assert window.stats()['low'] == 100
+
+
+def test_memory_is_fixed_by_window_and_resolution():
+    window = RollingWindow(DAY, 60)
+    for second in range(0, 2 * DAY, 7):
+        window.add(100 + math.sin(second), second)
+    assert window.size == 1440
+    assert len(window._slot) == 1440
+
+
+def test_load_matches_incremental_adds():
+    samples = [(100 + (i % 17), i * 13) for i in range(2000)]
+    incremental = RollingWindow(3600, 60, averages=(600,))
+    for price, timestamp in samples:
+        incremental.add(price, timestamp)
+    bulk = RollingWindow(3600, 60, averages=(600,))
+    bulk.load(samples)
+    assert bulk.stats() == incremental.stats()
+
+
+@pytest.mark.parametrize('seconds, label', [(60, '1m'), (3600, '1h'), (86400, '1d'), (90, '90s')])
+def test_window_label(seconds, label):
+    assert window_label(seconds) == label
+
+
+def test_aggregates_publish_gauges():
+    registry = CollectorRegistry()
+    factory = MetricFactory(rolling.DEFINITIONS, namespace='test', registry=registry)
+    aggregates = RollingAggregates(factory, window=3600, resolution=60, averages=[3600])
+    aggregates.observe('BTC', 'USD', 100, 0)
+    aggregates.observe('BTC', 'USD', 110, 61)
+    labels = {'currency': 'BTC', 'quote': 'USD'}
+    assert registry.get_sample_value('test_daily_high', labels) == 110
+    assert registry.get_sample_value('test_daily_low', labels) == 100
+    assert registry.get_sample_value('test_price_change_24h', labels) == pytest.approx(10)
+    assert registry.get_sample_value('test_moving_average', {**labels, 'window': '1h'}) == pytest.approx(105)
@@ -0,0 +1,97 @@
+"""Tests for the drift-free tick scheduler."""
+import pytest
+
+from engine.scheduler import TickScheduler
+
+
+class FakeClock:
+    def __init__(self, now=100.0):
+        self.now = now
+    
+    def __call__(self):
+        return self.now
+
+
+def scheduler(clock, interval=10, **kwargs):
+    return TickScheduler(interval, identity='replica-0', clock=clock, **kwargs)
+
+
+def test_ticks_stay_on_the_grid_despite_slow_cycles():
+    clock = FakeClock()
+    ticks = scheduler(clock)
+    starts = []
+    for duration in (0.5, 3, 7, 1):
+        clock.now += ticks.delay()
+        starts.append(clock.now)
+        ticks.start_tick()
+        clock.now += duration
+        ticks.complete_tick()
+    assert starts == [100, 110, 120, 130]
+
+
+def test_lag_is_measured_from_the_due_time():
+    clock = FakeClock()
+    ticks = scheduler(clock)
+    clock.now += 2.5
+    assert ticks.start_tick() == 2.5
+
+
+def test_skip_waits_for_the_next_grid_tick_after_an_overrun():
+    clock = FakeClock()
+    ticks = scheduler(clock, overrun='skip')
+    ticks.start_tick()
+    clock.now += 25
+    ticks.complete_tick()
+    # Ticks at 110 and 120 were missed; the next one is at 130
+    assert ticks.delay() == pytest.approx(5)
+
+
+def test_coalesce_runs_once_immediately_after_an_overrun():
+    clock = FakeClock()
+    ticks = scheduler(clock, overrun='coalesce')
+    ticks.start_tick()
+    clock.now += 25
+    ticks.complete_tick()
+    assert ticks.delay() == 0
+    ticks.start_tick()
+    clock.now += 1
+    ticks.complete_tick()
+    assert ticks.delay() == pytest.approx(4)
+
+
+def test_jitter_delays_each_tick_within_bounds():
+    clock = FakeClock()
+    ticks = scheduler(clock, jitter=2)
+    for tick in range(50):
+        grid = 100 + tick * 10
+        clock.now = grid
+        assert 0 <= ticks.delay() <= 2
+        clock.now += ticks.delay()
+        ticks.start_tick()
+        ticks.complete_tick()
+
+
+def test_splay_offset_is_stable_per_replica():
+    first = TickScheduler(10, splay=30, identity='replica-0', clock=FakeClock())
+    again = TickScheduler(10, splay=30, identity='replica-0', clock=FakeClock())
+    other = TickScheduler(10, splay=30, identity='replica-1', clock=FakeClock())
+    assert first.offset == again.offset
+    assert 0 <= first.offset < 30
+    assert first.offset != other.offset
+
+
+def test_reschedule_moves_the_pending_tick_to_the_new_interval():
+    clock = FakeClock()
+    ticks = scheduler(clock)
+    ticks.start_tick()
+    clock.now += 1
+    ticks.complete_tick()
+    ticks.reschedule(30)
+    # One new interval after the previous tick at 100
+    assert ticks.delay() == pytest.approx(29)
+
+
+@pytest.mark.parametrize('kwargs', [{'interval': 0}, {'interval': 10, 'overrun': 'queue'}])
+def test_invalid_settings_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        TickScheduler(clock=FakeClock(), **kwargs)
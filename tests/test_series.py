@@ -0,0 +1,128 @@
+"""Tests for series TTL expiry and the per-metric series limit."""
+import types
+
+import pytest
+from prometheus_client import CollectorRegistry
+
+from metrics import factory as factory_module
+from metrics.factory import MetricFactory
+
+DEFINITIONS = [
+    {'name': 'asset_price', 'type': 'gauge', 'labels': ['asset']},
+    {'name': 'errors_total', 'type': 'counter', 'labels': ['error_type']},
+    {'name': 'last_updated', 'type': 'gauge'},
+]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(factory_module, 'time', types.SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def make(series, definitions=DEFINITIONS):
+    registry = CollectorRegistry()
+    return MetricFactory(definitions, namespace='test', registry=registry, series=series), registry
+
+
+def exported(registry, name='test_asset_price'):
+    return {
+        sample.labels['asset']: sample.value
+        for family in registry.collect() for sample in family.samples
+        if sample.name == name
+    }
+
+
+def test_series_not_updated_within_ttl_are_expired(clock):
+    metrics, registry = make({'ttl': 60})
+    btc = metrics.handle('asset_price', asset='btc')
+    eth = metrics.handle('asset_price', asset='eth')
+    btc.set(1)
+    eth.set(2)
+    clock.now = 50
+    btc.set(3)
+    clock.now = 70
+    assert metrics.expire() == 1
+    assert exported(registry) == {'btc': 3}
+
+
+def test_expired_handle_reattaches_on_the_next_update(clock):
+    metrics, registry = make({'ttl': 60})
+    eth = metrics.handle('asset_price', asset='eth')
+    eth.set(2)
+    clock.now = 61
+    metrics.expire()
+    assert exported(registry) == {}
+    eth.set(4)
+    assert exported(registry) == {'eth': 4}
+    assert metrics.handle('asset_price', asset='eth') is eth
+
+
+def test_series_are_created_on_first_update_not_on_handle():
+    metrics, registry = make({'ttl': 60})
+    metrics.handle('asset_price', asset='btc')
+    assert exported(registry) == {}
+
+
+def test_limit_drops_new_series(clock):
+    metrics, registry = make({'max_series': 2, 'overflow': 'drop'})
+    for i, asset in enumerate(['btc', 'eth', 'sol']):
+        clock.now = i
+        metrics.handle('asset_price', asset=asset).set(i)
+    assert exported(registry) == {'btc': 0, 'eth': 1}
+
+
+def test_limit_evicts_least_recently_updated_series(clock):
+    metrics, registry = make({'max_series': 2, 'overflow': 'evict_oldest'})
+    btc = metrics.handle('asset_price', asset='btc')
+    eth = metrics.handle('asset_price', asset='eth')
+    btc.set(1)
+    clock.now = 1
+    eth.set(2)
+    clock.now = 2
+    btc.set(3)
+    clock.now = 3
+    metrics.handle('asset_price', asset='sol').set(4)
+    assert exported(registry) == {'btc': 3, 'sol': 4}
+
+
+def test_defaults_apply_only_to_labelled_gauges(clock):
+    metrics, _ = make({'ttl': 1, 'max_series': 1})
+    errors = metrics.handle('errors_total', error_type='exception')
+    errors.inc()
+    metrics.handle('errors_total', error_type='no_data').inc()
+    clock.now = 10
+    assert metrics.expire() == 0
+    assert errors is metrics.handle('errors_total', error_type='exception')
+    assert not isinstance(metrics.handle('last_updated'), factory_module.SeriesHandle)
+
+
+def test_definition_overrides_the_defaults(clock):
+    definitions = [{'name': 'asset_price', 'type': 'gauge', 'labels': ['asset'], 'ttl': 0, 'max_series': 1}]
+    metrics, registry = make({'ttl': 1, 'max_series': 10}, definitions)
+    metrics.handle('asset_price', asset='btc').set(1)
+    metrics.handle('asset_price', asset='eth').set(2)
+    clock.now = 10
+    assert metrics.expire() == 0
+    assert exported(registry) == {'btc': 1}
+
+
+def test_remove_drops_a_limited_series(clock):
+    metrics, registry = make({'ttl': 60})
+    metrics.handle('asset_price', asset='btc').set(1)
+    metrics.remove('asset_price', asset='btc')
+    assert exported(registry) == {}
+
+
+def test_unknown_overflow_policy_is_rejected():
+    with pytest.raises(ValueError):
+        make({'overflow': 'random'})
@@ -0,0 +1,23 @@
+"""Tests for pooled sessions and connection reuse accounting."""
+from concurrent.futures import ThreadPoolExecutor
+
+from providers.session import build_session
+
+
+def test_sequential_requests_reuse_one_connection(upstream):
+    session = build_session({'connections': 1, 'maxsize': 1})
+    for _ in range(5):
+        session.get(upstream.url, timeout=5).content
+    adapter = session.get_adapter(upstream.url)
+    assert adapter.stats == {'hits': 4, 'misses': 1}
+
+
+def test_concurrent_requests_count_every_request_once(upstream):
+    session = build_session({'connections': 1, 'maxsize': 4})
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: session.get(upstream.url, timeout=5).content, range(200)))
+    stats = session.get_adapter(upstream.url).stats
+    assert stats['hits'] + stats['misses'] == 200
+    # pool_block is off, so extra concurrent connections may open, but
+    # never more than there were requests in flight at once
+    assert 1 <= stats['misses'] <= 8
@@ -0,0 +1,141 @@
+"""Tests for the multi-process shard pool."""
+import multiprocessing
+import signal
+
+import pytest
+from prometheus_client import CollectorRegistry
+
+from engine import shards
+from engine.shards import SHARD_RESTARTS, SHARD_UP, ShardPool
+from metrics.factory import MetricFactory
+from providers import timing
+from providers.retry import GLOBAL_BUDGET
+from providers.session import POOL_MISSES
+
+
+def up(shard):
+    return SHARD_UP.labels(shard=str(shard))._value.get()
+
+
+@pytest.fixture
+def pool(upstream):
+    upstream.document = {'bitcoin': {'usd': 67012.34}, 'ethereum': {'usd': 3456.78}}
+    api_config = {'provider': 'coingecko', 'endpoint': upstream.url}
+    pool = ShardPool(api_config, ['bitcoin', 'ethereum'], ['usd'], workers=2, timeout=10)
+    pool.start()
+    yield pool
+    pool.stop()
+
+
+def test_collect_merges_shard_prices(pool):
+    prices, failed = pool.collect()
+    assert failed == 0
+    assert prices[('bitcoin', 'usd')] == 67012.34
+    assert prices[('ethereum', 'usd')] == 3456.78
+    assert up(0) == up(1) == 1
+
+
+def test_dead_worker_is_marked_down_and_restarted(pool, monkeypatch):
+    seen = []
+    spawn = pool._spawn
+    
+    def recording(shard):
+        seen.append(up(shard))
+        spawn(shard)
+    monkeypatch.setattr(pool, '_spawn', recording)
+    
+    before = SHARD_RESTARTS.labels(shard='1')._value.get()
+    process, _ = pool._workers[1]
+    process.kill()
+    process.join(5)
+    
+    prices, failed = pool.collect()
+    # Down while the replacement spawns, up once it runs, and this cycle is served
+    assert seen == [0]
+    assert up(1) == 1
+    assert SHARD_RESTARTS.labels(shard='1')._value.get() == before + 1
+    assert failed == 0
+    assert set(prices) == {('bitcoin', 'usd'), ('ethereum', 'usd')}
+
+
+def test_failed_respawn_leaves_the_shard_down(pool, monkeypatch):
+    def broken(shard):
+        raise OSError('cannot fork')
+    monkeypatch.setattr(pool, '_spawn', broken)
+    
+    with pytest.raises(OSError):
+        pool._restart(0, 'timed out')
+    assert up(0) == 0
+
+
+def test_worker_request_metrics_reach_the_parent(pool, upstream):
+    endpoint = upstream.url.split('//')[1].split('?')[0]
+    registry = CollectorRegistry()
+    factory = MetricFactory(timing.DEFINITIONS, namespace='bitcoin', registry=registry)
+    timing.bind(factory)
+    misses = POOL_MISSES.labels(host='127.0.0.1')._value.get()
+    
+    pool.collect()
+    # One new connection and one attempt per shard, recorded in the workers
+    assert POOL_MISSES.labels(host='127.0.0.1')._value.get() == misses + 2
+    requests = registry.get_sample_value(
+        'bitcoin_exporter_api_requests_total',
+        {'provider': 'coingecko', 'endpoint': endpoint, 'status': '200'}
+    )
+    assert requests == 2
+    
+    pool.collect()
+    # Deltas, not running totals: nothing is counted twice
+    assert POOL_MISSES.labels(host='127.0.0.1')._value.get() == misses + 2
+    count = registry.get_sample_value(
+        'bitcoin_exporter_api_latency_seconds_count',
+        {'provider': 'coingecko', 'endpoint': endpoint, 'phase': 'attempt'}
+    )
+    assert count == upstream.requests
+
+
+def test_worker_applies_the_retry_budget_and_reports_changes(upstream, monkeypatch):
+    monkeypatch.setattr(GLOBAL_BUDGET, 'ratio', GLOBAL_BUDGET.ratio)
+    handler = signal.getsignal(signal.SIGINT)
+    parent, child = multiprocessing.Pipe()
+    parent.send(1)
+    parent.send(None)
+    api_config = {'provider': 'coingecko', 'endpoint': upstream.url, 'retry': {'budget_ratio': 0.5}}
+    try:
+        shards._shard_worker(api_config, ['bitcoin'], ['usd'], child)
+    finally:
+        signal.signal(signal.SIGINT, handler)
+        timing.redirect(None)
+    
+    assert GLOBAL_BUDGET.ratio == 0.5
+    cycle, prices, failed, (changes, attempts) = parent.recv()
+    assert (cycle, prices, failed) == (1, {('bitcoin', 'usd'): 67012.34}, 0)
+    assert [status for _, _, _, status in attempts] == ['200']
+    assert {'dns', 'connect', 'response', 'attempt'} <= set(attempts[0][2])
+    # The first reply carries everything since the worker process started
+    pool_misses = shards.RELAYED.index(POOL_MISSES)
+    key = (pool_misses, (('host', '127.0.0.1'),))
+    assert dict(changes)[key] == POOL_MISSES.labels(host='127.0.0.1')._value.get()
+
+
+def test_failed_restart_does_not_stop_the_other_shards(pool, monkeypatch):
+    spawn = pool._spawn
+    
+    def broken(shard):
+        raise OSError('cannot fork')
+    monkeypatch.setattr(pool, '_spawn', broken)
+    process, _ = pool._workers[1]
+    process.kill()
+    process.join(5)
+    
+    prices, failed = pool.collect()
+    assert failed == 1
+    assert up(1) == 0
+    assert len(prices) == 1
+    
+    # Retried on the next cycle
+    monkeypatch.setattr(pool, '_spawn', spawn)
+    prices, failed = pool.collect()
+    assert failed == 0
+    assert up(1) == 1
+    assert len(prices) == 2
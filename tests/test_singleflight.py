@@ -0,0 +1,67 @@
+"""Tests for single-flight request coalescing."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from providers.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls = []
+    release = threading.Event()
+    
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return 'price'
+    
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [executor.submit(flights.do, 'key', fetch) for _ in range(8)]
+        deadline = time.monotonic() + 5
+        while flights.inflight() != 1 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        time.sleep(0.05)
+        release.set()
+        results = [future.result(timeout=5) for future in futures]
+    
+    assert results == ['price'] * 8
+    assert len(calls) == 1
+    assert flights.inflight() == 0
+
+
+def test_waiters_receive_the_leaders_exception():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    
+    def fetch():
+        started.set()
+        release.wait(5)
+        raise ConnectionError('upstream down')
+    
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flights.do, 'key', fetch)
+        started.wait(5)
+        waiter = executor.submit(flights.do, 'key', lambda: 'never called')
+        time.sleep(0.05)
+        release.set()
+        for future in (leader, waiter):
+            with pytest.raises(ConnectionError):
+                future.result(timeout=5)
+
+
+def test_distinct_keys_do_not_coalesce():
+    flights = SingleFlight()
+    assert flights.do('a', lambda: 1) == 1
+    assert flights.do('b', lambda: 2) == 2
+
+
+def test_calls_after_completion_run_again():
+    flights = SingleFlight()
+    calls = []
+    for _ in range(3):
+        flights.do('key', lambda: calls.append(1))
+    assert len(calls) == 3
@@ -0,0 +1,135 @@
+"""Tests for streaming providers: reconnects and the polling fallback."""
+import json
+import threading
+import time
+
+import pytest
+
+from collectors.bitcoin import BitcoinCollector
+from providers import streaming
+from providers.streaming import STREAM_RECONNECTS, CoinbaseTickerStream
+from ws_server import WebSocketServer
+
+
+def ticker(price, product='BTC-USD'):
+    return json.dumps({'type': 'ticker', 'product_id': product, 'price': str(price)})
+
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def reconnects():
+    return STREAM_RECONNECTS.labels(stream='coinbase')._value.get()
+
+
+@pytest.fixture
+def stream_factory():
+    streams = []
+    
+    def make(url, **config):
+        stream = CoinbaseTickerStream({'endpoint': url, 'publish_interval': 0.02, **config})
+        streams.append(stream)
+        return stream
+    yield make
+    for stream in streams:
+        stream.stop()
+
+
+def test_subscribes_and_publishes_conflated_prices(stream_factory):
+    subscriptions = []
+    
+    def script(conn):
+        subscriptions.append(json.loads(conn.recv_frame()[3]))
+        for price in (1, 2, 3):
+            conn.send_text(ticker(price))
+        conn.send_text(json.dumps({'type': 'heartbeat'}))
+        conn.recv_frame()
+    
+    published = []
+    with WebSocketServer(script) as server:
+        # Ticks arrive well within one publish interval, so they are conflated
+        stream = stream_factory(server.url, publish_interval=0.3)
+        stream.start(published.append)
+        assert wait_until(lambda: stream.latest() == {'BTC-USD': 3.0})
+        assert wait_until(lambda: published)
+        assert stream.is_healthy()
+    assert subscriptions == [{'type': 'subscribe', 'product_ids': ['BTC-USD'], 'channels': ['ticker']}]
+    assert published == [{'BTC-USD': 3.0}]
+
+
+def test_server_close_reconnects_with_backoff(stream_factory, monkeypatch):
+    ceilings = []
+    monkeypatch.setattr(streaming.random, 'uniform', lambda low, high: ceilings.append(high) or 0.01)
+    connections = []
+    
+    def script(conn):
+        connections.append(conn)
+        conn.recv_frame()
+        if len(connections) == 4:
+            conn.send_text(ticker(67012.34))
+            conn.recv_frame()
+        # Otherwise close straight away, before any price arrives
+    
+    before = reconnects()
+    with WebSocketServer(script) as server:
+        stream = stream_factory(server.url, reconnect_backoff=1, reconnect_max_backoff=3)
+        stream.start(lambda prices: None)
+        assert wait_until(lambda: stream.latest() == {'BTC-USD': 67012.34})
+        assert stream.is_healthy()
+    # Consecutive failures double the backoff ceiling up to the maximum
+    assert ceilings[:3] == [1, 2, 3]
+    assert reconnects() - before >= 3
+
+
+def test_failure_count_resets_after_a_price(stream_factory, monkeypatch):
+    ceilings = []
+    monkeypatch.setattr(streaming.random, 'uniform', lambda low, high: ceilings.append(high) or 0.01)
+    connections = []
+    
+    def script(conn):
+        connections.append(conn)
+        conn.recv_frame()
+        conn.send_text(ticker(len(connections)))
+    
+    with WebSocketServer(script) as server:
+        stream = stream_factory(server.url, reconnect_backoff=1)
+        stream.start(lambda prices: None)
+        assert wait_until(lambda: len(ceilings) >= 3)
+    assert ceilings[:3] == [1, 1, 1]
+
+
+def test_stale_stream_falls_back_to_polling(upstream):
+    silent = threading.Event()
+    
+    def script(conn):
+        conn.recv_frame()
+        conn.send_text(ticker(70000))
+        # Stay connected but go quiet
+        silent.wait(5)
+    
+    with WebSocketServer(script) as server:
+        collector = BitcoinCollector({'api': {
+            'provider': 'coingecko',
+            'endpoint': upstream.url,
+            'cache': {'enabled': False},
+            'stream': {'provider': 'coinbase', 'endpoint': server.url, 'stale_after': 0.3,
+                       'publish_interval': 0.02},
+        }})
+        try:
+            collector.start_stream()
+            assert wait_until(collector.stream.is_healthy)
+            assert collector.collect()['bitcoin_price'] == 70000
+            assert upstream.requests == 0
+            
+            assert wait_until(lambda: not collector.stream.is_healthy())
+            assert collector.collect()['bitcoin_price'] == 67012.34
+            assert upstream.requests == 1
+        finally:
+            silent.set()
+            collector.close()
@@ -0,0 +1,112 @@
+"""Tests for upstream request phase timing."""
+import gc
+import socket
+import weakref
+
+import pytest
+import requests
+from prometheus_client import CollectorRegistry
+
+from metrics.factory import MetricFactory
+from providers import timing
+from providers.session import build_session
+
+
+def bound_registry():
+    registry = CollectorRegistry()
+    factory = MetricFactory(timing.DEFINITIONS, namespace='bitcoin', registry=registry)
+    timing.bind(factory)
+    return factory, registry
+
+
+def observations(registry, phase):
+    return registry.get_sample_value(
+        'bitcoin_exporter_api_latency_seconds_count', {'provider': 'p', 'endpoint': 'e', 'phase': phase}
+    ) or 0
+
+
+def requests_total(registry, status):
+    return registry.get_sample_value(
+        'bitcoin_exporter_api_requests_total', {'provider': 'p', 'endpoint': 'e', 'status': status}
+    ) or 0
+
+
+@pytest.fixture
+def session():
+    session = build_session({})
+    yield session
+    session.close()
+
+
+def test_new_connection_records_dns_and_connect_separately(upstream, session):
+    factory, registry = bound_registry()
+    timing.timed_send('p', 'e', lambda: session.get(upstream.url))
+    for phase in ('dns', 'connect', 'response', 'attempt'):
+        assert observations(registry, phase) == 1
+    assert observations(registry, 'tls') == 0
+    assert requests_total(registry, '200') == 1
+    
+    # A reused keep-alive connection has no setup phases
+    timing.timed_send('p', 'e', lambda: session.get(upstream.url))
+    assert observations(registry, 'dns') == 1
+    assert observations(registry, 'connect') == 1
+    assert observations(registry, 'attempt') == 2
+
+
+def test_every_bound_factory_records(upstream, session):
+    first, first_registry = bound_registry()
+    second, second_registry = bound_registry()
+    timing.timed_send('p', 'e', lambda: session.get(upstream.url))
+    assert observations(first_registry, 'attempt') == 1
+    assert observations(second_registry, 'attempt') == 1
+    assert requests_total(second_registry, '200') == 1
+
+
+def test_dropped_factories_stop_recording(upstream, session):
+    kept, kept_registry = bound_registry()
+    dropped = weakref.ref(bound_registry()[0])
+    gc.collect()
+    assert dropped() is None
+    assert kept in timing._bound
+    timing.timed_send('p', 'e', lambda: session.get(upstream.url))
+    assert observations(kept_registry, 'attempt') == 1
+
+
+def test_failed_attempt_counts_as_error(session):
+    factory, registry = bound_registry()
+    with pytest.raises(requests.ConnectionError):
+        timing.timed_send('p', 'e', lambda: session.get('http://127.0.0.1:9/', timeout=1))
+    assert requests_total(registry, 'error') == 1
+    assert observations(registry, 'attempt') == 1
+
+
+def test_connect_falls_back_to_the_next_resolved_address(upstream, session, monkeypatch):
+    resolve = socket.getaddrinfo
+    
+    def fake_getaddrinfo(host, port, *args, **kwargs):
+        if host == 'upstream.test':
+            # Nothing listens on 127.0.0.2; the upstream is on 127.0.0.1
+            return [
+                (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.2', port)),
+                (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', port)),
+            ]
+        return resolve(host, port, *args, **kwargs)
+    monkeypatch.setattr(socket, 'getaddrinfo', fake_getaddrinfo)
+    
+    factory, registry = bound_registry()
+    url = upstream.url.replace('127.0.0.1', 'upstream.test')
+    response = timing.timed_send('p', 'e', lambda: session.get(url, timeout=5))
+    assert response.json() == upstream.document
+    assert observations(registry, 'dns') == 1
+    assert observations(registry, 'connect') == 1
+
+
+def test_unresolvable_host_raises_a_connection_error(session, monkeypatch):
+    def fail(*args, **kwargs):
+        raise socket.gaierror(socket.EAI_NONAME, 'Name or service not known')
+    monkeypatch.setattr(socket, 'getaddrinfo', fail)
+    
+    factory, registry = bound_registry()
+    with pytest.raises(requests.ConnectionError, match='resolve'):
+        timing.timed_send('p', 'e', lambda: session.get('http://upstream.test/', timeout=1))
+    assert requests_total(registry, 'error') == 1
@@ -0,0 +1,125 @@
+"""Tests for the WebSocket client against a local stand-in server."""
+import base64
+import queue
+import struct
+
+import pytest
+
+from providers.websocket import OP_CLOSE, OP_CONTINUATION, OP_PING, OP_PONG, OP_TEXT, WebSocketClient, WebSocketClosed
+from ws_server import WebSocketServer
+
+
+def connected(server):
+    client = WebSocketClient(server.url, timeout=5)
+    client.connect()
+    return client
+
+
+def test_handshake_sends_a_valid_upgrade_request():
+    received = queue.Queue()
+    with WebSocketServer(lambda conn: received.put(conn.request)) as server:
+        connected(server).close()
+        request = received.get(timeout=5)
+    assert request['request-line'] == 'GET /feed HTTP/1.1'
+    assert request['upgrade'] == 'websocket'
+    assert request['connection'] == 'Upgrade'
+    assert request['sec-websocket-version'] == '13'
+    assert len(base64.b64decode(request['sec-websocket-key'])) == 16
+
+
+def test_handshake_rejects_a_wrong_accept_key():
+    with WebSocketServer(lambda conn: None, accept=lambda key: 'bm90IHRoZSBrZXk=') as server:
+        with pytest.raises(ConnectionError, match='Sec-WebSocket-Accept'):
+            connected(server)
+
+
+def test_handshake_rejects_a_refused_upgrade():
+    with WebSocketServer(lambda conn: None, status='403 Forbidden') as server:
+        with pytest.raises(ConnectionError, match='403'):
+            connected(server)
+
+
+@pytest.mark.parametrize('size', [5, 300, 70000])
+def test_client_frames_are_masked(size):
+    frames = queue.Queue()
+    with WebSocketServer(lambda conn: frames.put(conn.recv_frame())) as server:
+        client = connected(server)
+        message = 'x' * size
+        client.send_text(message)
+        fin, opcode, masked, payload = frames.get(timeout=5)
+        client.close()
+    assert (fin, opcode, masked) == (True, OP_TEXT, True)
+    assert payload.decode() == message
+
+
+def test_fragmented_message_is_reassembled_across_a_ping():
+    def script(conn):
+        conn.send_frame(OP_TEXT, b'{"price": ', fin=False)
+        conn.send_frame(OP_PING, b'mid')
+        conn.send_frame(OP_CONTINUATION, b'"67012', fin=False)
+        conn.send_frame(OP_CONTINUATION, b'.34"}', fin=True)
+        conn.recv_frame()
+    
+    with WebSocketServer(script) as server:
+        client = connected(server)
+        assert client.recv() == '{"price": "67012.34"}'
+        client.close()
+
+
+def test_64_bit_length_frame_is_received():
+    message = 'p' * 70000
+    with WebSocketServer(lambda conn: (conn.send_text(message), conn.recv_frame())) as server:
+        client = connected(server)
+        assert client.recv() == message
+        client.close()
+
+
+def test_ping_is_answered_with_a_masked_pong():
+    frames = queue.Queue()
+    
+    def script(conn):
+        conn.send_frame(OP_PING, b'heartbeat')
+        conn.send_frame(OP_PONG, b'unsolicited')
+        conn.send_text('tick')
+        frames.put(conn.recv_frame())
+    
+    with WebSocketServer(script) as server:
+        client = connected(server)
+        assert client.recv() == 'tick'
+        fin, opcode, masked, payload = frames.get(timeout=5)
+        client.close()
+    assert (opcode, masked, payload) == (OP_PONG, True, b'heartbeat')
+
+
+def test_server_close_is_echoed_and_raises():
+    frames = queue.Queue()
+    
+    def script(conn):
+        conn.send_frame(OP_CLOSE, struct.pack('!H', 1001) + b'going away')
+        frames.put(conn.recv_frame())
+    
+    with WebSocketServer(script) as server:
+        client = connected(server)
+        with pytest.raises(WebSocketClosed):
+            client.recv()
+        fin, opcode, masked, payload = frames.get(timeout=5)
+        client.close()
+    assert (opcode, masked, payload) == (OP_CLOSE, True, struct.pack('!H', 1001))
+
+
+def test_connection_dropped_mid_frame_raises():
+    def script(conn):
+        conn.sock.sendall(bytes([0x81, 10]) + b'abc')
+    
+    with WebSocketServer(script) as server:
+        client = connected(server)
+        with pytest.raises(WebSocketClosed):
+            client.recv()
+        client.close()
+
+
+def test_close_is_idempotent():
+    with WebSocketServer(lambda conn: conn.recv_frame()) as server:
+        client = connected(server)
+        client.close()
+        client.close()
@@ -0,0 +1,140 @@
+"""Local WebSocket stand-in server for the streaming tests.
+
+Each accepted connection gets the RFC 6455 opening handshake and is then
+handed to a per-test script as a ServerConnection. Frames the server sends
+are unmasked; frames it receives must be masked, as clients must mask.
+"""
+import base64
+import hashlib
+import socket
+import struct
+import threading
+from typing import Callable, Dict, List, Optional
+
+GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+def accept_key(key: str) -> str:
+    return base64.b64encode(hashlib.sha1((key + GUID).encode()).digest()).decode()
+
+
+class ServerConnection:
+    """Server side of one WebSocket connection."""
+    
+    def __init__(self, sock: socket.socket, reader, request: Dict[str, str]):
+        self.sock = sock
+        self.reader = reader
+        self.request = request
+    
+    def send_frame(self, opcode: int, payload: bytes = b'', fin: bool = True):
+        header = bytearray([(0x80 if fin else 0) | opcode])
+        length = len(payload)
+        if length < 126:
+            header.append(length)
+        elif length < 1 << 16:
+            header.append(126)
+            header += struct.pack('!H', length)
+        else:
+            header.append(127)
+            header += struct.pack('!Q', length)
+        self.sock.sendall(bytes(header) + payload)
+    
+    def send_text(self, text: str):
+        self.send_frame(0x1, text.encode())
+    
+    def recv_frame(self):
+        """Read one client frame; returns (fin, opcode, masked, payload)."""
+        first, second = self._read(2)
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', self._read(2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', self._read(8))[0]
+        masked = bool(second & 0x80)
+        mask = self._read(4) if masked else b'\0\0\0\0'
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(self._read(length)))
+        return bool(first & 0x80), first & 0x0F, masked, payload
+    
+    def _read(self, size: int) -> bytes:
+        data = self.reader.read(size)
+        if len(data) < size:
+            raise ConnectionError('client closed mid-frame')
+        return data
+    
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.reader.close()
+        self.sock.close()
+
+
+class WebSocketServer:
+    """Threaded WebSocket server on an ephemeral port.
+    
+    `script(conn)` runs once per connection after the handshake; the
+    connection is closed when it returns. `accept` can override the
+    Sec-WebSocket-Accept value and `status` the handshake status line.
+    """
+    
+    def __init__(self, script: Callable[[ServerConnection], None],
+                 accept: Optional[Callable[[str], str]] = None, status: str = '101 Switching Protocols'):
+        self.script = script
+        self.accept = accept or accept_key
+        self.status = status
+        self.connections: List[ServerConnection] = []
+        self.errors: List[BaseException] = []
+        self._listener = socket.create_server(('127.0.0.1', 0))
+        self.url = f"ws://127.0.0.1:{self._listener.getsockname()[1]}/feed"
+        self._closed = threading.Event()
+        threading.Thread(target=self._serve, daemon=True).start()
+    
+    def _serve(self):
+        while not self._closed.is_set():
+            try:
+                sock, _ = self._listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(sock,), daemon=True).start()
+    
+    def _handle(self, sock: socket.socket):
+        reader = sock.makefile('rb')
+        request_line = reader.readline().decode('latin-1').strip()
+        headers = {'request-line': request_line}
+        while True:
+            line = reader.readline().decode('latin-1')
+            if line in ('\r\n', '\n', ''):
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        key = headers.get('sec-websocket-key', '')
+        sock.sendall((
+            f"HTTP/1.1 {self.status}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {self.accept(key)}\r\n\r\n"
+        ).encode())
+        
+        conn = ServerConnection(sock, reader, headers)
+        self.connections.append(conn)
+        try:
+            self.script(conn)
+        except (ConnectionError, OSError, ValueError):
+            pass
+        except BaseException as e:
+            self.errors.append(e)
+        finally:
+            conn.close()
+    
+    def close(self):
+        self._closed.set()
+        self._listener.close()
+        for conn in self.connections:
+            conn.close()
+    
+    def __enter__(self) -> 'WebSocketServer':
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()